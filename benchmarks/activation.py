@@ -0,0 +1,88 @@
+# Billboarded NPCs spread over worlds of growing size at the same density, with the player
+# walking a circle through the middle.  Every NPC billboarded and in the window each frame,
+# as SceneIntro did, against an ActivationGrid updated ten times a second that only keeps
+# the ones within its radii in the window and the Billboards.  Reports the time a frame
+# spends on this and the objects in the window, which is what the renderer draws.  Runs
+# headless, so drawing itself isn't timed.
+# Run from the repository root: python -m benchmarks.activation [npcs ...]
+import os
+os.environ["GAME_HEADLESS"] = "1"
+
+from game_tools.assets import AssetCache
+from game_tools.billboard import Billboards
+from game_tools.activation import ActivationGrid, render_object
+
+from Loxoc import Window, Camera, Object3D, Vec3
+
+import argparse
+import random
+import time
+import math
+
+FRAMES = 600
+# Average distance between NPCs.
+SPACING = 20.0
+
+def world(npcs:int) -> tuple[Window, list[Object3D]]:
+    camera = Camera(Vec3(0, 0, 0), Vec3(0, 0, 0), 1280, 720, 1000, math.radians(60))
+    window = Window("activation", camera, 1280, 720)
+    model = AssetCache().model("./models/character_plane/character_plane.gltf")
+    rng = random.Random(1)
+    half = math.sqrt(npcs) * SPACING / 2
+    objects = [Object3D(model, Vec3(rng.uniform(-half, half), 0, rng.uniform(-half, half))) for _ in range(npcs)]
+    for obj in objects:
+        window.add_object(obj)
+    return window, objects
+
+def path(frame:int) -> Vec3:
+    angle = frame / FRAMES * 2 * math.pi
+    return Vec3(math.cos(angle) * 100, 1, math.sin(angle) * 100)
+
+def everything(npcs:int) -> tuple[float, float]:
+    window, objects = world(npcs)
+    billboards = Billboards()
+    billboards.add_list(objects)
+    drawn = 0
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        billboards.update(path(frame))
+        drawn += len(window.objects)
+    return (time.perf_counter() - start) / FRAMES, drawn / FRAMES
+
+def activated(npcs:int) -> tuple[float, float, float]:
+    window, objects = world(npcs)
+    billboards = Billboards()
+    billboards.add_list(objects)
+    activation = ActivationGrid()
+    for obj in objects:
+        activation.add(obj, obj.position,
+            animate = lambda active, obj = obj: billboards.add(obj) if active else billboards.remove(obj),
+            render = render_object(window, obj))
+    # The first update switches off everything far away, once per world.
+    activation.update(path(0))
+    drawn = 0
+    measured = 0
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        player = path(frame)
+        if frame % 6 == 0:
+            activation.update(player)
+            measured += activation.measured
+        billboards.update(player)
+        drawn += len(window.objects)
+    return (time.perf_counter() - start) / FRAMES, drawn / FRAMES, measured / (FRAMES / 6)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("npcs", type=int, nargs="*", default=[1000, 10000, 50000])
+    args = parser.parse_args()
+    for npcs in args.npcs:
+        side = math.sqrt(npcs) * SPACING
+        print(f"{npcs} NPCs over {side:.0f} x {side:.0f} units, {FRAMES} frames")
+        frame, drawn = everything(npcs)
+        print(f"{'everything every frame':>24}: {frame * 1000:7.3f} ms a frame, {drawn:8.0f} objects in the window")
+        frame, drawn, measured = activated(npcs)
+        print(f"{'ActivationGrid':>24}: {frame * 1000:7.3f} ms a frame, {drawn:8.0f} objects in the window, {measured:6.0f} measured an update")
+
+if __name__ == "__main__":
+    main()
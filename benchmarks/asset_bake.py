@@ -0,0 +1,85 @@
+# Getting at the raw vertex, index and pixel data of every model and texture: cold from
+# the sources (parsing the .gltf and its .bin, decoding the images) against warm from an
+# AssetBake (a freshness check, mmap and the header), for the current assets and a
+# synthetic set with 100 copies of each.  Also times baking and the hash check after every
+# source was touched.  Only the Python side is measured, Loxoc loads from paths and is
+# handed the baked file instead.  JPEGs are skipped without Pillow.
+# Run from the repository root: python -m benchmarks.asset_bake
+from game_tools.bake import AssetBake, bake_gltf, decode_image, read_glb, read_tga
+
+import tempfile
+import shutil
+import json
+import time
+import os
+
+def sources(directories:list[str]) -> list[str]:
+    return sorted(
+        os.path.join(root, name)
+        for directory in directories for root, _, files in os.walk(directory) for name in files
+        if AssetBake.kind(name)
+    )
+
+def cold(paths:list[str]) -> int:
+    # Bytes of raw data got at.
+    total = 0
+    for path in paths:
+        if AssetBake.kind(path) == "model":
+            with open(path, "r") as f:
+                gltf = json.load(f)
+            for buffer in gltf.get("buffers", []):
+                with open(os.path.join(os.path.dirname(path), buffer["uri"]), "rb") as f:
+                    total += len(f.read())
+        else:
+            pixels = decode_image(path)
+            total += pixels.nbytes if pixels is not None else 0
+    return total
+
+def warm(bake:AssetBake, paths:list[str]) -> int:
+    total = 0
+    with bake.batch():
+        for path in paths:
+            total += raw_size(bake, path)
+    return total
+
+def raw_size(bake:AssetBake, path:str) -> int:
+    mapped = bake.map(path)
+    if mapped is None:
+        return 0
+    if AssetBake.kind(path) == "model":
+        return len(read_glb(mapped)[1])
+    return len(read_tga(mapped)[2])
+
+def timed(label:str, run) -> any:
+    start = time.perf_counter()
+    result = run()
+    print(f"{label:>34}: {(time.perf_counter() - start) * 1000:9.2f} ms")
+    return result
+
+def measure(label:str, paths:list[str], cache:str):
+    print(f"{label}, {len(paths)} files")
+    bake = AssetBake(cache)
+    skipped = timed("bake", lambda: bake.bake_all([os.path.dirname(os.path.commonpath(paths))]))
+    cold_bytes = timed("cold, from the sources", lambda: cold([path for path in paths if path not in skipped]))
+    warm_bytes = timed("warm, mapped from the bake", lambda: warm(AssetBake(cache), paths))
+    for path in paths:
+        os.utime(path)
+    timed("warm after touching every source", lambda: warm(AssetBake(cache), paths))
+    assert cold_bytes == warm_bytes, f"{cold_bytes} bytes from the sources but {warm_bytes} baked"
+    print(f"{'':>34}  {warm_bytes / 1024:.0f} KiB of raw data, {len(skipped)} skipped: {', '.join(sorted({os.path.basename(path) for path in skipped})) or 'none'}")
+
+def main():
+    with tempfile.TemporaryDirectory() as temporary:
+        # Copies, so touching them doesn't disturb the real asset cache.
+        current = os.path.join(temporary, "current")
+        for directory in ("models", "sprites"):
+            shutil.copytree(directory, os.path.join(current, directory))
+        measure("current assets", sources([current]), os.path.join(temporary, "current_cache"))
+
+        synthetic = os.path.join(temporary, "synthetic")
+        for copy in range(100):
+            shutil.copytree(current, os.path.join(synthetic, str(copy)))
+        measure("synthetic, 100x", sources([synthetic]), os.path.join(temporary, "synthetic_cache"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# 5k billboarded character planes facing a camera that circles through the crowd: the
+# previous per-object quaternion update against Billboards, with and without culling by
+# distance and behind the camera.  Also reports how far the accumulated rotations of the
+# per-object update drift from the exact yaw.  Runs headless.
+# Run from the repository root: python -m benchmarks.billboards
+import os
+os.environ["GAME_HEADLESS"] = "1"
+
+import game_tools
+from game_tools.billboard import Billboards
+
+from Loxoc import Vec3, Quaternion, Object3D, Model
+
+import math
+import random
+import time
+
+COUNT = 5_000
+FRAMES = 120
+WORLD = 100.0
+
+def crowd() -> list[Object3D]:
+    rng = random.Random(38)
+    model = Model.from_file("./models/character_plane/character_plane.gltf")
+    return [Object3D(model, Vec3(rng.uniform(-WORLD, WORLD), -2, rng.uniform(-WORLD, WORLD))) for _ in range(COUNT)]
+
+def camera(frame:int) -> tuple[Vec3, Vec3]:
+    angle = frame * 0.02
+    position = Vec3(math.cos(angle) * WORLD * 0.5, 0, math.sin(angle) * WORLD * 0.5)
+    # Looking along the circle.
+    forward = Vec3(-math.sin(angle), 0, math.cos(angle))
+    return position, forward
+
+def per_object(character:Object3D, position:Vec3):
+    # SceneIntro.bilboard_character before Billboards.
+    vec_direction = (character.position - position).get_normalized()
+    fwd_vec = character.rotation.forward
+    current_yaw = math.atan2(fwd_vec.x, fwd_vec.z)
+    target_yaw = math.atan2(vec_direction.x, vec_direction.z)
+    yaw_quat = Quaternion.from_axis_angle(Vec3(0.0,1.0,0.0), target_yaw - current_yaw)
+    character.rotation = (yaw_quat * character.rotation).get_normalized()
+
+def drift(objects:list[Object3D], position:Vec3) -> float:
+    # Largest angle between an object's forward and the exact billboard direction.
+    worst = 0.0
+    for obj in objects:
+        forward = obj.rotation.forward
+        to = obj.position - position
+        exact = math.atan2(to.x, to.z)
+        error = abs((math.atan2(forward.x, forward.z) - exact + math.pi) % (2 * math.pi) - math.pi)
+        tilt = math.asin(min(1.0, abs(forward.y)))
+        worst = max(worst, error, tilt)
+    return worst
+
+def timed(label:str, run) -> float:
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        run(frame)
+    elapsed = (time.perf_counter() - start) / FRAMES
+    print(f"{label:>36}: {elapsed * 1000:8.3f} ms/frame")
+    return elapsed
+
+def main():
+    objects = crowd()
+    timed(f"per object, {COUNT}", lambda frame: [per_object(obj, camera(frame)[0]) for obj in objects])
+    print(f"{'':>36}  worst drift from the exact yaw {math.degrees(drift(objects, camera(FRAMES - 1)[0])):.2e} degrees")
+
+    objects = crowd()
+    billboards = Billboards()
+    billboards.add_list(objects)
+    timed(f"Billboards, {COUNT}", lambda frame: billboards.update(camera(frame)[0]))
+    print(f"{'':>36}  worst error from the exact yaw {math.degrees(drift(objects, camera(FRAMES - 1)[0])):.2e} degrees, turns under min_turn ({math.degrees(billboards.min_turn):.2e}) are skipped")
+
+    objects = crowd()
+    billboards = Billboards(max_distance = 60)
+    billboards.add_list(objects)
+    turned = []
+    timed(f"Billboards culled, {COUNT}", lambda frame: turned.append(billboards.update(*camera(frame))))
+    print(f"{'':>36}  {sum(turned) / len(turned):.0f} turned per frame on average, {billboards.culled} culled on the last")
+
+    # A still camera leaves every billboard where it is.
+    position, forward = camera(0)
+    billboards.update(position, forward)
+    timed(f"Billboards, camera still, {COUNT}", lambda frame: billboards.update(position, forward))
+    print(f"{'':>36}  {billboards.turned} turned on the last frame")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Spatial hash against brute force for 10k static and 1k dynamic boxes.
+# Run from the repository root: python -m benchmarks.broadphase
+from Loxoc import Vec3
+
+from game_tools.broadphase import SpatialHash
+from game_tools.collision import AABB, inverse_direction
+
+import random
+import time
+
+STATIC = 10_000
+DYNAMIC = 1_000
+FRAMES = 20
+WORLD = 500.0
+
+def random_box(rng:random.Random) -> AABB:
+    half = rng.uniform(0.25, 2.0)
+    return AABB.from_center(rng.uniform(-WORLD, WORLD), rng.uniform(-20, 20), rng.uniform(-WORLD, WORLD), half, half, half)
+
+def main():
+    rng = random.Random(38)
+    static = [(i, random_box(rng)) for i in range(STATIC)]
+    dynamic = [(STATIC + i, random_box(rng)) for i in range(DYNAMIC)]
+
+    broadphase = SpatialHash(cell_size = 8.0)
+    start = time.perf_counter()
+    for target, aabb in static + dynamic:
+        broadphase.insert(target, aabb)
+    print(f"insert {STATIC + DYNAMIC} boxes: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    brute_time = 0.0
+    hash_time = 0.0
+    move_time = 0.0
+    for _ in range(FRAMES):
+        # every dynamic box moves and queries its surroundings, plus one ray per dynamic box
+        moved = []
+        for target, aabb in dynamic:
+            dx, dz = rng.uniform(-1, 1), rng.uniform(-1, 1)
+            moved.append((target, AABB(aabb.x0 + dx, aabb.y0, aabb.z0 + dz, aabb.x1 + dx, aabb.y1, aabb.z1 + dz)))
+        dynamic = moved
+
+        start = time.perf_counter()
+        for target, aabb in dynamic:
+            broadphase.move(target, aabb)
+        move_time += time.perf_counter() - start
+
+        everything = static + dynamic
+        queries = [aabb.expanded(1, 1, 1) for _, aabb in dynamic]
+        rays = [(Vec3(rng.uniform(-WORLD, WORLD), 0, rng.uniform(-WORLD, WORLD)), Vec3(rng.uniform(-1, 1), rng.uniform(-0.1, 0.1), rng.uniform(-1, 1))) for _ in range(DYNAMIC)]
+
+        start = time.perf_counter()
+        for query in queries:
+            [target for target, aabb in everything if aabb.overlaps(query)]
+        for origin, direction in rays:
+            magnitude = direction.get_magnitude()
+            inv = inverse_direction(direction.x / magnitude, direction.y / magnitude, direction.z / magnitude)
+            best = None
+            for target, aabb in everything:
+                distance = aabb.ray_distance(origin.x, origin.y, origin.z, *inv, 100.0)
+                if distance is not None and (best is None or distance < best[1]):
+                    best = (target, distance)
+        brute_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for query in queries:
+            broadphase.query_box(query)
+        for origin, direction in rays:
+            broadphase.raycast(origin, direction, 100.0)
+        hash_time += time.perf_counter() - start
+
+    print(f"incremental move of {DYNAMIC} boxes: {move_time / FRAMES * 1000:.2f} ms/frame")
+    print(f"brute force {DYNAMIC} box + {DYNAMIC} ray queries: {brute_time / FRAMES * 1000:.1f} ms/frame")
+    print(f"spatial hash {DYNAMIC} box + {DYNAMIC} ray queries: {hash_time / FRAMES * 1000:.1f} ms/frame")
+
+if __name__ == "__main__":
+    main()
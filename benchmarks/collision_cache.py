@@ -0,0 +1,57 @@
+# Narrowphase queries straight on the shapes against the same queries answered by a
+# CollisionCache hit, for each kind of query, to see which are worth caching.  Headless the
+# narrowphase is the Python stand in, run it on Loxoc itself with GAME_HEADLESS= (empty).
+# Run from the repository root: python -m benchmarks.collision_cache [queries]
+import os
+os.environ.setdefault("GAME_HEADLESS", "1")
+os.environ.setdefault("SDL_VIDEODRIVER", "offscreen")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from game_tools.collision_cache import CollisionCache
+
+from Loxoc import Window, Camera, Model, Object3D, BoxCollider, ConvexCollider, RayCollider, Vec3, Quaternion
+
+from typing import Callable
+import argparse
+import time
+import math
+
+def per_query(query:Callable[[], any], count:int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        query()
+    return (time.perf_counter() - start) / count
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("queries", type=int, nargs="?", default=20000)
+    args = parser.parse_args()
+    camera = Camera(Vec3(0, 0, 0), Vec3(0, 0, 0), 64, 64, 100, math.radians(60))
+    window = Window("collision_cache", camera, 64, 64)
+    model = Model.from_file("./models/cube/cube.gltf")
+    cube = Object3D(model, Vec3(0, 0, 5))
+    other = Object3D(model, Vec3(0, 0, 5.5))
+    box = BoxCollider(cube)
+    convex = ConvexCollider(cube)
+    other_box = BoxCollider(other)
+    ray = RayCollider(Vec3(0, 0, 0), Quaternion(1, 0, 0, 0))
+    point = Vec3(0, 0, 5)
+    cache = CollisionCache()
+    for collider, obj in ((box, cube), (convex, cube), (other_box, other)):
+        cache.attach(collider, obj)
+    # Hits, the cheapest a cached query gets.  _lookup looks up even the queries check
+    # sends straight to the shapes.
+    for name, kind, a, b, query in (
+        ("ray / Object3D", 1, ray, cube, ray.get_collision),
+        ("ray / box", 1, ray, box, ray.get_collision),
+        ("ray / convex", 1, ray, convex, ray.get_collision),
+        ("box / point", 0, box, point, box.check_collision),
+        ("box / box", 0, box, other_box, box.check_collision),
+        ("convex / box", 0, convex, other_box, convex.check_collision)
+    ):
+        straight = per_query(lambda: query(b), args.queries)
+        cached = per_query(lambda: cache._lookup(kind, a, b, query), args.queries)
+        print(f"{name:>14}: {straight * 1e6:6.2f} us straight, {cached * 1e6:6.2f} us from the cache")
+
+if __name__ == "__main__":
+    main()
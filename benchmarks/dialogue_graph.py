@@ -0,0 +1,100 @@
+# Setting up conversations for a crowd of NPCs: every node's Dialogue and DialogueOptions
+# built up front, as SceneIntro used to, against a DialogueGraph compiled once from its
+# data file with a Conversation per NPC drawing lines from a shared DialoguePool.  Times
+# the setup and measures the memory it holds on to with tracemalloc, then talks each
+# NPC through a few nodes to show what the lazy side pays when a node starts.
+# Runs headless.
+# Run from the repository root: python -m benchmarks.dialogue_graph [--npcs N] [--nodes N]
+import os
+os.environ["GAME_HEADLESS"] = "1"
+
+from game_tools import Game
+from game_tools.dialogue_graph import DialogueGraph
+from game_tools.atlas import SpriteBatch
+from game import SceneMainMenu, SCENES
+from game.atlases import HUD_ATLAS
+from game.controls import CONTROLS
+from game.dialogue import Dialogue, DialogueOption, DialoguePool, Conversation
+
+from Loxoc import Vec2
+
+import tracemalloc
+import tempfile
+import argparse
+import json
+import time
+
+POSITION = Vec2(30, 30)
+OPTION_POSITION = Vec2(850, 70)
+
+def tree(nodes:int) -> dict[str, any]:
+    # Every node offers two answers leading further down a binary tree.
+    data = {}
+    for i in range(nodes):
+        children = [child for child in (2 * i + 1, 2 * i + 2) if child < nodes]
+        data[f"n{i}"] = {
+            "text": f"Line {i} of the conversation, long enough to take a moment to type out.",
+            "options": [{"text": f"Answer {child}", "next": f"n{child}", "on_end": "noop"} for child in children]
+        }
+    return {"start": "n0", "nodes": data}
+
+def eager(game:Game, ui:SpriteBatch, data:dict[str, any]) -> Dialogue:
+    # Children first so every option can lead straight to its line.
+    nodes = data["nodes"]
+    built:dict[str, Dialogue] = {}
+    for node_id in reversed(list(nodes)):
+        node = nodes[node_id]
+        options = [
+            DialogueOption(game, option["text"], ui, OPTION_POSITION + Vec2(0, 80) * (len(node["options"]) - 1 - k), _next = built[option["next"]])
+            for k, option in enumerate(node["options"])
+        ]
+        built[node_id] = Dialogue(game, node["text"], POSITION, options = options)
+    return built[data["start"]]
+
+def measured(label:str, run) -> any:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - start
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:>34}: {elapsed * 1000:9.1f} ms, {held / 1024 / 1024:8.2f} MiB held")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--npcs", type=int, default=20)
+    parser.add_argument("--nodes", type=int, default=1000)
+    args = parser.parse_args()
+    game = Game(SceneMainMenu(), bindings=CONTROLS, scenes=SCENES)
+    game.init_load()
+    ui = game.current_scene.load_sprite_batch(HUD_ATLAS)
+    data = tree(args.nodes)
+    print(f"{args.npcs} NPCs with a {args.nodes} node conversation each")
+    measured("every node built up front", lambda: [eager(game, ui, data) for _ in range(args.npcs)])
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "tree.json")
+        with open(path, "w") as f:
+            json.dump(data, f)
+        pool = DialoguePool(game, ui)
+        callbacks = {"noop": lambda: None}
+        conversations = measured("graph, a Conversation per NPC", lambda: [
+            Conversation(DialogueGraph.load(path), pool, POSITION, OPTION_POSITION, callbacks) for _ in range(args.npcs)
+        ])
+    # Talk to each NPC in turn, answering the first option down a few levels.
+    starts = 0
+    start = time.perf_counter()
+    for conversation in conversations:
+        conversation.start()
+        for _ in range(5):
+            conversation.line.finished_typing = True
+            conversation.line.options[0].choose()
+            conversation.update()
+            starts += 1
+        conversation.end()
+    elapsed = time.perf_counter() - start
+    print(f"{'':>34}  {starts} nodes started at {elapsed / starts * 1e6:.1f} us each, {pool.created} lines and options made by the pool")
+    game.loader.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# A heavy firefight, a dozen hits every frame for a few seconds: a new emitter per hit,
+# added to the window and removed once its particles have died, against EmitterPool.
+# Reports the frame time, how many emitters the window held and the particles reserved,
+# which the pool keeps under max_particles.  Runs headless, where emitters draw nothing, so
+# the time is only the game side of it.
+# Run from the repository root: python -m benchmarks.emitters
+import os
+os.environ["GAME_HEADLESS"] = "1"
+
+import game_tools
+from game_tools.emitters import EmitterPool
+
+from Loxoc import Vec2, Vec3, Vec4, Quaternion, Emitter, Window, Camera
+
+import math
+import random
+import time
+
+FRAMES = 300
+HITS_PER_FRAME = 12
+DT = 1 / 60
+DURATION = 0.1
+
+def hit_emitter() -> Emitter:
+    # SceneIntro.hit_emitter
+    return Emitter(
+        Vec3(0,0,0),
+        Quaternion.from_axis_angle(Vec3(1,0,0), math.radians(-90)),
+        Vec2(0.1,0.1), Vec2(0.3,0.3),
+        60, 10, math.radians(30), 0, 0.10, 20.0, 10, 10,
+        Vec4(1,1,1,1), Vec4(1,1,1,1)
+    )
+
+def hits() -> list[list[tuple[Vec3, Quaternion]]]:
+    rng = random.Random(38)
+    return [
+        [(Vec3(rng.uniform(-20, 20), rng.uniform(-2, 2), rng.uniform(-20, 20)), Quaternion.from_axis_angle(Vec3(0, 1, 0), rng.uniform(-math.pi, math.pi))) for _ in range(HITS_PER_FRAME)]
+        for _ in range(FRAMES)
+    ]
+
+def per_hit(window:Window, frames:list[list[tuple[Vec3, Quaternion]]]) -> tuple[list[int], list[int], str]:
+    # One emitter per hit, each living as long as a pooled effect would.
+    live:list[tuple[Emitter, float]] = []
+    emitters, particles = [], []
+    life = 10 / 10
+    for frame in frames:
+        for position, direction in frame:
+            emitter = hit_emitter()
+            emitter.position = position
+            emitter.direction = direction
+            emitter.start()
+            window.add_emitter(emitter)
+            live.append((emitter, DURATION + life))
+        kept = []
+        for emitter, remaining in live:
+            remaining -= DT
+            if remaining <= life and emitter.running:
+                emitter.stop()
+            if remaining <= 0.0:
+                window.remove_emitter(emitter)
+            else:
+                kept.append((emitter, remaining))
+        live = kept
+        emitters.append(len(window.emitters))
+        particles.append(int(len(live) * 60 * DURATION))
+    return emitters, particles, "nothing bounds them"
+
+def pooled(window:Window, frames:list[list[tuple[Vec3, Quaternion]]], size:int, max_particles:int) -> tuple[list[int], list[int], str]:
+    pool = EmitterPool(window, hit_emitter, size, max_particles)
+    emitters, particles = [], []
+    for frame in frames:
+        for position, direction in frame:
+            pool.spawn(position, direction, DURATION)
+        pool.update(DT)
+        emitters.append(len(window.emitters))
+        particles.append(pool.particles)
+    return emitters, particles, f"{pool.recycled} effects recycled, {pool.refused} spawns refused"
+
+def timed(label:str, run) -> None:
+    window = Window("emitters", Camera(Vec3(0, 0, 0), Vec3(0, 0, 0), 1280, 720, 1000, math.radians(60)), 1280, 720)
+    frames = hits()
+    start = time.perf_counter()
+    emitters, particles, note = run(window, frames)
+    elapsed = (time.perf_counter() - start) / FRAMES
+    print(f"{label:>32}: {elapsed * 1000:8.3f} ms/frame, at most {max(emitters)} emitters in the window and {max(particles)} particles reserved")
+    print(f"{'':>32}  {note}")
+
+def main():
+    timed("emitter per hit", per_hit)
+    timed("EmitterPool, 16, 200 particles", lambda window, frames: pooled(window, frames, 16, 200))
+    timed("EmitterPool, 64, 200 particles", lambda window, frames: pooled(window, frames, 64, 200))
+
+if __name__ == "__main__":
+    main()
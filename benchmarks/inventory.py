@@ -0,0 +1,116 @@
+# Inventory operations on 10k slots against slot scanning, plus a randomized consistency
+# run checking the indexes against the slots after every operation.  Runs headless.
+# Run from the repository root: python -m benchmarks.inventory
+import os
+os.environ["GAME_HEADLESS"] = "1"
+
+from game_tools import Game
+from game_tools.scene import Scene
+from game.item import Item
+from game.player import Inventory
+
+from Loxoc import Model
+
+import random
+import time
+
+SLOTS = 10_000
+
+class ScanningInventory:
+    # The previous approach with its bugs fixed, every operation walks the slots.
+    def __init__(self, size:int) -> None:
+        self.space:list[Item | None] = [None for _ in range(size)]
+
+    @property
+    def full(self) -> bool:
+        return all(self.space)
+
+    def store(self, item:Item):
+        if self.full:
+            raise RuntimeError("Inventory is full.")
+        self.space[self.space.index(None)] = item
+
+    def drop(self, item:Item):
+        self.space[self.space.index(item)] = None
+
+def check(inventory:Inventory):
+    stored = {}
+    for ind, stack in enumerate(inventory.slots):
+        assert len(stack) <= max((item.max_stack for item in stack), default=1)
+        assert len({item.name for item in stack}) <= 1
+        for item in stack:
+            stored[item] = ind
+    assert stored == inventory._slot_of
+    assert len(inventory) == len(stored)
+    assert sorted(inventory._free) == [ind for ind, stack in enumerate(inventory.slots) if not stack]
+    for name, slots in inventory._by_name.items():
+        assert slots == {ind for ind, stack in enumerate(inventory.slots) if stack and stack[0].name == name}
+    for name, slots in inventory._open.items():
+        assert all(len(inventory.slots[ind]) < inventory.slots[ind][0].max_stack for ind in slots)
+
+def randomized(items:list[Item], runs:int = 200, operations:int = 200):
+    rng = random.Random(38)
+    for _ in range(runs):
+        inventory = Inventory(None, rng.randint(1, 12))
+        for _ in range(operations):
+            stored = list(inventory._slot_of)
+            loose = [item for item in rng.sample(items, 8) if item not in inventory]
+            operation = rng.random()
+            if operation < 0.4 and loose:
+                item = loose[0]
+                if inventory.can_store(item):
+                    slot = inventory.store(item)
+                    assert item in inventory.slots[slot]
+                else:
+                    try:
+                        inventory.store(item)
+                        raise AssertionError("stored into a full inventory")
+                    except RuntimeError:
+                        pass
+            elif operation < 0.55:
+                left = inventory.store_many(loose)
+                assert all(item not in inventory for item in left)
+            elif operation < 0.8 and stored:
+                item = rng.choice(stored)
+                assert inventory.drop(item) is item and item not in inventory
+            elif operation < 0.9:
+                inventory.drop_many(rng.sample(stored, min(len(stored), 3)))
+            else:
+                size = rng.randint(1, 12)
+                inventory.size = size
+                assert len(inventory.slots) == size
+            check(inventory)
+    print(f"randomized: {runs} inventories x {operations} operations consistent")
+
+def timed(label:str, method):
+    start = time.perf_counter()
+    method()
+    print(f"{label:>44}: {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+def main():
+    game = Game(Scene())
+    model = Model.from_file("./models/cube/cube.gltf")
+    names = ["Cube", "Sphere", "Key", "Coin", "Gem"]
+    items = [Item(game, names[i % len(names)], "", model) for i in range(SLOTS * 2)]
+    for item in items:
+        item.max_stack = 1 if item.name in ("Cube", "Sphere") else 16
+    randomized(items[:200])
+
+    singles = [Item(game, f"Item {i}", "", model) for i in range(SLOTS)]
+
+    scanning = ScanningInventory(SLOTS)
+    timed(f"scanning: store {SLOTS}", lambda: [scanning.store(item) for item in singles])
+    timed(f"scanning: full x {SLOTS}", lambda: [scanning.full for _ in range(SLOTS)])
+    timed(f"scanning: drop {SLOTS} in reverse", lambda: [scanning.drop(item) for item in reversed(singles)])
+
+    inventory = Inventory(None, SLOTS)
+    timed(f"Inventory: store {SLOTS}", lambda: [inventory.store(item) for item in singles])
+    timed(f"Inventory: full x {SLOTS}", lambda: [inventory.full for _ in range(SLOTS)])
+    timed(f"Inventory: drop {SLOTS} in reverse", lambda: [inventory.drop(item) for item in reversed(singles)])
+    timed(f"Inventory: store_many {SLOTS * 2} stackable", lambda: inventory.store_many(items))
+    timed(f"Inventory: get by name x {SLOTS}", lambda: [inventory.get("Coin") for _ in range(SLOTS)])
+    timed(f"Inventory: drop_many {SLOTS * 2}", lambda: inventory.drop_many(items))
+    game.loader.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# Resting contact for a falling item, for falls from different heights: the old 0.0001 unit
+# stepping loop Item.update used to have (kept here, it is gone from the game) against the
+# real Item.update, which sweeps its box to the time of impact against a floor box and
+# bisects against a floor collider.  Tests are the overlap tests of the stepping loop, and
+# the earliest_impact sweeps and Item.check_collision calls of Item.update.  Runs headless.
+# Run from the repository root: python -m benchmarks.item_contact
+import os
+os.environ["GAME_HEADLESS"] = "1"
+
+from game_tools import Game
+from game_tools.scene import Scene
+from game_tools.collision import AABB
+from game.item import Item
+import game.item as item_module
+
+from Loxoc import Vec3, Model, Object3D, BoxCollider, Collider
+
+from typing import Callable
+import time
+
+GRAVITY = 60.7
+MAX_VELOCITY = 20
+DT = 1 / 60
+HALF = 0.1
+FLOOR = AABB(-100, -6, -100, 100, -4, 100)
+
+# Tests in the current frame, counted by the wrappers counted puts in place.
+tests = 0
+
+def counted(function:Callable) -> Callable:
+    def wrapper(*args):
+        global tests
+        tests += 1
+        return function(*args)
+    return wrapper
+
+def item_box(y:float) -> AABB:
+    return AABB.from_center(0.0, y, 0.0, HALF, HALF, HALF)
+
+# Each returns (collision tests over the run, most tests in one frame, resting height).
+
+def stepping_loop(height:float, frames:int) -> tuple[int, int, float]:
+    y = FLOOR.y1 + HALF + height
+    vy = 0.0
+    total = 0
+    worst = 0
+    for _ in range(frames):
+        tests = 1
+        if not item_box(y + vy * DT).overlaps(FLOOR):
+            vy -= GRAVITY * DT
+        elif vy != 0:
+            # move to touch, 0.0001 units at a time
+            step = -0.0001 if vy < 0 else 0.0001
+            while not item_box(y).overlaps(FLOOR):
+                y += step
+                tests += 1
+            vy = 0.0
+        vy = max(-MAX_VELOCITY, min(MAX_VELOCITY, vy))
+        y += vy * DT
+        total += tests
+        worst = max(worst, tests)
+    return total, worst, y
+
+def item_update(game:Game, floor:AABB | Collider, height:float, frames:int) -> tuple[int, int, float]:
+    global tests
+    model = Model.from_file("./models/cube/cube.gltf")
+    item = Item(game, "Cube", "Very cubic.", model, Vec3(0.0, FLOOR.y1 + HALF + height, 0.0), scale=Vec3(HALF, HALF, HALF))
+    item.check_collision = counted(item.check_collision)
+    total = 0
+    worst = 0
+    for _ in range(frames):
+        tests = 0
+        item.update([floor])
+        total += tests
+        worst = max(worst, tests)
+    return total, worst, item.object.position.y
+
+def main():
+    game = Game(Scene(), tick_rate = 60)
+    game.sim_dt = game.fixed_dt
+    item_module.earliest_impact = counted(item_module.earliest_impact)
+    # The floor as a collider, for the bisection.
+    floor_object = Object3D(Model.from_file("./models/cube/cube.gltf"), Vec3(0, -5, 0), scale=Vec3(100, 1, 100))
+    floor_collider = BoxCollider(floor_object)
+    floor_object.add_collider(floor_collider)
+    methods = (
+        ("0.0001 step loop", stepping_loop),
+        ("Item, floor box", lambda height, frames: item_update(game, FLOOR, height, frames)),
+        ("Item, floor collider", lambda height, frames: item_update(game, floor_collider, height, frames))
+    )
+    for height in (0.5, 2.0, 10.0, 50.0):
+        frames = 60 * 6
+        for name, method in methods:
+            start = time.perf_counter()
+            total, worst, y = method(height, frames)
+            elapsed = time.perf_counter() - start
+            print(f"height {height:5.1f}  {name:>20}: {total:6d} tests, worst frame {worst:5d} tests, {elapsed * 1000:6.2f} ms, rests at y={y:.5f} (floor contact at y={FLOOR.y1 + HALF:.5f})")
+
+if __name__ == "__main__":
+    main()
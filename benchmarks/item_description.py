@@ -0,0 +1,72 @@
+# Renders 100k item descriptions with the old per-access character parser, the compiled
+# template and the memoized Item.description.
+# Run from the repository root: python -m benchmarks.item_description
+from game.item import Item, DescriptionTemplate, MutKwarg
+
+import time
+
+COUNT = 100_000
+DESCRIPTION = "A {adjective} cube worth {value} coins. It has been dropped {drops} times. \\{not a key\\}"
+
+def parse_every_access(description:str, substitutions:dict[str, any]) -> str:
+    # Item.description before templates were compiled.
+    ret_d = ""
+    escape = False
+    parsing_kw = False
+    kw_buffer = ""
+    for c in description:
+        if escape:
+            escape = False
+            if c not in {'{','}'}:
+                ret_d += '\\'
+            ret_d += c
+        elif c == "\\":
+            escape = True
+            continue
+        elif c == '{':
+            parsing_kw = True
+            kw_buffer = ""
+        elif c == '}':
+            ret_d += str(substitutions[kw_buffer])
+            parsing_kw = False
+        elif parsing_kw:
+            kw_buffer += c
+        else:
+            ret_d += c
+    return ret_d
+
+def description_only_item(description:str, **kwargs:dict[str, any]) -> Item:
+    # Only the description state of an Item, building the Object3D needs a window.
+    item = Item.__new__(Item)
+    item._substitutions = {}
+    item.substitutions = kwargs
+    item.description = description
+    return item
+
+def timed(name:str, render):
+    start = time.perf_counter()
+    for i in range(COUNT):
+        render(i)
+    elapsed = time.perf_counter() - start
+    print(f"{name:>32}: {elapsed * 1000:8.1f} ms ({elapsed / COUNT * 1e6:.2f} us per description)")
+
+def main():
+    drops = MutKwarg(0)
+    substitutions = {"adjective": "very cubic", "value": 12, "drops": drops}
+    template = DescriptionTemplate(DESCRIPTION)
+    item = description_only_item(DESCRIPTION, **substitutions)
+    assert item.description == parse_every_access(DESCRIPTION, substitutions)
+
+    timed("parse on every access", lambda i: parse_every_access(DESCRIPTION, substitutions))
+    timed("compiled template render", lambda i: template.render(substitutions))
+    timed("Item.description memoized", lambda i: item.description)
+
+    def mutate_every_100(i:int):
+        if i % 100 == 0:
+            drops.value += 1
+        return item.description
+    timed("memoized, MutKwarg change /100", mutate_every_100)
+    assert item.description == parse_every_access(DESCRIPTION, substitutions)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Falling items: one Item.update per item against the batched ItemWorld, for 1k and 10k
+# items dropped onto a floor and some platforms.  Once settled both put items to sleep.
+# Runs headless.
+# Run from the repository root: python -m benchmarks.item_world
+import os
+os.environ["GAME_HEADLESS"] = "1"
+
+from game_tools import Game
+from game_tools.scene import Scene
+from game_tools.broadphase import SpatialHash
+from game_tools.collision import AABB
+from game.item import Item
+from game.item_world import ItemWorld
+
+from Loxoc import Vec3, Model
+
+import random
+import time
+
+FRAMES = 300
+WORLD = 100.0
+
+def build(game:Game, count:int) -> tuple[list[Item], SpatialHash]:
+    rng = random.Random(38)
+    model = Model.from_file("./models/cube/cube.gltf")
+    world = SpatialHash(cell_size = 8.0)
+    world.insert("floor", AABB(-WORLD, -6, -WORLD, WORLD, -4, WORLD))
+    for i in range(20):
+        x, z = rng.uniform(-WORLD, WORLD), rng.uniform(-WORLD, WORLD)
+        world.insert(f"platform {i}", AABB.from_center(x, rng.uniform(0, 10), z, 8, 0.5, 8))
+    items = [
+        Item(game, f"Cube {i}", "Very cubic.", model, Vec3(rng.uniform(-WORLD, WORLD), rng.uniform(0, 40), rng.uniform(-WORLD, WORLD)), scale=Vec3(0.1,0.1,0.1))
+        for i in range(count)
+    ]
+    return items, world
+
+def per_item(game:Game, items:list[Item], world:SpatialHash) -> list[float]:
+    frame_times = []
+    for _ in range(FRAMES):
+        start = time.perf_counter()
+        for item in items:
+            if not item.sleeping:
+                item.update(world.query_bounds(item.future_aabb()))
+        frame_times.append(time.perf_counter() - start)
+    return frame_times
+
+def batched(game:Game, items:list[Item], world:SpatialHash) -> list[float]:
+    item_world = ItemWorld(game)
+    for item in items:
+        item_world.add(item)
+    frame_times = []
+    for _ in range(FRAMES):
+        start = time.perf_counter()
+        bounds = item_world.swept_bounds()
+        if bounds:
+            item_world.step(world.query_bounds(bounds))
+        frame_times.append(time.perf_counter() - start)
+    return frame_times
+
+def main():
+    game = Game(Scene(), tick_rate = 60)
+    game.sim_dt = game.fixed_dt
+    for count in (1_000, 10_000):
+        results = {}
+        for name, method in (("Item.update", per_item), ("ItemWorld", batched)):
+            items, world = build(game, count)
+            frame_times = method(game, items, world)
+            results[name] = [item.object.position.y for item in items]
+            falling = sum(frame_times[:30]) / 30
+            settled = sum(frame_times[-30:]) / 30
+            asleep = sum(item.sleeping for item in items)
+            print(f"{count:6d} items {name:>12}: {falling * 1000:8.2f} ms/tick while falling, {settled * 1000:8.3f} ms/tick settled, {asleep} asleep")
+        difference = max(abs(a - b) for a, b in zip(*results.values()))
+        print(f"{count:6d} items largest difference in resting height: {difference:.2e}")
+    game.loader.shutdown()
+
+if __name__ == "__main__":
+    main()
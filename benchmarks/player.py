@@ -0,0 +1,96 @@
+# Player controller cost per frame: wall time and memory allocated by one frame of input,
+# fixed_update and update while walking and looking around, measured with tracemalloc.
+# The controller is checked to allocate nothing once warmed up, the floor sweep (broadphase
+# boxes and contact lists) is measured separately.  Runs headless.
+# Run from the repository root: python -m benchmarks.player
+import os
+os.environ["GAME_HEADLESS"] = "1"
+
+from game_tools import Game
+from game_tools.scene import Scene
+from game_tools.collision import AABB
+from game_tools.input import InputState
+from game.controls import CONTROLS
+from game.player import Player
+
+from Loxoc import EVENT_FLAG
+
+from typing import Callable
+from array import array
+import time
+import tracemalloc
+
+FRAMES = 2_000
+FLOOR = [AABB(-1000, -6, -1000, 1000, -4, 1000)]
+
+def setup() -> tuple[Game, Player]:
+    game = Game(Scene(), tick_rate = 60, bindings = CONTROLS)
+    game.sim_dt = game.fixed_dt
+    player = Player(game)
+    return game, player
+
+def scripted_input(game:Game, frames:int) -> list[InputState]:
+    # Strafe around a square while turning, as the walk scenario does.  Polled up front, the
+    # snapshots are allocated by the input map rather than the controller.
+    window = game.window
+    keys = (EVENT_FLAG.KEY_w, EVENT_FLAG.KEY_d, EVENT_FLAG.KEY_s, EVENT_FLAG.KEY_a)
+    snapshots = []
+    for frame in range(frames):
+        phase = frame // 60 % 4
+        window.release(*keys)
+        window.press(keys[phase])
+        window.move_mouse(4 if phase < 2 else -4, 1 if phase % 2 else -1)
+        snapshots.append(game.input_map.poll(window.event))
+    return snapshots
+
+def traced_peak(step:Callable[[InputState], None], snapshot:InputState) -> int:
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    step(snapshot)
+    return tracemalloc.get_traced_memory()[1] - before
+
+def measure(label:str, collide:bool, check:bool):
+    game, player = setup()
+    snapshots = scripted_input(game, 480)
+    sweep = (lambda: player.sweep(FLOOR)) if collide else (lambda: None)
+    # Loops run over prebuilt lists, counting frames would allocate ints above 256.
+    frames = [snapshots[frame % len(snapshots)] for frame in range(FRAMES)]
+    def step(snapshot:InputState):
+        game.input = snapshot
+        player.fixed_update(sweep)
+        player.update()
+    for snapshot in frames[:240]:
+        step(snapshot)
+
+    start = time.perf_counter()
+    for snapshot in frames:
+        step(snapshot)
+    elapsed = (time.perf_counter() - start) / FRAMES
+
+    tracemalloc.start()
+    for snapshot in frames[:240]:
+        step(snapshot)
+    # Reading the traced memory allocates its own ints, measured on an empty frame and
+    # taken off every sample.
+    overhead = max(traced_peak(lambda snapshot: None, snapshot) for snapshot in frames[:100])
+    # Preallocated so recording the results doesn't show up as retained.
+    peaks = array("q", bytes(8 * FRAMES))
+    live = tracemalloc.get_traced_memory()[0]
+    for frame, snapshot in enumerate(frames):
+        peaks[frame] = traced_peak(step, snapshot) - overhead
+    grown = tracemalloc.get_traced_memory()[0] - live
+    tracemalloc.stop()
+    peaks = sorted(peaks)
+    print(f"{label:>28}: {elapsed * 1e6:7.1f} us/frame, allocated per frame p50 {peaks[len(peaks) // 2]:5d} B, max {peaks[-1]:5d} B, retained {grown} B over {FRAMES} frames")
+    if check:
+        assert peaks[-1] <= 0, "the controller allocates in steady state"
+        # Give or take the ints of the loop and the measurement.
+        assert grown <= 256, "the controller retains memory"
+    game.loader.shutdown()
+
+def main():
+    measure("controller", collide = False, check = True)
+    measure("controller + floor sweep", collide = True, check = False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# Cost of a profiler scope when disabled, enabled and enabled with trace recording.
+# Run from the repository root: python -m benchmarks.profiler_overhead
+from game_tools.profiler import Profiler
+
+import time
+
+SCOPES_PER_FRAME = 20
+FRAMES = 20_000
+
+def run(profiler:Profiler) -> float:
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        profiler.begin_frame()
+        for i in range(SCOPES_PER_FRAME):
+            with profiler.scope("scope"):
+                pass
+        profiler.end_frame()
+    return time.perf_counter() - start
+
+def baseline() -> float:
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        for i in range(SCOPES_PER_FRAME):
+            pass
+    return time.perf_counter() - start
+
+def main():
+    empty = baseline()
+    for name, profiler in (
+        ("disabled", Profiler(enabled=False)),
+        ("enabled", Profiler(enabled=True)),
+        ("enabled + trace", Profiler(enabled=True, trace=True))
+    ):
+        elapsed = run(profiler) - empty
+        per_scope = elapsed / (FRAMES * SCOPES_PER_FRAME) * 1e6
+        per_frame = elapsed / FRAMES * 1e3
+        print(f"{name:>16}: {per_scope:.3f} us per scope, {per_frame:.4f} ms per frame of {SCOPES_PER_FRAME} scopes")
+
+if __name__ == "__main__":
+    main()
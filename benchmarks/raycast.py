@@ -0,0 +1,114 @@
+# Shotgun pellets against a field of boxes: testing every target, the broadphase candidates
+# with an exact test on each (the old shoot_update), Raycaster.cast per pellet and one
+# Raycaster.cast_many call for the whole shot.  Checks all of them agree on the nearest hit.
+# Runs headless.
+# Run from the repository root: python -m benchmarks.raycast
+import os
+os.environ["GAME_HEADLESS"] = "1"
+
+import game_tools
+from game_tools.broadphase import SpatialHash
+from game_tools.collision import object_aabb
+from game_tools.raycast import Raycaster
+
+from Loxoc import Vec3, Quaternion, Object3D, BoxCollider, RayCollider, Model
+
+import math
+import random
+import time
+
+SHOTS = 100
+RANGE = 40.0
+WORLD = 60.0
+
+def build(count:int) -> tuple[list[Object3D], SpatialHash]:
+    rng = random.Random(38)
+    model = Model.from_file("./models/cube/cube.gltf")
+    world = SpatialHash(cell_size = 4.0)
+    targets = []
+    for _ in range(count):
+        target = Object3D(model, Vec3(rng.uniform(-WORLD, WORLD), rng.uniform(-2, 4), rng.uniform(-WORLD, WORLD)), scale=Vec3(0.5, 1, 0.5))
+        target.add_collider(BoxCollider(target))
+        world.insert(target, object_aabb(target))
+        targets.append(target)
+    return targets, world
+
+def shots(pellets_per_shot:int) -> list[list[tuple[Vec3, Quaternion]]]:
+    rng = random.Random(38)
+    result = []
+    for _ in range(SHOTS):
+        origin = Vec3(rng.uniform(-10, 10), 1, rng.uniform(-10, 10))
+        yaw = rng.uniform(-math.pi, math.pi)
+        pellets = []
+        for _ in range(pellets_per_shot):
+            spread = Quaternion.from_axis_angle(Vec3(0, 1, 0), yaw + rng.uniform(-0.1, 0.1)) * Quaternion.from_axis_angle(Vec3(1, 0, 0), rng.uniform(-0.05, 0.05))
+            pellets.append((origin, spread.get_normalized()))
+        result.append(pellets)
+    return result
+
+def every_target(targets:list[Object3D], world:SpatialHash, raycaster:Raycaster, pellets:list[tuple[Vec3, Quaternion]]) -> list[any]:
+    ray = RayCollider(Vec3(0, 0, 0), Quaternion(1, 0, 0, 0))
+    result = []
+    for origin, direction in pellets:
+        ray.origin = origin
+        ray.direction = direction
+        best, best_distance = None, RANGE
+        for target in targets:
+            hit = ray.get_collision(target)
+            if hit.hit and hit.distance <= best_distance:
+                best, best_distance = target, hit.distance
+        result.append(best)
+    return result
+
+def candidates_then_exact(targets:list[Object3D], world:SpatialHash, raycaster:Raycaster, pellets:list[tuple[Vec3, Quaternion]]) -> list[any]:
+    ray = RayCollider(Vec3(0, 0, 0), Quaternion(1, 0, 0, 0))
+    result = []
+    for origin, direction in pellets:
+        ray.origin = origin
+        ray.direction = direction
+        best, best_distance = None, RANGE
+        for target, _ in world.raycast_all(origin, direction.forward, RANGE):
+            hit = ray.get_collision(target)
+            if hit.hit and hit.distance <= best_distance:
+                best, best_distance = target, hit.distance
+        result.append(best)
+    return result
+
+def cast(targets:list[Object3D], world:SpatialHash, raycaster:Raycaster, pellets:list[tuple[Vec3, Quaternion]]) -> list[any]:
+    result = []
+    tests = 0
+    for origin, direction in pellets:
+        hit = raycaster.cast(origin, direction, RANGE)
+        result.append(hit.target if hit else None)
+        tests += raycaster.tests
+    raycaster.tests = tests
+    return result
+
+def cast_many(targets:list[Object3D], world:SpatialHash, raycaster:Raycaster, pellets:list[tuple[Vec3, Quaternion]]) -> list[any]:
+    return [hit.target if hit else None for hit in raycaster.cast_many(pellets, RANGE)]
+
+def main():
+    for count, pellets_per_shot in ((200, 12), (200, 64), (2_000, 12), (2_000, 64)):
+        targets, world = build(count)
+        raycaster = Raycaster(world)
+        all_shots = shots(pellets_per_shot)
+        results = {}
+        for name, method in (("every target", every_target), ("candidates + exact", candidates_then_exact), ("Raycaster.cast", cast), ("Raycaster.cast_many", cast_many)):
+            if name == "every target" and count > 1_000:
+                continue
+            hits = []
+            tests = 0
+            start = time.perf_counter()
+            for pellets in all_shots:
+                hits.extend(method(targets, world, raycaster, pellets))
+                tests += raycaster.tests
+            elapsed = (time.perf_counter() - start) / SHOTS
+            results[name] = hits
+            exact = f", {tests / SHOTS:6.1f} exact tests/shot" if name.startswith("Raycaster") else ""
+            print(f"{count:5d} targets {name:>20}: {elapsed * 1000:8.3f} ms per {pellets_per_shot} pellet shot{exact}")
+        reference = next(iter(results.values()))
+        assert all(hits == reference for hits in results.values()), "nearest hits differ"
+        print(f"{count:5d} targets, {pellets_per_shot} pellets: {sum(hit is not None for hit in reference)} of {len(reference)} pellets hit, all methods agree")
+
+if __name__ == "__main__":
+    main()
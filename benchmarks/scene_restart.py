@@ -0,0 +1,71 @@
+# Restarting the intro scene after playing it for a while: reloading it through the
+# current_scene setter (the old restart) against restoring the snapshot taken when it
+# loaded.  Checks both put the player and the items back in the same place.  Runs headless.
+# Run from the repository root: python -m benchmarks.scene_restart
+import os
+os.environ["GAME_HEADLESS"] = "1"
+
+from game_tools import Game
+from game import SceneMainMenu, SceneIntro, SCENES
+from game.controls import CONTROLS
+
+from Loxoc import Window, EVENT_FLAG
+
+import time
+
+RESTARTS = 50
+PLAY_FRAMES = 120
+
+def play(window:Window, frame:int):
+    # Walk forward turning and shooting at the floor, pressing E now and then.
+    window.press(EVENT_FLAG.KEY_w)
+    window.move_mouse(4, 2)
+    window.set_mouse_button(frame % 20 < 10, 0, 0)
+    if frame % 30 == 0:
+        window.press(EVENT_FLAG.KEY_e)
+    elif frame % 30 == 1:
+        window.release(EVENT_FLAG.KEY_e)
+
+def state(scene:SceneIntro) -> tuple:
+    position = scene.player.position
+    return (
+        (position.x, position.y, position.z),
+        tuple((item.object.position.x, item.object.position.y, item.object.position.z) for item in scene.items),
+        scene.player.held_item, len(scene.hit_effects)
+    )
+
+def run(restart) -> tuple[float, float, tuple]:
+    game = Game(SceneMainMenu(), bindings=CONTROLS, scenes=SCENES)
+    game.init_load()
+    game.current_scene.start()
+    game.current_scene = SceneIntro()
+    times = []
+    for _ in range(RESTARTS):
+        game.window.script = play
+        for _ in range(PLAY_FRAMES):
+            game.update()
+        game.window.script = None
+        start = time.perf_counter()
+        restart(game)
+        times.append(time.perf_counter() - start)
+    game.loader.shutdown()
+    times.sort()
+    return times[len(times) // 2], times[-1], state(game.current_scene)
+
+def reload(game:Game):
+    game.current_scene = game.current_scene
+
+def restore(game:Game):
+    game.current_scene.restore(game.current_scene.initial_state)
+
+def main():
+    states = []
+    for label, restart in (("reload (current_scene setter)", reload), ("snapshot restore", restore)):
+        median, worst, restarted = run(restart)
+        states.append(restarted)
+        print(f"{label:>30}: median {median * 1000:8.3f} ms, worst {worst * 1000:8.3f} ms per restart")
+    assert states[0] == states[1], f"restarted states differ: {states}"
+    print(f"{'':>30}  both restart the player at {states[0][0]} with the items back in place")
+
+if __name__ == "__main__":
+    main()
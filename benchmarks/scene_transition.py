@@ -0,0 +1,34 @@
+# Worst frame time seen while moving from the main menu to the intro scene.
+# Run from the repository root: python -m benchmarks.scene_transition
+from game_tools import Game
+from game import SceneMainMenu, SceneIntro, SCENES
+from game.controls import CONTROLS
+
+import time
+
+def run(preload:bool, frames:int = 240, switch_frame:int = 60) -> tuple[float, float]:
+    game = Game(SceneMainMenu(), bindings=CONTROLS, scenes=SCENES)
+    game.init_load()
+    game.current_scene.start()
+    frame_times:list[float] = []
+    intro = SceneIntro()
+    for frame in range(frames):
+        start = time.perf_counter()
+        if frame == switch_frame - 30 and preload:
+            game.preload_scene(intro)
+        if frame == switch_frame:
+            if preload:
+                game.switch_to(intro)
+            else:
+                game.current_scene = intro
+        game.update()
+        frame_times.append(time.perf_counter() - start)
+    game.loader.shutdown()
+    transition = frame_times[switch_frame - 30:]
+    return max(transition), sorted(frame_times)[len(frame_times)//2]
+
+if __name__ == "__main__":
+    for preload in (False, True):
+        worst, median = run(preload)
+        mode = "preload + switch_to" if preload else "current_scene setter"
+        print(f"{mode:>22}: worst frame {worst * 1000:8.2f} ms, median frame {median * 1000:6.2f} ms")
@@ -0,0 +1,156 @@
+# Simulation frames per second of each scene under scripted input, run headless so no
+# window or OpenGL context is needed.  Rendering is a no-op, so this measures game logic only.
+# Run from the repository root: python -m benchmarks.scenes [frames] [--tick-rate N] [--systems]
+import os
+os.environ["GAME_HEADLESS"] = "1"
+
+from game_tools import Game
+from game import SceneMainMenu, SceneIntro, SCENES
+from game.controls import CONTROLS
+
+from Loxoc import Window, Vec3, Quaternion, EVENT_FLAG
+
+from typing import Callable
+import argparse
+import math
+import time
+
+def face(game:Game, target:Vec3):
+    # Turns the player towards a point, as if the mouse had been moved there.
+    player = game.current_scene.player
+    to = target - player.position
+    yaw = math.atan2(to.x, to.z)
+    pitch = math.atan2(-to.y, math.hypot(to.x, to.z))
+    player.rotation = (Quaternion.from_axis_angle(Vec3(0, 1, 0), yaw) * Quaternion.from_axis_angle(Vec3(1, 0, 0), pitch)).get_normalized()
+
+# A scenario sets up the game and returns the per frame input script, and a summary of the run.
+
+def menu(game:Game) -> tuple[Callable[[Window, int], None], Callable[[], str]]:
+    def script(window:Window, frame:int):
+        window.move_mouse(3, 1)
+    return script, lambda: "idle on the main menu"
+
+def menu_to_intro(game:Game) -> tuple[Callable[[Window, int], None], Callable[[], str]]:
+    button = game.current_scene.start_button
+    def script(window:Window, frame:int):
+        window.set_mouse_button(frame == 10, int(button.position.x), int(button.position.y))
+    # The intro is preloaded on worker threads, a short run can end before it is resident.
+    return script, lambda: f"ended in {type(game.current_scene).__name__}"
+
+def walk(game:Game) -> tuple[Callable[[Window, int], None], Callable[[], str]]:
+    game.current_scene = SceneIntro()
+    def script(window:Window, frame:int):
+        # Strafe around in a square while looking about.
+        phase = frame // 60 % 4
+        window.release(EVENT_FLAG.KEY_w, EVENT_FLAG.KEY_a, EVENT_FLAG.KEY_s, EVENT_FLAG.KEY_d)
+        window.press((EVENT_FLAG.KEY_w, EVENT_FLAG.KEY_a, EVENT_FLAG.KEY_s, EVENT_FLAG.KEY_d)[phase])
+        window.move_mouse(4 if phase < 2 else -4, 0)
+        if frame % 90 == 0:
+            window.press(EVENT_FLAG.KEY_SPACE)
+        else:
+            window.release(EVENT_FLAG.KEY_SPACE)
+    return script, lambda: f"player at {game.current_scene.player.position}"
+
+def pickup(game:Game) -> tuple[Callable[[Window, int], None], Callable[[], str]]:
+    scene = SceneIntro()
+    game.current_scene = scene
+    pickups = []
+    def script(window:Window, frame:int):
+        # Walk up to the cube, grab it and drop it again every couple of seconds.
+        target = scene.test_item.object.position
+        face(game, target)
+        if scene.player.position.distance(target) > 5 and not scene.player.held_item:
+            window.press(EVENT_FLAG.KEY_w)
+        else:
+            window.release(EVENT_FLAG.KEY_w)
+        if frame % 120 == 0:
+            window.press(EVENT_FLAG.KEY_e)
+            pickups.append(scene.player.held_item is not None)
+        else:
+            window.release(EVENT_FLAG.KEY_e)
+    return script, lambda: f"{len(pickups)} presses of E, holding an item on {sum(pickups)} of them"
+
+def shoot(game:Game) -> tuple[Callable[[Window, int], None], Callable[[], str]]:
+    scene = SceneIntro()
+    game.current_scene = scene
+    def script(window:Window, frame:int):
+        # Sweep the aim across the NPC and the floor while holding the trigger.
+        face(game, scene.character.position + Vec3(math.sin(frame * 0.05) * 4, -3, 0))
+        window.set_mouse_button(True, 0, 0)
+    return script, lambda: f"{len(scene.hit_effects)} hit effects live at the end, {scene.hit_effects.particles} particles reserved, {scene.hit_effects.recycled} recycled"
+
+def dialogue(game:Game) -> tuple[Callable[[Window, int], None], Callable[[], str]]:
+    scene = SceneIntro()
+    game.current_scene = scene
+    lines = []
+    def script(window:Window, frame:int):
+        # Walk to the NPC and talk, choosing the first option, then keep opening and closing the reply.
+        face(game, scene.character.position)
+        near = scene.player.position.distance(scene.character.position) < 8
+        if near:
+            window.release(EVENT_FLAG.KEY_w)
+        else:
+            window.press(EVENT_FLAG.KEY_w)
+        conversation = scene.conversation
+        talk = conversation.line
+        if near and frame % 30 == 0 and (not conversation.running or (talk.finished_typing and not talk.options)):
+            window.press(EVENT_FLAG.KEY_e)
+        else:
+            window.release(EVENT_FLAG.KEY_e)
+        if conversation.finished_typing and (not lines or lines[-1][0] != conversation.node):
+            lines.append((conversation.node, talk.text))
+        option = talk.options[0] if talk and talk.options else None
+        if option and option.finished_typing:
+            window.set_mouse_button(True, int(option.background.position.x), int(option.background.position.y))
+        else:
+            window.set_mouse_button(False)
+    return script, lambda: f"{len(lines)} lines of dialogue typed out, {len({text for _, text in lines})} different ones"
+
+SCENARIOS:dict[str, Callable[[Game], tuple[Callable[[Window, int], None], Callable[[], str]]]] = {
+    "menu": menu,
+    "menu_to_intro": menu_to_intro,
+    "walk": walk,
+    "pickup": pickup,
+    "shoot": shoot,
+    "dialogue": dialogue
+}
+
+def print_systems(game:Game):
+    # Per run cost of each scheduled system of the scene the run ended in.
+    for name, system in game.current_scene.scheduler.report().items():
+        frequency = f"{system['frequency']:4.0f} Hz" if system["frequency"] else "  every frame"
+        budget = f", budget {system['budget']:.3f} ms exceeded {system['over_budget']} times" if system["budget"] else ""
+        print(f"{'':>16}{name:>16} {frequency:>13}: {system['runs']:5d} runs, mean {system['mean']:6.3f} ms, max {system['max']:6.3f} ms{budget}")
+
+def run(scenario:str, frames:int, tick_rate:float | None, systems:bool = False) -> tuple[float, float, str]:
+    game = Game(SceneMainMenu(), tick_rate=tick_rate, bindings=CONTROLS, scenes=SCENES)
+    game.init_load()
+    game.current_scene.start()
+    script, summary = SCENARIOS[scenario](game)
+    game.window.script = script
+    script(game.window, 0)
+    frame_times:list[float] = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        game.update()
+        frame_times.append(time.perf_counter() - start)
+    game.loader.shutdown()
+    if systems:
+        print_systems(game)
+    frame_times.sort()
+    total = sum(frame_times)
+    return frames / total, frame_times[int(len(frame_times) * 0.99)], summary()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("frames", type=int, nargs="?", default=1200)
+    parser.add_argument("--tick-rate", type=float, default=None)
+    parser.add_argument("--scenario", choices=list(SCENARIOS), action="append")
+    parser.add_argument("--systems", action="store_true", help="print the scheduler report of each scenario")
+    args = parser.parse_args()
+    for scenario in args.scenario or SCENARIOS:
+        fps, p99, summary = run(scenario, args.frames, args.tick_rate, args.systems)
+        print(f"{scenario:>14}: {fps:9.0f} frames/s, p99 frame {p99 * 1000:6.3f} ms ({summary})")
+
+if __name__ == "__main__":
+    main()
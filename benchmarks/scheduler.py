@@ -0,0 +1,80 @@
+# A thousand agents with a fixed amount of thinking each, updated by one Scheduler system
+# every frame against a sliced one (Scheduler.add_sliced) with a per frame budget that
+# continues round-robin where the last frame stopped.  Reports the time a frame spends on
+# them, how many frames a full sweep over every agent takes, how evenly the slices share
+# out the updates, how much dt each agent was given against the time that passed (an agent
+# is owed everything up to its last update) and what Scheduler.report says about each
+# system against its budget.
+# Runs headless, nothing is drawn.
+# Run from the repository root: python -m benchmarks.scheduler [agents] [frames]
+import os
+os.environ["GAME_HEADLESS"] = "1"
+
+from game_tools.scheduler import Scheduler
+
+import argparse
+import time
+
+# Seconds of work per agent update.
+THINK = 20e-6
+BUDGETS = (0.001, 0.002, 0.004)
+
+class Agent:
+    __slots__ = ("updates", "dt", "updated_at")
+
+    def __init__(self) -> None:
+        self.updates = 0
+        # Sum of the dt it was given and the scheduler time of its last update.
+        self.dt = 0.0
+        self.updated_at = 0.0
+
+def think(agent:Agent, dt:float):
+    agent.dt += dt
+    agent.updated_at = clock
+    deadline = time.perf_counter() + THINK
+    while time.perf_counter() < deadline:
+        pass
+    agent.updates += 1
+
+# Seconds of dt the scheduler has been given so far.
+clock = 0.0
+
+def run(scheduler:Scheduler, agents:list[Agent], frames:int) -> float:
+    global clock
+    clock = 0.0
+    start = time.perf_counter()
+    for _ in range(frames):
+        clock += 1 / 60
+        scheduler.run(1 / 60)
+    return (time.perf_counter() - start) / frames
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("agents", type=int, nargs="?", default=1000)
+    parser.add_argument("frames", type=int, nargs="?", default=120)
+    args = parser.parse_args()
+    print(f"{args.agents} agents, {THINK * 1e6:.0f} us each, {args.frames} frames")
+
+    agents = [Agent() for _ in range(args.agents)]
+    scheduler = Scheduler()
+    scheduler.add("agents", lambda dt: [think(agent, dt) for agent in agents])
+    frame = run(scheduler, agents, args.frames)
+    print(f"{'every agent every frame':>24}: {frame * 1000:7.3f} ms a frame")
+
+    for budget in BUDGETS:
+        agents = [Agent() for _ in range(args.agents)]
+        scheduler = Scheduler()
+        scheduler.add_sliced("agents", lambda: agents, think, budget = budget)
+        frame = run(scheduler, agents, args.frames)
+        updates = [agent.updates for agent in agents]
+        # Zero for every agent when no time is lost between its slices.
+        drift = max(abs(agent.dt - agent.updated_at) for agent in agents)
+        per_frame = sum(updates) / args.frames
+        report = scheduler.report()["agents"]
+        print(f"{f'sliced, {budget * 1000:g} ms budget':>24}: {frame * 1000:7.3f} ms a frame, {per_frame:6.1f} agents a frame, "
+            f"a sweep every {args.agents / per_frame:5.1f} frames, {min(updates)}-{max(updates)} updates per agent, "
+            f"dt {min(agent.dt for agent in agents):.2f}-{max(agent.dt for agent in agents):.2f} s of {clock:.2f} s (off by {drift:.1e} s at most), "
+            f"report: mean {report['mean']:.3f} ms, max {report['max']:.3f} ms, {report['over_budget']} of {report['runs']} runs over budget")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# Runs the game on the real engine rather than the headless stand ins: loads the main menu,
+# switches to the intro, restarts it and talks to the NPC, a few frames of each.  The
+# headless benchmarks can't see what only Loxoc itself rejects (shaders, uniforms, asset
+# formats), this catches it.  Uses SDL's offscreen video and dummy audio drivers unless
+# SDL_VIDEODRIVER or SDL_AUDIODRIVER say otherwise, so no display is needed.
+# Run from the repository root: python -m benchmarks.smoke [frames]
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "offscreen")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+if os.environ.get("GAME_HEADLESS"):
+    raise SystemExit("benchmarks.smoke runs the real engine, unset GAME_HEADLESS.")
+
+from game_tools import Game
+from game import SCENES, SceneIntro
+from game.controls import CONTROLS
+from game_tools.atlas import SpriteBatch
+
+from Loxoc import Object2D, Sprite, Vec2
+
+import argparse
+import time
+
+def frames(game:Game, count:int):
+    for _ in range(count):
+        game.update()
+
+def check_sizes(game:Game, batch:SpriteBatch) -> int:
+    # Every sprite of the batch's atlas comes out the size of an Object2D of it on its own.
+    for path in batch.atlas.regions:
+        batched = batch.add(path, scale = Vec2(100, 100), show = False)
+        alone = Object2D(Sprite(path), game.camera, scale = Vec2(100, 100))
+        if abs(batched.width - alone.width) > 0.01 * alone.width or abs(batched.height - alone.height) > 0.01 * alone.height:
+            raise SystemExit(f"{path} is {batched.width:.1f}x{batched.height:.1f} batched, {alone.width:.1f}x{alone.height:.1f} on its own")
+        batch.remove(batched)
+    return len(batch.atlas.regions)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("frames", type=int, nargs="?", default=30)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    game = Game("main_menu", bindings=CONTROLS, scenes=SCENES)
+    game.init_load()
+    game.current_scene.start()
+    frames(game, args.frames)
+    sizes = check_sizes(game, game.current_scene.ui)
+    print(f"main menu: {args.frames} frames, {sizes} batched sprites sized right")
+
+    game.switch_to("intro")
+    waited = 0
+    while not isinstance(game.current_scene, SceneIntro):
+        if waited > 3000:
+            raise SystemExit("the intro never finished preloading")
+        game.update()
+        waited += 1
+    scene = game.current_scene
+    scene.start()
+    frames(game, args.frames)
+    sizes = check_sizes(game, scene.hud)
+    print(f"intro: switched after {waited} frames, {args.frames} frames, {sizes} batched sprites sized right")
+
+    scene.restore(scene.initial_state)
+    # Within talking range of the NPC, the player starts just outside it.
+    player = scene.player
+    player.position.z = player.previous_position.z = scene.character.position.z - 5
+    conversation = scene.conversation
+    conversation.start()
+    # Until the answers are typed out over their backgrounds, at the real frame time.
+    deadline = time.perf_counter() + 20
+    while not (conversation.finished_typing and all(option.finished_typing for option in conversation.line.options)):
+        if time.perf_counter() > deadline:
+            raise SystemExit("the greeting never finished typing")
+        game.update()
+    if not all(scene.hud.shown(option.background) for option in conversation.line.options):
+        raise SystemExit("the answers' backgrounds aren't shown")
+    answers = len(conversation.line.options)
+    conversation.end()
+    frames(game, 1)
+    print(f"intro: restarted, greeting and {answers} answers typed out")
+
+    game.loader.shutdown()
+    print(f"ok in {time.perf_counter() - start:.1f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# UI quads drawn as separate Object2Ds, each with its own sprite's texture and the default
+# material Loxoc makes for every Object2D, against a SpriteBatch over an atlas of the same
+# sprites.  Every frame a tenth of the quads are shown or hidden.  Reports the calls made
+# to the window per frame, and the textures and materials the visible quads use, which is
+# what the renderer binds and switches between.  Runs headless, so only the Python side
+# of the frame is timed.
+# Run from the repository root: python -m benchmarks.sprite_batch [elements ...]
+import os
+os.environ["GAME_HEADLESS"] = "1"
+
+from game_tools.assets import AssetCache
+from game_tools.atlas import SpriteAtlas, SpriteBatch
+
+from Loxoc import Window, Camera, Object2D, Vec2, Vec3, TextureWraping
+
+import tempfile
+import argparse
+import random
+import time
+import math
+
+FRAMES = 120
+SPRITES = sorted(os.path.join("sprites", name) for name in os.listdir("sprites") if name.endswith(".png"))
+
+class CountingWindow(Window):
+    def __init__(self, *args) -> None:
+        super().__init__(*args)
+        self.calls = 0
+
+    def add_object2d(self, obj:Object2D):
+        self.calls += 1
+        super().add_object2d(obj)
+
+    def remove_object2d(self, obj:Object2D):
+        self.calls += 1
+        super().remove_object2d(obj)
+
+    def add_object2d_list(self, objs:list[Object2D]):
+        self.calls += 1
+        super().add_object2d_list(objs)
+
+    def remove_object2d_list(self, objs:list[Object2D]):
+        self.calls += 1
+        super().remove_object2d_list(objs)
+
+def window() -> CountingWindow:
+    camera = Camera(Vec3(0, 0, 0), Vec3(0, 0, 0), 1280, 720, 1000, math.radians(60))
+    return CountingWindow("sprite batch", camera, 1280, 720)
+
+def layout(elements:int) -> list[tuple[str, Vec2]]:
+    rng = random.Random(1)
+    return [(SPRITES[i % len(SPRITES)], Vec2(rng.uniform(0, 1280), rng.uniform(0, 720))) for i in range(elements)]
+
+def toggles(elements:int) -> list[list[int]]:
+    rng = random.Random(2)
+    return [rng.sample(range(elements), elements // 10) for _ in range(FRAMES)]
+
+def separate(elements:int) -> tuple[float, float, float, int, int]:
+    win = window()
+    assets = AssetCache()
+    start = time.perf_counter()
+    objects = []
+    for path, position in layout(elements):
+        obj = Object2D(assets.sprite(path), win.camera, position, scale = Vec2(20, 20))
+        win.add_object2d(obj)
+        objects.append(obj)
+    setup = time.perf_counter() - start
+    shown = [True] * elements
+    win.calls = 0
+    start = time.perf_counter()
+    for frame in toggles(elements):
+        for i in frame:
+            if shown[i]:
+                win.remove_object2d(objects[i])
+            else:
+                win.add_object2d(objects[i])
+            shown[i] = not shown[i]
+        win.update()
+    frame_time = (time.perf_counter() - start) / FRAMES
+    visible = win.objects2d.values()
+    return setup, frame_time, win.calls / FRAMES, len({id(obj.sprite.texture) for obj in visible}), len({id(obj.material) for obj in visible})
+
+def batched(elements:int, atlas:SpriteAtlas) -> tuple[float, float, float, int, int]:
+    win = window()
+    assets = AssetCache()
+    start = time.perf_counter()
+    batch = SpriteBatch(win, win.camera, atlas, [assets.sprite(page, TextureWraping.CLAMP_TO_EDGE) for page in atlas.pages])
+    objects = [batch.add(path, position, Vec2(20, 20)) for path, position in layout(elements)]
+    batch.flush()
+    setup = time.perf_counter() - start
+    win.calls = 0
+    start = time.perf_counter()
+    for frame in toggles(elements):
+        for i in frame:
+            if batch.shown(objects[i]):
+                batch.hide(objects[i])
+            else:
+                batch.show(objects[i])
+        batch.flush()
+        win.update()
+    frame_time = (time.perf_counter() - start) / FRAMES
+    visible = win.objects2d.values()
+    return setup, frame_time, win.calls / FRAMES, len({id(obj.sprite.texture) for obj in visible}), len({id(obj.material) for obj in visible})
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("elements", type=int, nargs="*", default=[100, 1000, 5000])
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        atlas = SpriteAtlas("benchmark", SPRITES)
+        start = time.perf_counter()
+        atlas.load(directory)
+        packed = time.perf_counter() - start
+        start = time.perf_counter()
+        SpriteAtlas("benchmark", SPRITES).load(directory)
+        reused = time.perf_counter() - start
+        print(f"atlas of {len(atlas.regions)} sprites on {len(atlas.pages)} page(s): packed in {packed * 1000:.1f} ms, cached layout loaded in {reused * 1000:.2f} ms")
+        for elements in args.elements:
+            print(f"{elements} UI elements, {elements // 10} shown or hidden a frame")
+            for label, result in (("separate Object2Ds", separate(elements)), ("SpriteBatch", batched(elements, atlas))):
+                setup, frame_time, calls, textures, materials = result
+                print(f"{label:>20}: setup {setup * 1000:8.2f} ms, frame {frame_time * 1000:7.3f} ms, {calls:6.1f} window calls a frame, {textures} textures and {materials:4} materials drawn")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# Time from starting the interpreter to the main menu's first frame, the way main.py starts
+# the game, and the same with every scene imported up front as before the scene registry.
+# Each run is a fresh interpreter under -X importtime, the slowest imports of the last run
+# are listed.  Headless by default, --window opens a real window.
+# Run from the repository root: python -m benchmarks.startup [--runs N] [--window]
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+# Prints wall clock times the parent compares with when it started the process.
+CHILD = """
+import time
+{eager}
+import main
+imported = time.time()
+game = main.create_game()
+game.current_scene.start()
+game.update()
+first_frame = time.time()
+import sys
+print(imported, first_frame, int("game.scenes.intro" in sys.modules), int("numpy" in sys.modules), len(game.globals["fonts"].loaded))
+game.loader.shutdown()
+"""
+
+def run(eager:bool, window:bool) -> tuple[float, float, bool, bool, int, list[tuple[int, int, str]]]:
+    env = dict(os.environ)
+    if window:
+        env.pop("GAME_HEADLESS", None)
+    else:
+        env["GAME_HEADLESS"] = "1"
+    code = CHILD.format(eager = "import game.scenes.intro" if eager else "")
+    start = time.time()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], env = env, capture_output = True, text = True, check = True)
+    imported, first_frame, intro, numpy, fonts = result.stdout.split()[-5:]
+    imports = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if line.startswith("import time:") and "|" in line and "self [us]" not in line:
+            own, cumulative, name = line[len("import time:"):].split("|")
+            imports.append((int(own), int(cumulative), name.rstrip()))
+    return float(imported) - start, float(first_frame) - start, intro == "1", numpy == "1", int(fonts), imports
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--window", action="store_true", help="open a real window instead of running headless")
+    args = parser.parse_args()
+    for label, eager in (("eager scene imports", True), ("main.py", False)):
+        runs = sorted((run(eager, args.window) for _ in range(args.runs)), key=lambda result: result[1])
+        imported, first_frame, intro, numpy, fonts, imports = runs[len(runs) // 2]
+        print(f"{label:>20}: imports done {imported * 1000:7.1f} ms, first frame {first_frame * 1000:7.1f} ms (median of {args.runs})")
+        print(f"{'':>20}  before the first frame intro imported: {intro}, numpy imported: {numpy}, fonts loaded: {fonts}")
+        for own, cumulative, name in sorted(imports, reverse = True)[:8]:
+            print(f"{'':>22}{own / 1000:7.1f} ms self {cumulative / 1000:7.1f} ms cumulative  {name.strip()}")
+
+if __name__ == "__main__":
+    main()
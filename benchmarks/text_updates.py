@@ -0,0 +1,95 @@
+# Writes to Text.text while a long line of dialogue is typed out, each of which has the
+# engine lay the string out again: writing the typed prefix every frame as Dialogue did
+# before, against Dialogue typing through TypedText.  Also the item tip, formatted and
+# written every frame against TextLabel only writing when the item looked at changes.
+# Runs headless, times are the Python side of the updates only.
+# Run from the repository root: python -m benchmarks.text_updates
+import os
+os.environ["GAME_HEADLESS"] = "1"
+
+from game_tools import Game
+from game_tools.text import TextLabel
+from game import SceneMainMenu, SCENES, dialogue
+from game.controls import CONTROLS
+
+from Loxoc import Text, Vec2, Vec4
+
+import time
+import math
+
+FRAMES_PER_SECOND = 60
+TYPING_SPEED = 30
+LINE = " ".join(["The quick brown fox jumps over the lazy dog, twice, and then once more for luck."] * 25)
+
+class CountingText(Text):
+    writes = 0
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    @text.setter
+    def text(self, value:str):
+        CountingText.writes += 1
+        self._text = value
+
+def every_frame(frames:int) -> int:
+    # The old Dialogue.update, the prefix written whether or not it grew.
+    text = CountingText("", Vec4(1, 1, 1, 1), Vec2(0, 0))
+    progress = 0.0
+    for _ in range(frames):
+        progress += TYPING_SPEED / FRAMES_PER_SECOND
+        text.text = LINE[:min(len(LINE), math.ceil(progress))]
+    return CountingText.writes
+
+def typed(game:Game, frames:int) -> int:
+    # Dialogue makes its Text itself.
+    dialogue.Text = CountingText
+    try:
+        line = dialogue.Dialogue(game, LINE, Vec2(30, 30), typing_speed = TYPING_SPEED)
+    finally:
+        dialogue.Text = Text
+    line.start()
+    for _ in range(frames):
+        line.update()
+    return CountingText.writes
+
+def tip_every_frame(looks:list[object | None]) -> int:
+    text = CountingText("", Vec4(1, 1, 1, 1), Vec2(0, 0))
+    for item in looks:
+        text.text = f"{item} : Very cubic." if item else ""
+    return CountingText.writes
+
+def tip_label(looks:list[object | None]) -> int:
+    label = TextLabel(CountingText("", Vec4(1, 1, 1, 1), Vec2(0, 0)))
+    looked_at = None
+    for item in looks:
+        if item is not looked_at:
+            looked_at = item
+            label.set(f"{item} : Very cubic." if item else "")
+    return CountingText.writes
+
+def measure(label:str, run, seconds:float):
+    CountingText.writes = 0
+    start = time.perf_counter()
+    writes = run()
+    elapsed = time.perf_counter() - start
+    print(f"{label:>36}: {writes:6} writes, {writes / seconds:7.1f} layouts a second, {elapsed * 1000:7.2f} ms of updates")
+
+def main():
+    game = Game(SceneMainMenu(), bindings=CONTROLS, scenes=SCENES)
+    game.init_load()
+    seconds = len(LINE) / TYPING_SPEED + 1
+    frames = int(seconds * FRAMES_PER_SECOND)
+    print(f"a {len(LINE)} character line typed at {TYPING_SPEED} characters a second, {frames} frames at {FRAMES_PER_SECOND} fps")
+    measure("prefix written every frame (before)", lambda: every_frame(frames), seconds)
+    measure("Dialogue with TypedText", lambda: typed(game, frames), seconds)
+    # Looking at the item for two seconds, then away for one, over and over.
+    looks = [("Cube" if frame % 180 < 120 else None) for frame in range(frames)]
+    print(f"the item tip over the same {frames} frames")
+    measure("formatted every frame (before)", lambda: tip_every_frame(looks), seconds)
+    measure("TextLabel", lambda: tip_label(looks), seconds)
+    game.loader.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,15 @@
-from game.scenes.main_menu import *
-from game.scenes.intro import *
\ No newline at end of file
+# Scenes by name for Game, each imported the first time it is made so starting up only
+# pays for the main menu.
+SCENES = {
+    "main_menu": "game.scenes.main_menu:SceneMainMenu",
+    "intro": "game.scenes.intro:SceneIntro"
+}
+
+def __getattr__(name:str):
+    # from game import SceneIntro keeps working, importing the scene's module on demand.
+    for scene in SCENES.values():
+        module, _, attribute = scene.partition(":")
+        if attribute == name:
+            import importlib
+            return getattr(importlib.import_module(module), attribute)
+    raise AttributeError(f"module 'game' has no attribute {name!r}")
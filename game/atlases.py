@@ -0,0 +1,14 @@
+from game_tools.atlas import SpriteAtlas
+
+# UI sprites drawn through a SpriteBatch, one atlas per texture filtering.
+HUD_ATLAS = SpriteAtlas("hud", [
+    "./sprites/crosshair_1.png",
+    "./sprites/HUD_revolver.png",
+    "./sprites/textbox_background.png"
+])
+
+MENU_ATLAS = SpriteAtlas("menu", [
+    "./sprites/placeholder_start_button.png",
+    "./sprites/placeholder_fullscreen_button.png",
+    "./sprites/placeholder_end_button.png"
+])
@@ -0,0 +1,15 @@
+from Loxoc import EVENT_FLAG, MOUSE_BUTTON
+
+# Action name to the keys and mouse buttons that trigger it, read through game.input.
+CONTROLS:dict[str, tuple[EVENT_FLAG | MOUSE_BUTTON, ...]] = {
+    "move_forward": (EVENT_FLAG.KEY_w,),
+    "move_back": (EVENT_FLAG.KEY_s,),
+    "move_left": (EVENT_FLAG.KEY_a,),
+    "move_right": (EVENT_FLAG.KEY_d,),
+    "jump": (EVENT_FLAG.KEY_SPACE,),
+    "interact": (EVENT_FLAG.KEY_e,),
+    "fire": (MOUSE_BUTTON.LEFT,),
+    "restart": (EVENT_FLAG.KEY_r,),
+    "quit": (EVENT_FLAG.KEY_ESCAPE,),
+    "toggle_profiler": (EVENT_FLAG.KEY_BACKTICK,)
+}
@@ -4,6 +4,9 @@ from Loxoc import Font, Text, Window, Vec4, Vec2, Vec3, Sprite, Object2D
 
 from game_tools import Game
 from game_tools.utility import is_clicking_sprite
+from game_tools.atlas import SpriteBatch
+from game_tools.text import TypedText
+from game_tools.dialogue_graph import DialogueGraph
 
 from typing import Callable
 
@@ -12,15 +15,25 @@ from copy import copy
 import math as m
 
 class DialogueOption:
-    def __init__(self, game:Game, text:str, background_sprite: Sprite, position:Vec2, font: Font | None = None, start_callback:Callable[[], None] = lambda:None, chosen_callback:Callable[[], None] = lambda:None, end_callback:Callable[[], None] = lambda:None, finished_typing_callback:Callable[[], None] = lambda:None, _next:Dialogue | None = None, color: Vec4 | None = None, scale:Vec2 | None = None, rotation:float = 0.0, typing_speed = 10):
+    def __init__(self, game:Game, text:str, ui:SpriteBatch, position:Vec2, font: Font | None = None, start_callback:Callable[[], None] = lambda:None, chosen_callback:Callable[[], None] = lambda:None, end_callback:Callable[[], None] = lambda:None, finished_typing_callback:Callable[[], None] = lambda:None, _next:Dialogue | None = None, color: Vec4 | None = None, scale:Vec2 | None = None, rotation:float = 0.0, typing_speed = 10, background_sprite:str = "./sprites/textbox_background.png"):
         self.game:Game = game
         self.text:str = text
         self.font:Font = font if font else self.game.globals["fonts"]["font_sofadi_one"]
-        self.background = Object2D(background_sprite, game.camera, scale = Vec2(10,1) * 50)
+        # Shown and hidden through ui, which hands it to the window with the rest of the UI.
+        self.ui = ui
+        self.background = ui.add(background_sprite, scale = Vec2(10,1) * 50, show = False)
+        self.text_object = Text(self.text, color if color else Vec4(1,1,1,1), position, scale if scale else Vec2(1,1), rotation, self.font)
+        self.typing_speed = typing_speed
+        self.scale = scale
+        self.reset(text, position, start_callback, chosen_callback, end_callback, finished_typing_callback, _next)
 
+    def reset(self, text:str, position:Vec2, start_callback:Callable[[], None] = lambda:None, chosen_callback:Callable[[], None] = lambda:None, end_callback:Callable[[], None] = lambda:None, finished_typing_callback:Callable[[], None] = lambda:None, _next:Dialogue | None = None):
+        # Sets the option up to show another text, reusing its Text and background.
+        self.text = text
+        # Typed out a glyph at a time, the Text is only written when another glyph shows.
+        self.typed_text = TypedText(self.text_object, self.text)
         self.background.position = position + Vec2(self.background.width/2 - 10, self.background.height/2) - 20
-        
-        self.text_object = Text(self.text, color if color else Vec4(1,1,1,1), position, scale if scale else Vec2(1,1), rotation, self.font)
+        self.text_object.position = position
         self.start_callback = start_callback
         self.chosen_callback = chosen_callback
         self.end_callback = end_callback
@@ -31,11 +44,9 @@ class DialogueOption:
         self.progress = 0.0
         self.finished_typing = False
         self.running = False
-        self.typing_speed = typing_speed
 
         # Transform
         self.position = position
-        self.scale = scale
 
     def choose(self):
         self.chosen_callback()
@@ -44,11 +55,11 @@ class DialogueOption:
     def start(self):
         self.start_callback()
         self.game.window.add_text(self.text_object)
-        self.game.window.add_object2d(self.background)
+        self.ui.show(self.background)
         self.progress = 0.0
         self.finished_typing = False
         self.running = True
-        self.text_object.text = ""
+        self.typed_text.reveal(0)
         
 
     def update(self):
@@ -56,7 +67,7 @@ class DialogueOption:
             dt = self.game.window.dt
             self.progress += self.typing_speed * dt
             text_len = min(len(self.text), m.ceil(self.progress))
-            self.text_object.text = self.text[:text_len]
+            self.typed_text.reveal(text_len)
 
 
             if text_len == len(self.text):
@@ -64,13 +75,13 @@ class DialogueOption:
                     self.game.window.lock_mouse(False)
                     self.finished_typing_callback()
                 self.finished_typing = True
-                if is_clicking_sprite(self.background, self.game.window.event.mouse):
+                if is_clicking_sprite(self.background, self.game.input):
                     self.choose()
 
     def end(self):
         self.end_callback()
         self.game.window.remove_text(self.text_object)
-        self.game.window.remove_object2d(self.background)
+        self.ui.hide(self.background)
         self.running = False
         self.finished_typing = False
         self.game.window.lock_mouse(True)
@@ -82,6 +93,16 @@ class Dialogue:
         self.font:Font = font if font else self.game.globals["fonts"]["font_sofadi_one"]
 
         self.text_object = Text(self.text, color if color else Vec4(1,1,1,1), position, scale if scale else Vec2(1,1), rotation, self.font)
+        self.typing_speed = typing_speed
+        self.scale = scale
+        self.reset(text, position, options, start_callback, end_callback, _next)
+
+    def reset(self, text:str, position:Vec2, options:list[DialogueOption] | None = None, start_callback:Callable[[], None] = lambda:None, end_callback:Callable[[], None] = lambda:None, _next:Dialogue | None = None):
+        # Sets the line up to show another text, reusing its Text.
+        self.text = text
+        # Typed out a glyph at a time, the Text is only written when another glyph shows.
+        self.typed_text = TypedText(self.text_object, self.text)
+        self.text_object.position = position
         self.options:list[DialogueOption] = options if options is not None else []
         self.start_callback = start_callback
         self.end_callback = end_callback
@@ -91,11 +112,9 @@ class Dialogue:
         self.progress = 0.0
         self.finished_typing = False
         self.running = False
-        self.typing_speed = typing_speed
 
         # Transform
         self.position = position
-        self.scale = scale
 
     def start(self):
         self.start_callback()
@@ -103,14 +122,14 @@ class Dialogue:
         self.progress = 0.0
         self.finished_typing = False
         self.running = True
-        self.text_object.text = ""
+        self.typed_text.reveal(0)
 
     def update(self):
         if self.running:
             dt = self.game.window.dt
             self.progress += self.typing_speed * dt
             text_len = min(len(self.text), m.ceil(self.progress))
-            self.text_object.text = self.text[:text_len]
+            self.typed_text.reveal(text_len)
             
             if text_len == len(self.text):
                 if not self.finished_typing:
@@ -132,5 +151,144 @@ class Dialogue:
             if option.running or option.finished_typing:
                 option.end()
 
-            
-            
+def _nothing():
+    pass
+
+class DialoguePool:
+    # Dialogue lines and options for conversations to show their current node with.  Each
+    # is made the first time one is needed and reused after the node ends, keeping its Text
+    # and an option its background, so the pool only grows to the most shown at once.
+    def __init__(self, game:Game, ui:SpriteBatch) -> None:
+        self.game = game
+        self.ui = ui
+        self.lines:list[Dialogue] = []
+        self.options:list[DialogueOption] = []
+        # Lines and options made, rather than reused.
+        self.created = 0
+
+    def line(self, text:str, position:Vec2, options:list[DialogueOption], start_callback:Callable[[], None], end_callback:Callable[[], None]) -> Dialogue:
+        if self.lines:
+            line = self.lines.pop()
+            line.reset(text, position, options, start_callback, end_callback)
+            return line
+        self.created += 1
+        return Dialogue(self.game, text, position, options = options, start_callback = start_callback, end_callback = end_callback)
+
+    def option(self, text:str, position:Vec2, start_callback:Callable[[], None], chosen_callback:Callable[[], None], end_callback:Callable[[], None], finished_typing_callback:Callable[[], None]) -> DialogueOption:
+        if self.options:
+            option = self.options.pop()
+            option.reset(text, position, start_callback, chosen_callback, end_callback, finished_typing_callback)
+            return option
+        self.created += 1
+        return DialogueOption(self.game, text, self.ui, position, start_callback = start_callback, chosen_callback = chosen_callback, end_callback = end_callback, finished_typing_callback = finished_typing_callback)
+
+    def release(self, line:Dialogue):
+        self.options.extend(line.options)
+        line.options = []
+        self.lines.append(line)
+
+class Conversation:
+    # Talking through a DialogueGraph.  Only the current node has a Dialogue, taken from the
+    # pool when the node starts and handed back when it ends.  callbacks maps the names the
+    # graph uses to functions.  Options are stacked spacing apart upwards from
+    # option_position, the first on top.
+    def __init__(self, graph:DialogueGraph, pool:DialoguePool, position:Vec2, option_position:Vec2, callbacks:dict[str, Callable[[], None]] | None = None, spacing:Vec2 | None = None) -> None:
+        callbacks = callbacks if callbacks else {}
+        missing = set(graph.names) - callbacks.keys()
+        if missing:
+            raise KeyError(f"{graph.source} uses callbacks {sorted(missing)} that weren't given.")
+        self.graph = graph
+        self.pool = pool
+        self.position = position
+        self.option_position = option_position
+        self.spacing = spacing if spacing else Vec2(0, 80)
+        # By the graph's name index.
+        self.callbacks:list[Callable[[], None]] = [callbacks[name] for name in graph.names]
+        self.node = graph.start
+        self.line:Dialogue | None = None
+        # Where a chosen option leads, moved to once the current line is done updating.
+        self.chosen:int | None = None
+
+    @property
+    def running(self) -> bool:
+        return self.line is not None and self.line.running
+
+    @property
+    def finished_typing(self) -> bool:
+        return self.line is not None and self.line.finished_typing
+
+    def start(self, node:int | None = None):
+        # Starts node, by default the current one again.
+        if node is not None and node != self.node:
+            self.end()
+            self.node = node
+        if self.line is None:
+            self.line = self._make(self.node)
+        self.line.start()
+
+    def end(self):
+        if self.line is None:
+            return
+        self.line.end()
+        self.pool.release(self.line)
+        self.line = None
+
+    def interact(self):
+        # Starts the current line, or once it is typed out moves on to the next or ends it.
+        if not self.finished_typing:
+            self.start()
+        elif self.graph.next[self.node] >= 0:
+            self.start(self.graph.next[self.node])
+        elif not self.line.options:
+            self.end()
+
+    def update(self):
+        if self.line is None:
+            return
+        self.line.update()
+        if self.chosen is not None:
+            node, self.chosen = self.chosen, None
+            if node >= 0:
+                self.start(node)
+            else:
+                self.end()
+
+    def snapshot(self) -> tuple[int, bool, float]:
+        return self.node, self.running, self.line.progress if self.line else 0.0
+
+    def restore(self, snapshot:tuple[int, bool, float]):
+        # Restarts the node and types it out again up to where it was, options included.
+        node, running, progress = snapshot
+        self.end()
+        self.node = node
+        self.chosen = None
+        if running:
+            self.start()
+            self.line.progress = progress
+
+    def _callback(self, index:int) -> Callable[[], None]:
+        return self.callbacks[index] if index >= 0 else _nothing
+
+    def _chooser(self, option:int) -> Callable[[], None]:
+        chosen = self._callback(self.graph.option_callbacks["on_chosen"][option])
+        target = self.graph.option_next[option]
+        def choose():
+            chosen()
+            self.chosen = target
+        return choose
+
+    def _make(self, node:int) -> Dialogue:
+        graph = self.graph
+        option_callbacks = graph.option_callbacks
+        options = graph.options(node)
+        made = []
+        for k, option in enumerate(options):
+            made.append(self.pool.option(
+                graph.option_text[option], self.option_position + self.spacing * (len(options) - 1 - k),
+                self._callback(option_callbacks["on_start"][option]), self._chooser(option),
+                self._callback(option_callbacks["on_end"][option]), self._callback(option_callbacks["on_finished_typing"][option])
+            ))
+        return self.pool.line(
+            graph.text[node], self.position, made,
+            self._callback(graph.callbacks["on_start"][node]), self._callback(graph.callbacks["on_end"][node])
+        )
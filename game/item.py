@@ -5,16 +5,103 @@ from Loxoc import (
 )
 
 from game_tools import Game
+from game_tools.collision import AABB, object_aabb, earliest_impact, bisect_impact
+
+from types import MappingProxyType
+from typing import Callable
+import weakref
+
+# A body that has moved less than SLEEP_DISTANCE a tick, slower than SLEEP_VELOCITY, for
+# SLEEP_TICKS ticks in a row goes to sleep and isn't simulated until woken.
+SLEEP_VELOCITY = 0.05
+SLEEP_DISTANCE = 1e-3
+SLEEP_TICKS = 30
 
 class MutKwarg:
+    # A description substitution that can change after the item is created.  Assigning to
+    # value re-renders the description of every item using it, call changed() after
+    # mutating the value in place.
     def __init__(self, value:any):
-        self.value = value
+        self._value = value
+        self.listeners:list[weakref.WeakMethod] = []
+
+    @property
+    def value(self) -> any:
+        return self._value
+
+    @value.setter
+    def value(self, value:any):
+        self._value = value
+        self.changed()
+
+    def subscribe(self, callback:Callable[[], None]):
+        self.listeners.append(weakref.WeakMethod(callback))
+
+    def unsubscribe(self, callback:Callable[[], None]):
+        self.listeners = [listener for listener in self.listeners if listener() not in (None, callback)]
+
+    def changed(self):
+        listeners = []
+        for listener in self.listeners:
+            callback = listener()
+            if callback is not None:
+                callback()
+                listeners.append(listener)
+        self.listeners = listeners
 
     def __repr__(self) -> str:
         return repr(self.value)
 
     def __str__(self) -> str:
         return str(self.value)
+
+class DescriptionTemplate:
+    # A description compiled once into literal text with {key} slots.  A backslash escapes
+    # a brace, before anything else it is kept as is.
+    def __init__(self, source:str):
+        self.source = source
+        self.parts:list[str] = []
+        self.slots:list[tuple[int, str]] = []
+        literal = ""
+        escape = False
+        parsing_kw = False
+        kw_buffer = ""
+        for c in source:
+            if escape:
+                escape = False
+                if c not in {'{','}'}:
+                    literal += '\\'
+                literal += c
+            elif c == "\\":
+                escape = True
+            elif c == '{':
+                parsing_kw = True
+                kw_buffer = ""
+            elif c == '}':
+                if not parsing_kw:
+                    raise ValueError(f"Unmatched '}}' in description {source!r}, escape it as '\\}}'.")
+                self.parts.append(literal)
+                self.slots.append((len(self.parts), kw_buffer))
+                self.parts.append("")
+                literal = ""
+                parsing_kw = False
+            elif parsing_kw:
+                kw_buffer += c
+            else:
+                literal += c
+        self.parts.append(literal)
+        self.keys:frozenset[str] = frozenset(key for _, key in self.slots)
+
+    def render(self, substitutions:dict[str, any]) -> str:
+        if not self.slots:
+            return self.parts[0]
+        parts = self.parts.copy()
+        for index, key in self.slots:
+            try:
+                parts[index] = str(substitutions[key])
+            except KeyError:
+                raise KeyError(f"Description {self.source!r} uses {{{key}}} but no substitution named {key!r} was given.") from None
+        return "".join(parts)
     
 
 class Item:
@@ -25,68 +112,119 @@ class Item:
         self.model = model
         self.position = position if position else Vec3(0.0,0.0,0.0)
         self.scale = scale if scale else Vec3(1.0,1.0,1.0)
-        self._description = description
+        self._substitutions:dict[str, any] = {}
+        self._template:DescriptionTemplate = DescriptionTemplate(description)
+        self._rendered_description:str | None = None
         self.substitutions = kwargs
         self.object = Object3D(self.model, self.position, rotation, self.scale)
         self.collider = collider if collider else BoxCollider(self.object)
         self.object.add_collider(self.collider)
-        self.future_collider = type(self.collider)(self.object)
         self.pickup_collider = type(self.collider)(self.object, scale = Vec3(3,3,3))
         self.rotation = self.object.rotation
         self.velocity = Vec3(0,0,0)
         self.max_velocity = 20
+        # Items with the same name share an inventory slot up to this many.
+        self.max_stack = 1
+        # Overlap tests spent finding the contact against non box colliders.
+        self.bisection_steps = 16
+        self.sleeping = False
+        self.still_ticks = 0
+
+    def wake(self):
+        self.sleeping = False
+        self.still_ticks = 0
 
     def check_collision(self, other:Vec3 | Collider | Object3D):
         return self.collider.check_collision(other)
-    
-    def check_collision_future(self, other: Object3D | Collider) -> bool:
-        self.future_collider.offset = self.object.position + self.velocity * self.game.window.dt
-        return self.future_collider.check_collision(other)
-    
-    def update(self, collisions:list[Vec3 | Collider | Object3D]):
-        dt = self.game.window.dt
-        c2 = any(self.check_collision_future(col) for col in collisions)
-        if not c2:
-            self.velocity.y -= self.game.globals["gravity"] * dt
-        elif self.velocity.get_magnitude() > 0:
-            # move to touch
-            move_towards = self.velocity.get_normalized() * 0.0001
-            while not any(self.check_collision(col) for col in collisions):
-                self.object.position += move_towards
+
+    def aabb(self) -> AABB:
+        return object_aabb(self.object)
+
+    def next_velocity(self) -> Vec3:
+        # Velocity after this tick's gravity and clamping.
+        dt = self.game.dt
+        vy = max(-self.max_velocity, min(self.max_velocity, self.velocity.y - self.game.globals["gravity"] * dt))
+        return Vec3(self.velocity.x, vy, self.velocity.z)
+
+    def future_aabb(self) -> AABB:
+        # Bounds swept this tick, for broadphase queries.
+        step = self.next_velocity() * self.game.dt
+        return self.aabb().expanded(step.x, step.y, step.z)
+
+    def time_of_impact(self, collisions:list[AABB | Collider | Object3D], step:Vec3) -> float | None:
+        # Fraction of step the item can travel before touching any of collisions.  Boxes are
+        # swept analytically, anything else is bisected against the item's collider.
+        boxes = [col for col in collisions if isinstance(col, AABB)]
+        impact = earliest_impact(self.aabb(), step.x, step.y, step.z, boxes) if boxes else None
+        toi = impact[0] if impact else None
+        others = [col for col in collisions if not isinstance(col, AABB)]
+        if others:
+            start = self.object.position
+            def collides_at(t:float) -> bool:
+                self.object.position = start + step * t
                 self.object.get_model_matrix()
+                return any(self.check_collision(col) for col in others)
+            bisected = bisect_impact(collides_at, self.bisection_steps)
+            self.object.position = start
+            self.object.get_model_matrix()
+            if bisected is not None and (toi is None or bisected < toi):
+                toi = bisected
+        return toi
+
+    def update(self, collisions:list[AABB | Collider | Object3D]):
+        if self.sleeping:
+            return
+        dt = self.game.dt
+        self.velocity = self.next_velocity()
+        step = self.velocity * dt
+        toi = self.time_of_impact(collisions, step)
+        if toi is not None:
+            # move to touch
+            step = step * toi
             self.velocity = Vec3(0,0,0)
-            
-        self.velocity.y = max(-self.max_velocity, min(self.max_velocity, self.velocity.y))
-        self.object.position += self.velocity * dt
+        self.object.position += step
+        if step.get_magnitude() < SLEEP_DISTANCE and self.velocity.get_magnitude() < SLEEP_VELOCITY:
+            self.still_ticks += 1
+            self.sleeping = self.still_ticks >= SLEEP_TICKS
+        else:
+            self.still_ticks = 0
 
     @property
-    def description(self):
-        ret_d = ""
-        escape = False
-        parsing_kw = False
-        kw_buffer = ""
-        for c in self._description:
-            if escape:
-                escape = False
-                if c not in {'{','}'}:
-                    ret_d += '\\'
-                ret_d += c
-            elif c == "\\":
-                escape = True
-                continue
-            elif c == '{':
-                parsing_kw = True
-                kw_buffer = ""
-            elif c == '}':
-                ret_d += str(self.substitutions[kw_buffer])
-                parsing_kw = False
-            elif parsing_kw:
-                kw_buffer += c
-            else:
-                ret_d += c
-        return ret_d
+    def description(self) -> str:
+        # Rendered once and reused until the template or a substitution changes.
+        if self._rendered_description is None:
+            self._rendered_description = self._template.render(self._substitutions)
+        return self._rendered_description
     
     @description.setter
     def description(self, value:str):
-        self._description = value
+        self._template = DescriptionTemplate(value)
+        self._rendered_description = None
+
+    @property
+    def substitutions(self) -> dict[str, any]:
+        # Read only view, use set_substitution or assign a new dict to change it.
+        return MappingProxyType(self._substitutions)
+
+    @substitutions.setter
+    def substitutions(self, value:dict[str, any]):
+        for old in self._substitutions.values():
+            if isinstance(old, MutKwarg):
+                old.unsubscribe(self.invalidate_description)
+        self._substitutions = dict(value)
+        for new in self._substitutions.values():
+            if isinstance(new, MutKwarg):
+                new.subscribe(self.invalidate_description)
+        self._rendered_description = None
+
+    def set_substitution(self, key:str, value:any):
+        old = self._substitutions.get(key)
+        if isinstance(old, MutKwarg):
+            old.unsubscribe(self.invalidate_description)
+        self._substitutions[key] = value
+        if isinstance(value, MutKwarg):
+            value.subscribe(self.invalidate_description)
+        self._rendered_description = None
 
+    def invalidate_description(self):
+        self._rendered_description = None
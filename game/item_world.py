@@ -0,0 +1,233 @@
+from __future__ import annotations
+from Loxoc import Vec3
+
+from game_tools import Game
+from game_tools.collision import AABB, SKIN
+from game.item import Item, SLEEP_VELOCITY, SLEEP_DISTANCE, SLEEP_TICKS
+
+import numpy as np
+
+class ItemWorld:
+    # Falling items simulated together.  Positions, velocities and half extents live in
+    # struct-of-arrays form (one row per axis, one column per item) and a tick integrates
+    # gravity, clamps to max_velocity and sweeps every item against the static boxes in a
+    # handful of array operations.  Objects are only written back for items that moved or
+    # came to rest.  Like Item.update this only handles the item's box, items that have to
+    # collide with other shapes should keep using Item.update.  Items that settle fall
+    # asleep (see SLEEP_TICKS) and cost nothing until woken by wake or wake_in.
+    def __init__(self, game:Game, capacity:int = 64) -> None:
+        self.game = game
+        self.items:list[Item] = []
+        self.index:dict[Item, int] = {}
+        self.position = np.zeros((3, capacity))
+        self.velocity = np.zeros((3, capacity))
+        self.half_extents = np.zeros((3, capacity))
+        self.max_velocity = np.zeros(capacity)
+        self.awake = np.zeros(capacity, dtype=bool)
+        self.still_ticks = np.zeros(capacity, dtype=np.int32)
+        self.active_count = 0
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __contains__(self, item:Item) -> bool:
+        return item in self.index
+
+    def _grow(self, capacity:int):
+        for name in ("position", "velocity", "half_extents", "max_velocity", "awake", "still_ticks"):
+            old = getattr(self, name)
+            new = np.zeros(old.shape[:-1] + (capacity,), dtype=old.dtype)
+            new[..., :old.shape[-1]] = old
+            setattr(self, name, new)
+
+    def add(self, item:Item):
+        if item in self.index:
+            return
+        i = len(self.items)
+        if i == self.max_velocity.shape[0]:
+            self._grow(i * 2)
+        self.items.append(item)
+        self.index[item] = i
+        self.pull(item)
+        scale = item.object.scale
+        # The unit cube model, as in object_aabb.
+        self.half_extents[:, i] = (scale.x, scale.y, scale.z)
+
+    def remove(self, item:Item):
+        # Moves the last item into the freed column.
+        i = self.index.pop(item)
+        last = len(self.items) - 1
+        if i != last:
+            moved = self.items[last]
+            self.items[i] = moved
+            self.index[moved] = i
+            for array in (self.position, self.velocity, self.half_extents, self.max_velocity, self.awake, self.still_ticks):
+                array[..., i] = array[..., last]
+        self.items.pop()
+        self.awake[last] = False
+
+    def pull(self, item:Item):
+        # Re-reads an item's state after something outside the world moved it.
+        i = self.index[item]
+        position = item.object.position
+        velocity = item.velocity
+        self.position[:, i] = (position.x, position.y, position.z)
+        self.velocity[:, i] = (velocity.x, velocity.y, velocity.z)
+        self.max_velocity[i] = item.max_velocity
+        self.wake(item)
+
+    @property
+    def sleeping_count(self) -> int:
+        return len(self.items) - int(self.awake[:len(self.items)].sum())
+
+    def wake(self, item:Item):
+        i = self.index[item]
+        self.awake[i] = True
+        self.still_ticks[i] = 0
+        item.wake()
+
+    def wake_in(self, aabb:AABB, margin:float = 0.1):
+        # Wakes every sleeping item within margin of aabb, for bodies moving into them.
+        n = len(self.items)
+        sleeping = np.flatnonzero(~self.awake[:n])
+        if not len(sleeping):
+            return
+        position = self.position[:, sleeping]
+        half = self.half_extents[:, sleeping] + margin
+        lo = np.array([[aabb.x0], [aabb.y0], [aabb.z0]])
+        hi = np.array([[aabb.x1], [aabb.y1], [aabb.z1]])
+        touching = ((position - half <= hi) & (lo <= position + half)).all(axis=0)
+        for i in sleeping[touching].tolist():
+            self.wake(self.items[i])
+
+    def next_velocity_y(self, active:np.ndarray) -> np.ndarray:
+        max_velocity = self.max_velocity[active]
+        return np.clip(self.velocity[1, active] - self.game.globals["gravity"] * self.game.dt, -max_velocity, max_velocity)
+
+    def swept_bounds(self) -> AABB | None:
+        # Bounds of everything the awake items can reach this tick, for one broadphase query.
+        active = np.flatnonzero(self.awake[:len(self.items)])
+        if not len(active):
+            return None
+        dt = self.game.dt
+        step = self.velocity[:, active] * dt
+        step[1] = self.next_velocity_y(active) * dt
+        position = self.position[:, active]
+        half = self.half_extents[:, active]
+        lo = (position - half + np.minimum(step, 0.0)).min(axis=1)
+        hi = (position + half + np.maximum(step, 0.0)).max(axis=1)
+        return AABB(*lo.tolist(), *hi.tolist())
+
+    def step(self, statics:list[AABB], skip:Item | None = None):
+        # One tick of the awake items against static boxes.  skip (the held item) is moved by
+        # someone else, its state is re-read instead and it never sleeps.
+        held = self.index.get(skip) if skip is not None else None
+        if held is not None:
+            self.pull(skip)
+        active = np.flatnonzero(self.awake[:len(self.items)])
+        self.active_count = len(active)
+        if not len(active):
+            return
+        dt = self.game.dt
+        position = self.position[:, active]
+        previous_velocity = self.velocity[:, active]
+        half = self.half_extents[:, active]
+        velocity = previous_velocity.copy()
+
+        velocity[1] = self.next_velocity_y(active)
+        if held is not None:
+            column = np.searchsorted(active, held)
+            velocity[:, column] = previous_velocity[:, column]
+        step = velocity * dt
+        if held is not None:
+            step[:, column] = 0.0
+        hit = np.zeros(len(active), dtype=bool)
+        toi = np.ones(len(active))
+        if statics:
+            hit, toi = self.time_of_impact(position - half, position + half, step, statics)
+        if held is not None:
+            hit[column] = False
+
+        displacement = step * toi
+        position += displacement
+        velocity[:, hit] = 0.0
+        self.position[:, active] = position
+        self.velocity[:, active] = velocity
+
+        still = (np.abs(displacement).max(axis=0) < SLEEP_DISTANCE) & (np.abs(velocity).max(axis=0) < SLEEP_VELOCITY)
+        still_ticks = np.where(still, self.still_ticks[active] + 1, 0)
+        if held is not None:
+            still_ticks[column] = 0
+        self.still_ticks[active] = still_ticks
+        asleep = still_ticks >= SLEEP_TICKS
+        self.awake[active[asleep]] = False
+
+        # Resting items come back to zero velocity without moving and aren't touched.
+        changed = np.flatnonzero((displacement != 0.0).any(axis=0) | (velocity != previous_velocity).any(axis=0) | asleep)
+        if not len(changed):
+            return
+        items = self.items
+        moved_position = position[:, changed].T.tolist()
+        moved_velocity = velocity[:, changed].T.tolist()
+        for i, (x, y, z), (vx, vy, vz), sleeping in zip(active[changed].tolist(), moved_position, moved_velocity, asleep[changed].tolist()):
+            item = items[i]
+            item.object.position = Vec3(x, y, z)
+            item.velocity = Vec3(vx, vy, vz)
+            item.sleeping = sleeping
+
+    @staticmethod
+    def time_of_impact(lo:np.ndarray, hi:np.ndarray, step:np.ndarray, statics:list[AABB]) -> tuple[np.ndarray, np.ndarray]:
+        # sweep_aabb and earliest_impact for every item against every box at once, returns
+        # which items hit something and the fraction of their step travelled.
+        n = lo.shape[1]
+        hit = np.zeros(n, dtype=bool)
+        toi = np.ones(n)
+        boxes = np.array([(b.x0, b.y0, b.z0, b.x1, b.y1, b.z1) for b in statics]).T
+        # Only pairs whose swept bounds overlap can touch this tick.
+        swept_lo = lo + np.minimum(step, 0.0)
+        swept_hi = hi + np.maximum(step, 0.0)
+        near = ((swept_lo[:, :, None] <= boxes[3:, None, :]) & (boxes[:3, None, :] <= swept_hi[:, :, None])).all(axis=0)
+        item, box = np.nonzero(near)
+        if not len(item):
+            return hit, toi
+        alo = lo[:, item]
+        ahi = hi[:, item]
+        blo = boxes[:3, box]
+        bhi = boxes[3:, box]
+        d = step[:, item]
+        pairs = np.arange(len(item))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            forward = d > 0
+            entry = np.where(forward, (blo - ahi) / d, (bhi - alo) / d)
+            exit = np.where(forward, (bhi - alo) / d, (blo - ahi) / d)
+        still = d == 0
+        apart = (ahi <= blo) | (bhi <= alo)
+        entry[still] = -np.inf
+        exit[still] = np.inf
+        axis = entry.argmax(axis=0)
+        t_entry = entry[axis, pairs]
+        t_exit = exit.min(axis=0)
+        swept = ~(still & apart).any(axis=0) & (t_entry > -np.inf) & (t_entry <= t_exit) & (t_entry <= 1.0) & (t_exit > 0.0)
+        t = np.where(swept, np.maximum(t_entry, 0.0), np.inf)
+
+        # Already interpenetrating, stopped only when moving further into the shallowest axis.
+        inside = ((alo < bhi) & (blo < ahi)).all(axis=0)
+        if inside.any():
+            depth_up = bhi - alo
+            depth_down = ahi - blo
+            push_axis = np.minimum(depth_up, depth_down).argmin(axis=0)
+            sign = np.where(depth_up[push_axis, pairs] < depth_down[push_axis, pairs], 1.0, -1.0)
+            t = np.where(inside, np.where(d[push_axis, pairs] * sign < 0, 0.0, np.inf), t)
+            axis = np.where(inside, push_axis, axis)
+
+        # Earliest contact of each item.
+        order = np.lexsort((t, item))
+        first = order[np.unique(item[order], return_index=True)[1]]
+        first = first[np.isfinite(t[first])]
+        touched = item[first]
+        travel = np.abs(d[axis[first], first])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            toi[touched] = np.where(travel > 0, np.maximum(0.0, t[first] - SKIN / travel), 0.0)
+        hit[touched] = True
+        return hit, toi
@@ -4,8 +4,12 @@ from game_tools import Game
 
 from Loxoc import (Camera, Window, EVENT_FLAG, Vec3, Object3D, Quaternion, BoxCollider, Collider, EVENT_STATE, RayCollider, RayHit)
 
+from game_tools.collision import AABB, earliest_impact, bisect_impact
+from game.item import SLEEP_DISTANCE, SLEEP_TICKS
+
 from copy import copy
 
+import heapq
 import math as m
 
 from typing import Callable
@@ -13,11 +17,26 @@ from typing import Callable
 if TYPE_CHECKING:
     from game.item import Item
 
+WORLD_UP = Vec3(0,1,0)
+
+def clamp(value:float, low:float, high:float) -> float:
+    # Unlike min/max this doesn't allocate an iterator per call.
+    return low if value < low else high if value > high else value
+
 class Inventory:
+    # Slots hold stacks of items with the same name, up to each item's max_stack.  Free slots
+    # are kept in a min-heap so the lowest one is filled first, and items are indexed by
+    # slot and by name so storing, removing, lookups and full are O(1) or O(log n).
     def __init__(self, player:Player, size:int) -> None:
-        self.space:list[Item|None] = [None for _ in range(size)]
+        self.slots:list[list[Item]] = [[] for _ in range(size)]
         self._size = size
         self.player = player
+        self._free:list[int] = list(range(size))
+        self._slot_of:dict[Item, int] = {}
+        self._by_name:dict[str, set[int]] = {}
+        # Slots per name whose stack still has room.
+        self._open:dict[str, set[int]] = {}
+        self._count = 0
 
     @property
     def size(self) -> int:
@@ -26,60 +45,150 @@ class Inventory:
     @size.setter
     def size(self, value:int):
         if value > self._size:
-            self.space.extend([None for _ in range(value - self._size)])
+            self.slots.extend([] for _ in range(value - self._size))
+            for ind in range(self._size, value):
+                heapq.heappush(self._free, ind)
         elif value < self._size:
             for ind in range(value, self._size):
-                self.drop(ind)
-                self.space.pop(ind)
+                self.drop_many(list(self.slots[ind]))
+            del self.slots[value:]
+            self._free = [ind for ind in self._free if ind < value]
+            heapq.heapify(self._free)
         self._size = value
 
     @property
     def full(self) -> bool:
-        return all(self.space)
-    
-    def remove(self, item:Item):
-        self.space.remove(item)
-
-    def store(self, item:Item):
-        if self.full:
+        # No empty slot left, items can still go onto stacks with room, see can_store.
+        return not self._free
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, item:Item) -> bool:
+        return item in self._slot_of
+
+    def __getitem__(self, slot:int) -> list[Item]:
+        return self.slots[slot]
+
+    def can_store(self, item:Item) -> bool:
+        return bool(self._free) or bool(self._open.get(item.name))
+
+    def slot_of(self, item:Item) -> int | None:
+        return self._slot_of.get(item)
+
+    def find(self, name:str) -> list[Item]:
+        return [item for ind in sorted(self._by_name.get(name, ())) for item in self.slots[ind]]
+
+    def get(self, name:str) -> Item | None:
+        # Any one stored item with this name.
+        slots = self._by_name.get(name)
+        return self.slots[next(iter(slots))][-1] if slots else None
+
+    def count(self, name:str) -> int:
+        return sum(len(self.slots[ind]) for ind in self._by_name.get(name, ()))
+
+    def store(self, item:Item) -> int:
+        # Returns the slot the item went into.
+        if item in self._slot_of:
+            raise ValueError(f"{item.name} is already in the inventory.")
+        open_slots = self._open.get(item.name)
+        if open_slots:
+            ind = next(iter(open_slots))
+        elif self._free:
+            ind = heapq.heappop(self._free)
+            self._by_name.setdefault(item.name, set()).add(ind)
+        else:
             raise RuntimeError("Inventory is full.")
-        
-        for i in range(len(self.size)):
-            if not self.space[i]:
-                self.space[i] = item
+
+        stack = self.slots[ind]
+        stack.append(item)
+        self._slot_of[item] = ind
+        self._count += 1
+        if len(stack) < stack[0].max_stack:
+            self._open.setdefault(item.name, set()).add(ind)
+        elif open_slots:
+            open_slots.discard(ind)
 
         # TODO call method on item to put it into stored state.
 
+        return ind
+
+    def store_many(self, items:list[Item]) -> list[Item]:
+        # Stores as many as fit and returns the ones that didn't.
+        left = []
+        for item in items:
+            if self.can_store(item):
+                self.store(item)
+            else:
+                left.append(item)
+        return left
+
+    def remove(self, item:Item):
+        ind = self._slot_of.pop(item)
+        stack = self.slots[ind]
+        stack.remove(item)
+        self._count -= 1
+        name = item.name
+        if stack:
+            self._open.setdefault(name, set()).add(ind)
+        else:
+            self._by_name[name].discard(ind)
+            if not self._by_name[name]:
+                del self._by_name[name]
+            open_slots = self._open.get(name)
+            if open_slots is not None:
+                open_slots.discard(ind)
+                if not open_slots:
+                    del self._open[name]
+            heapq.heappush(self._free, ind)
+
     def drop(self, item:Item | int) -> Item | None:
+        # Drops an item, or the top item of a slot.
         item_to_drop:Item | None = None
         # get and remove item from inventory
-        if isinstance(item, Item):
-            ind = self.space.index(item)
-            item_to_drop = self.space[ind]
-            self.space[ind] = None
-        elif isinstance(item, int):
-            item_to_drop = self.space[item]
-            self.space[ind] = None
+        if isinstance(item, int):
+            stack = self.slots[item]
+            item_to_drop = stack[-1] if stack else None
+        elif item in self._slot_of:
+            item_to_drop = item
+        if item_to_drop is not None:
+            self.remove(item_to_drop)
 
         # TODO drop the item on the ground.
 
         return item_to_drop
+
+    def drop_many(self, items:list[Item]) -> list[Item]:
+        return [dropped for dropped in (self.drop(item) for item in items) if dropped is not None]
         
 
 class Player:
-    def __init__(self, game:Game, position: Vec3 | None = None, rotation: Quaternion | None = None, speed = 7, max_speed = 10, max_jump_speed = 20, friction = 5, inventory_size = 5) -> None:
+    # Input actions tick and update read.
+    actions = ("move_forward", "move_back", "move_left", "move_right", "jump")
+
+    def __init__(self, game:Game, position: Vec3 | None = None, rotation: Quaternion | None = None, speed = 420, max_speed = 10, max_jump_speed = 20, friction = 300, inventory_size = 5) -> None:
         self.game: Game = game
         self.position: Vec3 = position if position else Vec3(0,0,0)
         self.velocity: Vec3 = Vec3(0,0,0)
+        # Position at the start of the latest simulation tick, the camera is blended from it.
+        self.previous_position: Vec3 = copy(self.position)
+        # Written in place every frame instead of allocating new vectors.
+        self.camera_position: Vec3 = copy(self.position)
+        self.held_position: Vec3 = Vec3(0,0,0)
         self.rotation:Quaternion = rotation if rotation else game.camera.rotation
+        # speed and friction are accelerations in units per second squared
         self.speed = speed
         self.max_speed = max_speed
         self.max_jump_speed = max_jump_speed
         self.friction = friction
         self.player_collider_bounds = Vec3(1,1,1), Vec3(-1,-1,-1)
         self.player_collider = BoxCollider.from_bounds(*self.player_collider_bounds, offset = copy(self.position), scale=Vec3(1,3,1))
-        self.future_collider = BoxCollider.from_bounds(*self.player_collider_bounds, scale=self.player_collider.scale, offset = self.position - Vec3(0,0.01,0) + self.velocity * self.game.window.dt)
+        # Overlap tests spent finding the contact against non box colliders.
+        self.bisection_steps = 16
         self.can_jump = True
+        # Standing still on the ground without input for SLEEP_TICKS ticks skips physics until woken.
+        self.asleep = False
+        self.still_ticks = 0
 
         self.lock_rotation = False
 
@@ -112,110 +221,218 @@ class Player:
     def check_collision(self, other: Object3D | Collider) -> bool:
         return self.player_collider.check_collision(other)
     
-    def check_collision_future(self, other: Object3D | Collider) -> bool:
-        self.future_collider.offset = self.position - Vec3(0,0.01,0) + self.velocity * self.game.window.dt
-        return self.future_collider.check_collision(other)
+    def aabb(self) -> AABB:
+        upper, lower = self.player_collider_bounds
+        scale = self.player_collider.scale
+        return AABB(
+            self.position.x + lower.x * scale.x, self.position.y + lower.y * scale.y, self.position.z + lower.z * scale.z,
+            self.position.x + upper.x * scale.x, self.position.y + upper.y * scale.y, self.position.z + upper.z * scale.z
+        )
+
+    def future_aabb(self) -> AABB:
+        # Bounds swept this tick, for broadphase queries.
+        step = self.velocity * self.game.dt
+        return self.aabb().expanded(step.x, step.y, step.z)
+
+    def sweep(self, collisions:list[AABB | Collider | Object3D]) -> tuple[int, float] | None:
+        # Clips the velocity so this frame's step ends touching the first thing in its way.
+        # Boxes are swept analytically and only the blocked axis is clipped so the player slides
+        # along them, anything else is bisected against the player collider and stops the player.
+        # Returns the axis and normal sign of the first contact, axis -1 for a bisected contact.
+        dt = self.game.dt
+        boxes = [col for col in collisions if isinstance(col, AABB)]
+        others = [col for col in collisions if not isinstance(col, AABB)]
+        contact = None
+        for _ in range(3):
+            velocity = self.velocity
+            impact = earliest_impact(self.aabb(), velocity.x * dt, velocity.y * dt, velocity.z * dt, boxes) if boxes else None
+            if impact is None:
+                break
+            t, axis, sign = impact
+            if axis == 0:
+                self.velocity.x *= t
+            elif axis == 1:
+                self.velocity.y *= t
+            else:
+                self.velocity.z *= t
+            if contact is None:
+                contact = (axis, sign)
+        if others:
+            step = self.velocity * dt
+            offset = self.player_collider.offset
+            def collides_at(t:float) -> bool:
+                self.player_collider.offset = self.position + step * t
+                return any(self.check_collision(col) for col in others)
+            toi = bisect_impact(collides_at, self.bisection_steps)
+            self.player_collider.offset = offset
+            if toi is not None:
+                self.velocity = self.velocity * toi
+                if contact is None:
+                    contact = (-1, 0.0)
+        return contact
 
     def vel_update(self, middle_callback: Callable[[], None] = lambda:None):
-        dt = self.game.window.dt
+        # Works on floats and writes the results into velocity and position in place, so a
+        # tick allocates no vectors.
+        dt = self.game.dt
         gravity = self.game.globals["gravity"] * dt
-        event = self.game.window.event
-
-        # find angle between vector and plane to fix forward z/x rotation
-
-        fwd_floor_angle = m.pi/2 - m.acos(min(1, max(-1, self.rotation.forward.dot(Vec3(0,1,0)))))
-
-        fwd_correction_quat = Quaternion.from_axis_angle(self.rotation.right, fwd_floor_angle)
-        
-        fwd_corrected:Vec3 = fwd_correction_quat * self.rotation.forward
+        down = self.game.input.down
+        rotation = self.rotation
+        w, x, y, z = rotation.w, rotation.x, rotation.y, rotation.z
+
+        # Forward flattened onto the floor, so looking up or down doesn't slow walking, and
+        # right, both read straight off the rotation.
+        fwd_x = 2.0 * (x * z + w * y)
+        fwd_z = 1.0 - 2.0 * (x * x + y * y)
+        flat = m.hypot(fwd_x, fwd_z)
+        if flat:
+            fwd_x /= flat
+            fwd_z /= flat
+        right_x = 1.0 - 2.0 * (y * y + z * z)
+        right_z = 2.0 * (x * z - w * y)
 
         # Apply movement velocities
 
-        if event.get_flag(EVENT_FLAG.KEY_w) == EVENT_STATE.PRESSED:
-            fwd = fwd_corrected * self.speed
-
-            self.velocity += Vec3(fwd.x, 0.0, fwd.z)
-        
-        if event.get_flag(EVENT_FLAG.KEY_s) == EVENT_STATE.PRESSED:
-            fwd = fwd_corrected * self.speed
+        velocity = self.velocity
+        vx, vy, vz = velocity.x, velocity.y, velocity.z
+        speed = self.speed * dt
 
-            self.velocity -= Vec3(fwd.x, 0.0, fwd.z)
+        if down.move_forward:
+            vx += fwd_x * speed
+            vz += fwd_z * speed
 
-        if event.get_flag(EVENT_FLAG.KEY_d) == EVENT_STATE.PRESSED:
-            right = self.rotation.right * self.speed
+        if down.move_back:
+            vx -= fwd_x * speed
+            vz -= fwd_z * speed
 
-            self.velocity -= Vec3(right.x, 0.0, right.z)
+        if down.move_right:
+            vx -= right_x * speed
+            vz -= right_z * speed
 
-        if event.get_flag(EVENT_FLAG.KEY_a) == EVENT_STATE.PRESSED:
-            right = self.rotation.right * self.speed
+        if down.move_left:
+            vx += right_x * speed
+            vz += right_z * speed
 
-            self.velocity += Vec3(right.x, 0.0, right.z)
-
-        if event.get_flag(EVENT_FLAG.KEY_SPACE) == EVENT_STATE.PRESSED and self.can_jump:
-            self.velocity.y += self.max_jump_speed
+        if down.jump and self.can_jump:
+            vy += self.max_jump_speed
             self.can_jump = False
 
         # clamp velocity
 
-        v_clamp = lambda coord: min(self.max_speed, max(-self.max_speed, coord))
-
-        self.velocity = Vec3(v_clamp(self.velocity.x), max(-self.max_jump_speed, min(self.max_jump_speed, self.velocity.y)), v_clamp(self.velocity.z))
+        max_speed = self.max_speed
+        max_jump_speed = self.max_jump_speed
+        velocity.x = clamp(vx, -max_speed, max_speed)
+        velocity.y = clamp(vy, -max_jump_speed, max_jump_speed)
+        velocity.z = clamp(vz, -max_speed, max_speed)
 
         # callback
         middle_callback()
 
-        # apply velocity
+        # apply velocity, the callback may have replaced it
 
-        self.position += self.velocity * dt
+        velocity = self.velocity
+        position = self.position
+        position.x += velocity.x * dt
+        position.y += velocity.y * dt
+        position.z += velocity.z * dt
 
         # apply friction to velocity
 
-        if self.velocity.get_magnitude() > 0:
-            self.velocity.y = max(-self.max_jump_speed, min(self.max_jump_speed, self.velocity.y - gravity))
-            c1 = abs(self.velocity.x) - self.friction < 0
-            c2 = abs(self.velocity.z) - self.friction < 0
-            if c1:
-                self.velocity.x = 0
+        vx, vy, vz = velocity.x, velocity.y, velocity.z
+        if vx or vy or vz:
+            velocity.y = clamp(vy - gravity, -max_jump_speed, max_jump_speed)
+            friction = self.friction * dt
+            if abs(vx) - friction < 0:
+                velocity.x = 0
             else:
-                self.velocity.x -= self.friction * m.copysign(1.0, self.velocity.x)
-            if c2:
-                self.velocity.z = 0
+                velocity.x = vx - friction * m.copysign(1.0, vx)
+            if abs(vz) - friction < 0:
+                velocity.z = 0
             else:
-                self.velocity.z -= self.friction * m.copysign(1.0, self.velocity.z)
+                velocity.z = vz - friction * m.copysign(1.0, vz)
 
 
     def look_update(self):
         if self.lock_rotation: return
+        input = self.game.input
+        if not input.mouse_moving: return
         dt = self.game.window.dt
-        
-        mouse = self.game.window.event.mouse
-
-        mouse_moving = self.game.window.event.check_flag(EVENT_FLAG.MOUSE_MOTION)
-        
-        future_rot = copy(self.rotation)
-        future_rot.rotate(self.rotation.right, mouse_moving * m.radians(mouse.rel_y * self.game.globals["mouse_sensitivity_y"]) * dt)
-
-
-        
-
-        if future_rot.up.dot(Vec3(0,1,0)) > 0.50: # lower the value the more up and down look
-            self.rotation = future_rot
-
-        self.rotation.rotate(Vec3(0,1,0), -mouse_moving * m.radians(mouse.rel_x * self.game.globals["mouse_sensitivity_x"]) * dt)
+        sensitivity = self.game.globals
+        rotation = self.rotation
+
+        # Pitch about the view's own right axis, rotation * (cos, sin, 0, 0), kept only while
+        # the view's up still points up enough.
+        half = m.radians(input.mouse_rel_y * sensitivity["mouse_sensitivity_y"]) * dt * 0.5
+        c, s = m.cos(half), m.sin(half)
+        w, x, y, z = rotation.w, rotation.x, rotation.y, rotation.z
+        pw = w * c - x * s
+        px = w * s + x * c
+        py = y * c + z * s
+        pz = z * c - y * s
+
+        if 1.0 - 2.0 * (px * px + pz * pz) > 0.50: # lower the value the more up and down look
+            rotation.w = pw
+            rotation.x = px
+            rotation.y = py
+            rotation.z = pz
+
+        rotation.rotate(WORLD_UP, -m.radians(input.mouse_rel_x * sensitivity["mouse_sensitivity_x"]) * dt)
+
+    def wake(self):
+        self.asleep = False
+        self.still_ticks = 0
+
+    def has_movement_input(self) -> bool:
+        down = self.game.input.down
+        return down.move_forward or down.move_back or down.move_left or down.move_right or down.jump
+
+    def fixed_update(self, velocity_middle_callback: Callable[[], None] = lambda:None):
+        # One simulation tick.
+        if self.asleep and self.has_movement_input():
+            self.wake()
+        position = self.position
+        previous = self.previous_position
+        previous.x = position.x
+        previous.y = position.y
+        previous.z = position.z
+        if not self.asleep:
+            self.vel_update(velocity_middle_callback)
+            self.player_collider.offset = position
+            if self.can_jump and position.distance(previous) < SLEEP_DISTANCE:
+                self.still_ticks += 1
+                self.asleep = self.still_ticks >= SLEEP_TICKS
+            else:
+                self.still_ticks = 0
 
-    def update(self, middle_callback: Callable[[], None] = lambda:None, velocity_middle_callback: Callable[[], None] = lambda:None):
+        if self.held_item:
+            # Two units along the view's forward.
+            rotation = self.rotation
+            w, x, y, z = rotation.w, rotation.x, rotation.y, rotation.z
+            held = self.held_position
+            held.x = position.x + 4.0 * (x * z + w * y)
+            held.y = position.y + 4.0 * (y * z - w * x)
+            held.z = position.z + 2.0 - 4.0 * (x * x + y * y)
+            self.held_item.object.position = held
+
+    def update(self, middle_callback: Callable[[], None] = lambda:None):
+        # Once per frame, looking around and placing the camera between the last two ticks.
         camera = self.game.camera
 
         self.look_update()
-        self.vel_update(velocity_middle_callback)
-        self.player_collider.offset = camera.position
 
         self.center_ray.direction = self.rotation
         self.center_ray.origin = self.position
 
         middle_callback()
 
-        camera.position = self.position
+        alpha = self.game.alpha
+        previous = self.previous_position
+        position = self.position
+        blended = self.camera_position
+        blended.x = previous.x + (position.x - previous.x) * alpha
+        blended.y = previous.y + (position.y - previous.y) * alpha
+        blended.z = previous.z + (position.z - previous.z) * alpha
+        camera.position = blended
         camera.rotation = self.rotation
 
         if not self.can_change_held:
@@ -224,11 +441,31 @@ class Player:
                 self.can_change_held = True
                 self.pickup_timer = 0
 
-
-        if self.held_item:
-            self.held_item.object.position = self.position + self.rotation.forward * 2
-
     def start(self):
         self.game.window.lock_mouse(True)
 
+    def snapshot(self) -> tuple:
+        position, velocity, rotation = self.position, self.velocity, self.rotation
+        return (
+            (position.x, position.y, position.z), (velocity.x, velocity.y, velocity.z),
+            (rotation.w, rotation.x, rotation.y, rotation.z),
+            self.can_jump, self.asleep, self.still_ticks, self.lock_rotation,
+            self._held_item, self.can_change_held, self.pickup_timer
+        )
+
+    def restore(self, snapshot:tuple):
+        # Written into the existing vectors, the camera and colliders keep pointing at them.
+        (
+            (px, py, pz), (vx, vy, vz), (rw, rx, ry, rz),
+            self.can_jump, self.asleep, self.still_ticks, self.lock_rotation,
+            self._held_item, self.can_change_held, self.pickup_timer
+        ) = snapshot
+        position, previous, velocity, rotation = self.position, self.previous_position, self.velocity, self.rotation
+        position.x = previous.x = px
+        position.y = previous.y = py
+        position.z = previous.z = pz
+        velocity.x, velocity.y, velocity.z = vx, vy, vz
+        rotation.w, rotation.x, rotation.y, rotation.z = rw, rx, ry, rz
+        self.player_collider.offset = position
+
         
@@ -1,11 +1,23 @@
 from __future__ import annotations
 from game_tools import Game
 from game_tools.scene import Scene
+from game_tools.loader import AssetRequest
+from game_tools.broadphase import SpatialHash
+from game_tools.raycast import Raycaster
+from game_tools.activation import ActivationGrid, SIMULATE, ANIMATE, render_object, render_light
+from game_tools.collision import object_aabb
+from game_tools.interpolation import TransformInterpolator
+from game_tools.billboard import Billboards
+from game_tools.emitters import EmitterPool
 from game_tools.utility import is_clicking_sprite
-from game.dialogue import Dialogue, DialogueOption
+from game.dialogue import DialoguePool, Conversation
+from game_tools.dialogue_graph import DialogueGraph
+from game.atlases import HUD_ATLAS
+from game_tools.text import TextLabel
 
 from game.player import Player
 from game.item import Item
+from game.item_world import ItemWorld
 
 from Loxoc import (
     Sprite, Object2D, Vec2, EVENT_STATE, Model, Object3D, Vec3, EVENT_FLAG, BoxCollider,
@@ -17,47 +29,71 @@ from copy import copy
 
 import math
 
+# Broadphase layers
+LAYER_WORLD = 1
+LAYER_CHARACTER = 2
+LAYER_ITEM = 4
+
 class SceneIntro(Scene):
+    manifest = [
+        AssetRequest.model("./models/character_plane/character_plane.gltf"),
+        AssetRequest.model("./models/cube/cube.gltf"),
+        AssetRequest.texture("./sprites/Bilboard Sprite Man.png", filtering=TextureFiltering.NEAREST),
+        AssetRequest.texture("./sprites/concrete.jpg"),
+        AssetRequest.shader("./shaders/character_fragment.glsl", ShaderType.FRAGMENT),
+        AssetRequest.texture("./sprites/particle_effect2.png", filtering=TextureFiltering.NEAREST),
+        AssetRequest.atlas(HUD_ATLAS, filtering=TextureFiltering.NEAREST)
+    ]
+
+    actions = Player.actions + ("interact", "fire", "restart", "quit", "toggle_profiler")
+
     def load(self, game: Game):
         super().load(game)
 
         self.player = Player(self.game)
+
+        self.broadphase = SpatialHash(cell_size = 4.0)
+        self.raycaster = Raycaster(self.broadphase)
+        self.interpolator = TransformInterpolator()
         
-        self.character_plane_model = Model.from_file("./models/character_plane/character_plane.gltf")
+        self.character_plane_model = self.load_model("./models/character_plane/character_plane.gltf")
 
-        self.cube_model = Model.from_file("./models/cube/cube.gltf")
+        self.cube_model = self.load_model("./models/cube/cube.gltf")
 
-        self.stick_figure_sprite = Texture.from_file("./sprites/Bilboard Sprite Man.png", filtering=TextureFiltering.NEAREST)
-        self.concrete_texture = Texture.from_file("./sprites/concrete.jpg")
+        self.stick_figure_sprite = self.load_texture("./sprites/Bilboard Sprite Man.png", filtering=TextureFiltering.NEAREST)
+        self.concrete_texture = self.load_texture("./sprites/concrete.jpg")
 
         self.character = Object3D(self.character_plane_model, Vec3(0,-2,10), scale=Vec3(1,1,1),
-            material=Material(fragment=Shader.from_file("./shaders/character_fragment.glsl", ShaderType.FRAGMENT)))
+            material=Material(fragment=self.load_shader("./shaders/character_fragment.glsl", ShaderType.FRAGMENT)))
         self.character.material.diffuse_texture = self.stick_figure_sprite
         self.character_collider = BoxCollider(self.character)
         self.character.add_collider(self.character_collider)
         self.game.window.add_object(self.character)
+        # Loose enough to contain the plane at any billboard yaw.
+        self.broadphase.insert(self.character, object_aabb(self.character, Vec3(1,2,1)), LAYER_CHARACTER)
 
         self.floor = Object3D(self.cube_model, Vec3(0,-5,10), scale=Vec3(100,1,100))
         self.floor.material.diffuse_texture = self.concrete_texture
         self.floor_collider = BoxCollider(self.floor)
         self.floor.add_collider(self.floor_collider)
         self.game.window.add_object(self.floor)
+        self.broadphase.insert(self.floor, object_aabb(self.floor), LAYER_WORLD)
 
         self.item_tip_text = Text("", Vec4(1,1,1,1), Vec2(20, game.dimensions[1] - 35), Vec2(0.5,0.5), font=self.game.globals["fonts"]["font_sofadi_one"])
         self.game.window.add_text(self.item_tip_text)
+        self.item_tip = TextLabel(self.item_tip_text)
+        self.tip_item:Item | None = None
+        # The item's name and description the tip was written from.
+        self.tip_strings:tuple[str, str] = ("", "")
 
-        #HUD
-        self.HUD_crosshair_sprite = Sprite.from_texture(Texture.from_file("./sprites/crosshair_1.png", filtering=TextureFiltering.NEAREST))
-        
-        self.HUD_crosshair = Object2D(self.HUD_crosshair_sprite, self.game.camera, scale=Vec2(1,1) * 20, depth=-100)
-        self.HUD_crosshair.position = Vec2(self.game.dimensions[0]/2, self.game.dimensions[1]/2)
-        self.game.window.add_object2d(self.HUD_crosshair)
+        #HUD, the dialogue options' backgrounds are drawn through it too.
+        self.hud = self.load_sprite_batch(HUD_ATLAS, TextureFiltering.NEAREST)
 
-        self.HUD_revolver_sprite = Sprite.from_texture(Texture.from_file("./sprites/HUD_revolver.png", filtering=TextureFiltering.NEAREST))
+        self.HUD_crosshair = self.hud.add("./sprites/crosshair_1.png", scale=Vec2(1,1) * 20, depth=-100)
+        self.HUD_crosshair.position = Vec2(self.game.dimensions[0]/2, self.game.dimensions[1]/2)
 
-        self.HUD_revolver = Object2D(self.HUD_revolver_sprite, self.game.camera, scale=Vec2(1,1) * 250, depth=-100)
+        self.HUD_revolver = self.hud.add("./sprites/HUD_revolver.png", scale=Vec2(1,1) * 250, depth=-100)
         self.HUD_revolver.position = Vec2(self.game.dimensions[0] - self.HUD_revolver.width/2, self.HUD_revolver.height/2)
-        self.game.window.add_object2d(self.HUD_revolver)
 
         self.test_item = Item(game, "Cube", "Very cubic.", self.cube_model, Vec3(-10,-2,10), scale=Vec3(0.1,0.1,0.1))
         self.game.window.add_object(self.test_item.object)
@@ -71,175 +107,249 @@ class SceneIntro(Scene):
         dialogue_option_position = Vec2(self.game.dimensions[0]* 2/3, 70)
 
 
-        self.dialogue_option_background = Sprite.from_texture(Texture.from_file("./sprites/textbox_background.png", filtering=TextureFiltering.NEAREST))
-
-
-        self.dialogue = Dialogue(game, "Hello how are you?", dialogue_position, options = [
-            DialogueOption(game, "Good", self.dialogue_option_background, dialogue_option_position + Vec2(0,80), 
-                chosen_callback = lambda: self.change_dialogue(Dialogue(game, "Awesome!", dialogue_position)),
-                finished_typing_callback = lambda:self.player.rotation_lock(True),
-                end_callback = lambda:self.player.rotation_lock(False)
-            ),
-            DialogueOption(game, "Bad", self.dialogue_option_background, dialogue_option_position, 
-                chosen_callback = lambda: self.change_dialogue(Dialogue(game, "I'm sorry to hear that!", dialogue_position)),
-                finished_typing_callback = lambda:self.player.rotation_lock(True),
-                end_callback = lambda:self.player.rotation_lock(False)
-            )
-        ])
+        # Lines are only made when the NPC starts talking, and shared by every conversation.
+        self.dialogue_pool = DialoguePool(game, self.hud)
+        self.conversation = Conversation(DialogueGraph.load("./dialogue/intro.json"), self.dialogue_pool, dialogue_position, dialogue_option_position, {
+            "lock_rotation": lambda: self.player.rotation_lock(True),
+            "unlock_rotation": lambda: self.player.rotation_lock(False)
+        })
 
         self.items = [self.test_item]
-
-        self.particle_texture = Texture.from_file("./sprites/particle_effect2.png", filtering=TextureFiltering.NEAREST)
-
-        self.emitter = Emitter(
-            Vec3(0,0,0),
-            Quat.from_axis_angle(Vec3(1,0,0), math.radians(-90)),
-            Vec2(0.1,0.1),Vec2(0.3,0.3),
-            10,
-            10,
-            math.radians(30),
-            0,
-            0.10, 20.0,
-            10, 10,
-            Vec4(1,1,1,1),
-            Vec4(1,1,1,1)
-        )
-        self.emitter.material.diffuse_texture = self.particle_texture
-
-        self.emitter.start()
-        self.game.window.add_emitter(self.emitter)
+        self.item_world = ItemWorld(game)
+        for item in self.items:
+            # Items are found by their pickup volume.
+            self.broadphase.track(item.object, Vec3(3,3,3), LAYER_ITEM, target = item)
+            self.interpolator.add(item.object)
+            self.item_world.add(item)
+
+        self.particle_texture = self.load_texture("./sprites/particle_effect2.png", filtering=TextureFiltering.NEAREST)
+
+        # Hit effects, a burst of particles wherever a shot lands.
+        self.hit_effects = EmitterPool(self.game.window, self.hit_emitter, size = 16, max_particles = 200)
+        self.fire_interval = 0.15
+        self.fire_cooldown = 0.0
+
+        # Billboarded NPCs face the player, those out of sight are left alone.
+        self.billboards = Billboards(max_distance = 150)
+        self.billboards.add(self.character)
+        self.near_character = False
+
+        # Only what is near the player is simulated, animated and drawn.  Items far away
+        # leave the item world and stop falling until the player comes back.
+        window = self.game.window
+        self.activation = ActivationGrid()
+        self.activation.add(self.character, self.character.position,
+            simulate = self.character_simulated,
+            animate = lambda active: self.billboards.add(self.character) if active else self.billboards.remove(self.character),
+            render = render_object(window, self.character))
+        for item in self.items:
+            self.activation.track(item, item.object,
+                simulate = lambda active, item = item: self.item_world.add(item) if active else self.item_world.remove(item),
+                render = render_object(window, item.object))
+        self.activation.track(self.test_light, self.test_item.object, render = render_light(window, self.test_light))
+
+        # Anything reading pressed edges runs every frame so it can't miss a press, the rest
+        # only as often as it is noticed.
+        scheduler = self.scheduler
+        scheduler.add("activation", lambda dt: self.activation.update(self.player.position), frequency = 10, priority = 110)
+        scheduler.add("player.update", lambda dt: self.player.update(), priority = 100)
+        scheduler.add("dialogue_range", lambda dt: self.dialogue_range_update(), frequency = 10, priority = 95)
+        scheduler.add("dialogue", lambda dt: self.dialogue_update(), priority = 90)
+        scheduler.add("billboard", lambda dt: self.billboards.update(self.player.position, self.player.rotation.forward), frequency = 60, priority = 50)
+        scheduler.add("pickup_check", lambda dt: self.pickup_check(), priority = 40)
+        scheduler.add("light_follow", lambda dt: self.light_follow_update(), frequency = 60, priority = 30)
+        scheduler.add("shoot_update", self.shoot_update, priority = 20)
+        scheduler.add("hit_effects", self.hit_effects.update, priority = 10)
+        # Last, so everything shown or hidden this frame reaches the window together.
+        scheduler.add("hud", lambda dt: self.hud.flush(), priority = 0)
+
+        # Restarting puts this back instead of loading the scene again.
+        self.initial_state = self.snapshot()
         
     
     def unload(self):
         super().unload()
-        if self.dialogue.running:
-            self.dialogue.end()
+        self.conversation.end()
+        # Back in the window, so everything below is there to remove.
+        self.activation.activate_all()
         self.game.window.remove_object(self.character)
         self.game.window.remove_object(self.floor)
         self.game.window.remove_object(self.test_item.object)
         self.game.window.remove_text(self.item_tip_text)
-        self.game.window.remove_object2d(self.HUD_revolver)
         self.game.window.remove_point_light(self.test_light)
-        self.game.window.remove_emitter(self.emitter)
-        self.game.window.remove_object2d(self.HUD_crosshair)
+        self.hit_effects.clear()
+        self.hud.clear()
+
+    def fixed_update(self):
+        profiler = self.game.profiler
+        self.interpolator.begin_step()
+
+        with profiler.scope("broadphase"):
+            self.broadphase.update()
+
+        with profiler.scope("player.fixed_update"):
+            self.player.fixed_update(self.player_movement_collision_check)
+
+        with profiler.scope("item_update"):
+            self.item_update()
 
     def update(self):
         dt = self.game.window.deltatime
-        event = self.game.window.event
+        input = self.game.input
+        profiler = self.game.profiler
 
-        if event.get_flag(EVENT_FLAG.KEY_ESCAPE) == EVENT_STATE.PRESSED:
+        if input.down.quit:
             self.game.quit_game = True
 
+        if input.pressed.toggle_profiler:
+            self.game.profiler.enabled = not self.game.profiler.enabled
+            if self.game.profiler.enabled:
+                self.game.profiler_overlay.show()
+            else:
+                self.game.profiler_overlay.hide()
 
-        self.player.update(self.player_falling_collision_check, self.player_movement_collision_check)
+        if input.pressed.restart:
+            self.restore(self.initial_state)
 
-        # DIALOGUE
+        self.scheduler.run(dt)
 
-        if self.player.position.distance(self.character.position) < 10:
-            self.player_on_interact()
-        elif self.dialogue.running:
-            self.dialogue.end()
-            
-        self.dialogue.update()
-        
-        self.bilboard_character(self.character)
+        # Render items between the last two simulation ticks.
+        self.interpolator.apply(self.game.alpha)
+        with profiler.scope("window.update"):
+            self.game.window.update()
+        self.interpolator.restore()
 
-        if event.get_flag(EVENT_FLAG.KEY_r) == EVENT_STATE.PRESSED:
-            self.game.current_scene = self
-    
-        self.pickup_check()
-        
-        self.item_update()
+    def hit_emitter(self) -> Emitter:
+        emitter = Emitter(
+            Vec3(0,0,0),
+            Quat.from_axis_angle(Vec3(1,0,0), math.radians(-90)),
+            Vec2(0.1,0.1),Vec2(0.3,0.3),
+            60,
+            10,
+            math.radians(30),
+            0,
+            0.10, 20.0,
+            10, 10,
+            Vec4(1,1,1,1),
+            Vec4(1,1,1,1)
+        )
+        emitter.material.diffuse_texture = self.particle_texture
+        return emitter
+
+    def snapshot(self) -> dict[str, any]:
+        snapshot = super().snapshot()
+        snapshot["player"] = self.player.snapshot()
+        snapshot["items"] = [
+            (item, copy(item.object.position), copy(item.object.rotation), copy(item.velocity))
+            for item in self.items
+        ]
+        snapshot["dialogue"] = self.conversation.snapshot()
+        snapshot["hit_effects"] = self.hit_effects.snapshot()
+        snapshot["fire_cooldown"] = self.fire_cooldown
+        return snapshot
+
+    def restore(self, snapshot:dict[str, any]):
+        super().restore(snapshot)
+        self.player.restore(snapshot["player"])
+        for item, position, rotation, velocity in snapshot["items"]:
+            item.object.position = position
+            item.object.rotation = rotation
+            item.velocity = copy(velocity)
+            if item in self.item_world:
+                self.item_world.pull(item)
+        self.interpolator.reset()
+        self.conversation.restore(snapshot["dialogue"])
+        self.hit_effects.restore(snapshot["hit_effects"])
+        self.fire_cooldown = snapshot["fire_cooldown"]
+        self.activation.update(self.player.position)
+
+    def shoot_update(self, dt:float):
+        self.fire_cooldown -= dt
+        if not self.game.input.down.fire or self.fire_cooldown > 0.0:
+            return
+        self.fire_cooldown = self.fire_interval
+        hit = self.raycaster.cast(self.player.position, self.player.rotation, layers = LAYER_WORLD | LAYER_CHARACTER)
+        if hit:
+            self.hit_effects.spawn(hit.position, Quat.from_unit(-self.player.rotation.forward), duration = 0.1)
+
+    def dialogue_range_update(self):
+        if not self.activation.active(self.character, SIMULATE):
+            return
+        self.near_character = self.player.position.distance(self.character.position) < 10
+        if not self.near_character and self.conversation.running:
+            self.conversation.end()
+
+    def character_simulated(self, active:bool):
+        # Out of range, the NPC stops listening.
+        if not active:
+            self.near_character = False
+            if self.conversation.running:
+                self.conversation.end()
+
+    def dialogue_update(self):
+        if self.near_character:
+            self.player_on_interact()
+        self.conversation.update()
 
+    def light_follow_update(self):
+        if not self.activation.active(self.test_light, ANIMATE):
+            return
         self.test_light.position = self.test_item.position + Vec3(0,1,0)
 
-        self.shoot_update()
-
-        self.game.window.update()
-
-    def shoot_update(self):
-        dt = self.game.window.deltatime
-        event = self.game.window.event
-        self.emitter.rate = 0
-        for shootable in [self.floor, self.character]:
-            if event.mouse.state == EVENT_STATE.PRESSED:
-                shootable_hit = self.player.center_ray_collision(shootable)
-                if shootable_hit.hit:
-                    self.emitter.position = shootable_hit.position
-                    self.emitter.direction = Quat.from_unit(-self.player.rotation.forward)
-                    self.emitter.rate = 10
-                    print("shot floor")
-
     def pickup_check(self):
-        event = self.game.window.event
-        
-        did_hit = False
-
-        for item in self.items:
-            item_hit = self.player.center_ray_collision(item.pickup_collider)
-            if item_hit.hit and self.player.position.distance(item.position) < 10:
-                did_hit = True
-                self.item_tip_text.text = f"{item.name} : {item.description}"
-                if event.get_flag(EVENT_FLAG.KEY_e) == EVENT_STATE.PRESSED:
-                    if self.player.held_item:
-                        self.player.held_item = None
-                    else:
-                        self.player.held_item = item
-
-        if not did_hit:
-            self.item_tip_text.text = ""
+        # Only the nearest item in reach, measured to where the ray enters its pickup volume.
+        hit = self.raycaster.cast(self.player.position, self.player.rotation, 10, LAYER_ITEM, collider = lambda item: item.pickup_collider)
+        if not hit:
+            self.show_item_tip(None)
+            return
+
+        item = hit.target
+        self.show_item_tip(item)
+        if self.game.input.pressed.interact:
+            if self.player.held_item:
+                self.player.held_item = None
+            else:
+                self.player.held_item = item
+
+    def show_item_tip(self, item:Item | None):
+        # Only formatted and written when the item looked at, its name or its description
+        # changes.  Item.description is only rendered again after a change, reading it is cheap.
+        strings = (item.name, item.description) if item else ("", "")
+        if item is self.tip_item and strings == self.tip_strings:
+            return
+        self.tip_item = item
+        self.tip_strings = strings
+        self.item_tip.set(f"{strings[0]} : {strings[1]}" if item else "")
 
     def item_update(self):
-        colliders = [self.floor]
-        for item in self.items:
-            if item != self.player.held_item:
-                item.update(colliders)
+        # All awake items in one batch against the world geometry any of them can reach.
+        # Items the player walks into wake up, the held item is always awake.
+        if not self.player.asleep:
+            self.item_world.wake_in(self.player.aabb())
+        bounds = self.item_world.swept_bounds()
+        if bounds:
+            self.item_world.step(self.broadphase.query_bounds(bounds, LAYER_WORLD), skip = self.player.held_item)
+        else:
+            self.item_world.active_count = 0
+        profiler = self.game.profiler
+        profiler.count("items awake", self.item_world.active_count)
+        profiler.count("items asleep", self.item_world.sleeping_count)
+        profiler.count("player asleep", int(self.player.asleep))
 
     def player_on_interact(self):
-        event = self.game.window.event
-        if event.get_flag(EVENT_FLAG.KEY_e) == EVENT_STATE.PRESSED:
+        if self.game.input.pressed.interact:
             cube_hit = self.player.center_ray_collision(self.character)
             if cube_hit.hit:
-                if not self.dialogue.finished_typing:
-                    # CUBE START
-                    self.dialogue.start()
-                elif self.dialogue.next:
-                    self.dialogue.end()
-                    self.dialogue = self.dialogue.next
-                    self.dialogue.start()
-                elif len(self.dialogue.options) == 0:
-                    # CUBE END
-                    self.dialogue.end()
+                self.conversation.interact()
                 
     
-    def bilboard_character(self, character:Object3D):
-        vec_direction = (character.position - self.player.position).get_normalized()
-        fwd_vec = character.rotation.forward
-        
-        current_yaw = math.atan2(fwd_vec.x, fwd_vec.z)
-        target_yaw = math.atan2(vec_direction.x, vec_direction.z)
-        
-        yaw = target_yaw - current_yaw
-        
-        yaw_quat = Quat.from_axis_angle(Vec3(0.0,1.0,0.0), yaw)
-        
-        character.rotation = (yaw_quat * character.rotation).get_normalized()
-
-    def player_falling_collision_check(self):
-        if any(self.player.check_collision_future(col) for col in [self.floor, self.character]):
-            self.player.velocity = Vec3(0,0,0)
-            self.player.can_jump = True
-
     def player_movement_collision_check(self):
-        if any(self.player.check_collision_future(col) for col in [self.character]):
-            self.player.velocity = Vec3(0,0,0)
+        # World geometry is swept as boxes, the NPC against its own collider.
+        future = self.player.future_aabb()
+        candidates = self.broadphase.query_bounds(future, LAYER_WORLD) + self.broadphase.query_box(future, LAYER_CHARACTER)
+        if self.player.sweep(candidates):
             self.player.can_jump = True
     
-    def change_dialogue(self, dialogue:Dialogue):
-        self.dialogue.end()
-        self.dialogue = dialogue
-        self.dialogue.start()
-
     def start(self):
         self.player.start()
 
@@ -1,40 +1,55 @@
 from __future__ import annotations
 from game_tools import Game
 from game_tools.scene import Scene
+from game_tools.loader import AssetRequest
 from game_tools.utility import is_clicking_sprite
+from game.atlases import MENU_ATLAS
+from game import SCENES
 
-from game.scenes.intro import SceneIntro
-
-from Loxoc import (Sprite, Object2D, Vec2, EVENT_STATE)
+from Loxoc import (Sprite, Object2D, Vec2)
 import math
 
 class SceneMainMenu(Scene):
+    manifest = [
+        AssetRequest.atlas(MENU_ATLAS)
+    ]
+
     def load(self, game: Game):
         super().load(game)
-        self.start_button_sprite = Sprite("./sprites/placeholder_start_button.png")
-        self.start_button = Object2D(self.start_button_sprite, self.game.camera, Vec2(self.game.camera.view_width/2, self.game.camera.view_height/2), scale=Vec2(100,100))
-        self.game.window.add_object2d(self.start_button)
-
-        self.fullscreen_button_sprite = Sprite("./sprites/placeholder_fullscreen_button.png")
-        self.fullscreen_button = Object2D(self.fullscreen_button_sprite, self.game.camera, Vec2(self.game.camera.view_width/2, self.game.camera.view_height/2 - 100), scale=Vec2(100,100))
-        self.game.window.add_object2d(self.fullscreen_button)
+        # A game made without scenes= still finds the intro, imported on first use as usual.
+        if "intro" not in game.scenes:
+            game.scenes.register("intro", SCENES["intro"])
+        self.intro_scene:Scene | None = None
+        self.shown = False
+        self.ui = self.load_sprite_batch(MENU_ATLAS)
+        self.start_button = self.ui.add("./sprites/placeholder_start_button.png", Vec2(self.game.camera.view_width/2, self.game.camera.view_height/2), Vec2(100,100))
+        self.fullscreen_button = self.ui.add("./sprites/placeholder_fullscreen_button.png", Vec2(self.game.camera.view_width/2, self.game.camera.view_height/2 - 100), Vec2(100,100))
 
     def unload(self):
-        self.game.window.remove_object2d(self.start_button)
-        self.game.window.remove_object2d(self.fullscreen_button)
+        super().unload()
+        self.ui.clear()
 
     
     def update(self):
-        mouse = self.game.window.event.mouse
-        
-        if is_clicking_sprite(self.start_button, mouse):
-                self.game.current_scene = SceneIntro()
+        input = self.game.input
+        if self.shown:
+            # From the second frame on, so the intro doesn't hold up the menu appearing.
+            self.intro()
 
-        if is_clicking_sprite(self.fullscreen_button, mouse):
+        if is_clicking_sprite(self.start_button, input):
+                self.game.switch_to(self.intro())
+
+        if is_clicking_sprite(self.fullscreen_button, input):
                 self.game.window.fullscreen = not self.game.window.fullscreen
 
-        self.game.window.update()
-        
-    
-    def start(self):
-        pass
\ No newline at end of file
+        self.ui.flush()
+        with self.game.profiler.scope("window.update"):
+            self.game.window.update()
+        self.shown = True
+
+    def intro(self) -> Scene:
+        # Imports the intro and fetches it while the menu is up so pressing start doesn't stall.
+        if self.intro_scene is None:
+            self.intro_scene = self.game.scenes.create("intro")
+            self.game.preload_scene(self.intro_scene)
+        return self.intro_scene
\ No newline at end of file
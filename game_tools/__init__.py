@@ -1,23 +1,64 @@
-from Loxoc import Camera, Window, EVENT_FLAG, Vec3, Font
+import os
+# With GAME_HEADLESS set the game runs without a window or OpenGL, see game_tools/headless.py.
+HEADLESS = bool(os.environ.get("GAME_HEADLESS"))
+if HEADLESS:
+    from game_tools import headless
+    headless.install()
+from Loxoc import Camera, Window, EVENT_FLAG, MOUSE_BUTTON, Vec3
 import math
-from game_tools.scene import Scene
+from game_tools.scene import Scene, SceneRegistry
+from game_tools.assets import AssetCache, FontTable
+from game_tools.bake import AssetBake
+from game_tools.loader import SceneLoader, PreloadJob, AssetRequest
+from game_tools.profiler import Profiler, ProfilerOverlay
+from game_tools.input import InputMap, InputState
+from typing import Callable
 
 class Game:
-    def __init__(self, first_scene:Scene, dimensions:tuple[int, int] = (1280, 720), title:str = "PyWeek 38") -> None:
+    def __init__(self, first_scene:Scene | str, dimensions:tuple[int, int] = (1280, 720), title:str = "PyWeek 38", asset_budget:int = 256 * 1024 * 1024, preload_workers:int = 4, preload_frame_budget:float = 0.004, tick_rate:float | None = None, max_catchup_steps:int = 5, profile:bool = False, bindings:dict[str, tuple[EVENT_FLAG | MOUSE_BUTTON, ...]] | None = None, scenes:dict[str, str | type[Scene]] | None = None, asset_bake:str | None = ".asset_cache") -> None:
         # Create all assets
         self.dimensions = dimensions
         self.camera:Camera = Camera(Vec3(0.0, 0.0, 0.0), Vec3(0.0,0.0,0.0), *self.dimensions, 10000, math.radians(60))
         self.window:Window = Window(title, self.camera, *self.dimensions, False, Vec3(1, 1, 1))
-        self._current_scene:Scene = first_scene
+        # Scenes can be passed by their name in scenes, see SceneRegistry.
+        self.scenes:SceneRegistry = SceneRegistry(scenes)
+        self._current_scene:Scene = self.scenes.resolve(first_scene)
+        # Assets are shared between scenes and stay resident after a scene unloads until evicted.
+        # Models and textures are loaded from their baked copies in asset_bake once baked, see
+        # game_tools/bake.py.  None loads every asset from its source.
+        self.assets:AssetCache = AssetCache(asset_budget, AssetBake(asset_bake) if asset_bake else None)
+        # Packed sprite atlases and their layouts, see game_tools/atlas.py.
+        self.atlas_directory = os.path.join(asset_bake if asset_bake else ".asset_cache", "atlas")
+        # Reads the files of upcoming scenes on worker threads while the current scene keeps running.
+        self.loader:SceneLoader = SceneLoader(self.assets, preload_workers, preload_frame_budget, self.atlas_directory)
+        self.next_scene:Scene | None = None
+        # With a tick rate Scene.fixed_update runs at a fixed timestep, otherwise once per frame.
+        self.tick_rate = tick_rate
+        self.max_catchup_steps = max_catchup_steps
+        self.accumulator = 0.0
+        # How far the render is between the previous and the latest tick, for interpolating transforms.
+        self.alpha = 1.0
+        self.sim_dt = 0.0
+        self.dropped_ticks = 0
         self.globals:dict[str, any] = {
             "mouse_sensitivity_x": 50,
             "mouse_sensitivity_y": 50,
             "gravity": 60.7,
-            "fonts": {
-                "font_sofadi_one": Font("./fonts/Sofadi_One/SofadiOne-Regular.ttf")
-            }
+            # Loaded on first use.
+            "fonts": FontTable(self.assets, {
+                "font_sofadi_one": ("./fonts/Sofadi_One/SofadiOne-Regular.ttf", 48)
+            })
         }
         self.quit_game:bool = False
+        # Keys and mouse buttons are read once at the start of each frame into self.input.
+        self.input_map:InputMap = InputMap(bindings)
+        self.input:InputState = self.input_map.state
+        self.input_map.require(self._current_scene.actions, type(self._current_scene).__name__)
+        # Scenes wrap their phases in self.profiler.scope(name), which costs next to nothing while disabled.
+        self.profiler:Profiler = Profiler(enabled=profile)
+        self.profiler_overlay:ProfilerOverlay = ProfilerOverlay(self)
+        if profile:
+            self.profiler_overlay.show()
         
 
     @property
@@ -25,12 +66,39 @@ class Game:
         return self._current_scene
     
     @current_scene.setter
-    def current_scene(self, scene:Scene) -> Scene:
+    def current_scene(self, scene:Scene | str) -> Scene:
+        scene = self.scenes.resolve(scene)
         self._current_scene.unload()
         self._current_scene = scene
         self._current_scene.load(self)
+        job = self.loader.job_for(scene)
+        if job:
+            # The scene now borrows everything the preload was holding on to.
+            self.loader.release(job)
         self._current_scene.start()
 
+    def preload_scene(self, scene:Scene | str, on_progress:Callable[[float], None] | None = None) -> PreloadJob:
+        # Starts fetching the assets in scene.manifest in the background.
+        return self.loader.preload(self.scenes.resolve(scene), on_progress)
+
+    def switch_to(self, scene:Scene | str, on_progress:Callable[[float], None] | None = None):
+        # Switches scenes once the scene's assets are resident, keeping the current scene running until then.
+        scene = self.scenes.resolve(scene)
+        job = self.loader.preload(scene, on_progress)
+        self.next_scene = scene
+        if job.done:
+            self.next_scene = None
+            self.current_scene = scene
+
+    @property
+    def fixed_dt(self) -> float | None:
+        return 1.0 / self.tick_rate if self.tick_rate else None
+
+    @property
+    def dt(self) -> float:
+        # The timestep simulation code should integrate with.
+        return self.sim_dt
+
     def init_load(self):
         # This is where we load in all of our 3D assets along with our first scene.
         self.current_scene.load(self)
@@ -42,6 +110,37 @@ class Game:
             self.update()
             if self.quit_game:
                 break
+        self.loader.shutdown()
 
     def update(self):
-        self.current_scene.update()
+        profiler = self.profiler
+        profiler.begin_frame()
+        self.input = self.input_map.poll(self.window.event)
+        with profiler.scope("loader"):
+            self.loader.pump()
+        if self.next_scene and self.loader.job_for(self.next_scene).done:
+            scene, self.next_scene = self.next_scene, None
+            self.current_scene = scene
+        with profiler.scope("fixed_update"):
+            fixed_dt = self.fixed_dt
+            if fixed_dt is None:
+                self.sim_dt = self.window.dt
+                self.current_scene.fixed_update()
+                self.alpha = 1.0
+            else:
+                self.sim_dt = fixed_dt
+                self.accumulator += self.window.dt
+                steps = 0
+                while self.accumulator >= fixed_dt and steps < self.max_catchup_steps:
+                    self.current_scene.fixed_update()
+                    self.accumulator -= fixed_dt
+                    steps += 1
+                if self.accumulator >= fixed_dt:
+                    # Too far behind, drop the backlog rather than spiral.
+                    self.dropped_ticks += int(self.accumulator / fixed_dt)
+                    self.accumulator %= fixed_dt
+                self.alpha = self.accumulator / fixed_dt
+        self.profiler_overlay.update()
+        with profiler.scope("update"):
+            self.current_scene.update()
+        profiler.end_frame()
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+from Loxoc import Vec3, Object3D, Window, PointLight
+
+from typing import Callable
+import math
+
+# Activation levels, each with its own radius around the player.
+SIMULATE = 0
+ANIMATE = 1
+RENDER = 2
+LEVELS = (SIMULATE, ANIMATE, RENDER)
+
+def render_object(window:Window, obj:Object3D) -> Callable[[bool], None]:
+    # A RENDER callback adding the object to the window and removing it again.
+    def render(active:bool):
+        if active:
+            window.add_object(obj)
+        else:
+            window.remove_object(obj)
+    return render
+
+def render_light(window:Window, light:PointLight) -> Callable[[bool], None]:
+    def render(active:bool):
+        if active:
+            window.add_point_light(light)
+        else:
+            window.remove_point_light(light)
+    return render
+
+class Activation:
+    __slots__ = ("target", "object", "x", "z", "y", "radii", "active", "cell", "callbacks")
+
+    def __init__(self, target:any, radii:tuple[float, float, float], callbacks:tuple[Callable[[bool], None] | None, ...]) -> None:
+        self.target = target
+        # Set for entries that follow an Object3D.
+        self.object:Object3D | None = None
+        self.x = 0.0
+        self.y = 0.0
+        self.z = 0.0
+        self.radii = radii
+        self.active = [True, True, True]
+        self.cell:tuple[int, int] | None = None
+        self.callbacks = callbacks
+
+class ActivationGrid:
+    # Interest management around the player.  Every entry has a radius per level (simulate,
+    # animate, render), and is active at a level while the player is inside its radius.
+    # Entries are bucketed on the ground plane in cells of cell_size, so an update only
+    # measures the entries in the cells the largest radius can reach and the ones that
+    # were active before, not the whole world.  A level switches on once the player is
+    # within its radius and off only once the player is hysteresis further out, so walking
+    # along the edge doesn't flip it every update.  Each switch calls the entry's callback
+    # for that level with the new state, entries start out active at every level like
+    # objects that were just added to the window.
+    def __init__(self, cell_size:float = 32.0, radii:tuple[float, float, float] = (60.0, 90.0, 120.0), hysteresis:float = 8.0) -> None:
+        self.cell_size = cell_size
+        self.inv_cell_size = 1.0 / cell_size
+        self.radii = radii
+        self.hysteresis = hysteresis
+        self.cells:dict[tuple[int, int], list[Activation]] = {}
+        self.entries:dict[int, Activation] = {}
+        self.tracked:list[Activation] = []
+        # Entries active at any level, measured every update until they are off at all of them.
+        self.near:set[Activation] = set()
+        self.reach = max(radii)
+        # Level switches and entries measured by the last update.
+        self.switches = 0
+        self.measured = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, target:any) -> bool:
+        return id(target) in self.entries
+
+    def _cell(self, x:float, z:float) -> tuple[int, int]:
+        inv = self.inv_cell_size
+        return math.floor(x * inv), math.floor(z * inv)
+
+    def _bucket(self, entry:Activation):
+        cell = self._cell(entry.x, entry.z)
+        if cell == entry.cell:
+            return
+        if entry.cell is not None:
+            self.cells[entry.cell].remove(entry)
+        entry.cell = cell
+        bucket = self.cells.get(cell)
+        if bucket is None:
+            bucket = self.cells[cell] = []
+        bucket.append(entry)
+
+    def _place(self, entry:Activation, position:Vec3):
+        entry.x = position.x
+        entry.y = position.y
+        entry.z = position.z
+        self._bucket(entry)
+
+    def add(self, target:any, position:Vec3, radii:tuple[float, float, float] | None = None, simulate:Callable[[bool], None] | None = None, animate:Callable[[bool], None] | None = None, render:Callable[[bool], None] | None = None) -> Activation:
+        # A static entry, call moved if it is moved anyway.
+        if id(target) in self.entries:
+            raise ValueError(f"{target!r} is already in the activation grid.")
+        entry = Activation(target, radii if radii else self.radii, (simulate, animate, render))
+        self.entries[id(target)] = entry
+        self._place(entry, position)
+        self.near.add(entry)
+        if radii:
+            self.reach = max(self.reach, max(radii))
+        return entry
+
+    def track(self, target:any, obj:Object3D, radii:tuple[float, float, float] | None = None, simulate:Callable[[bool], None] | None = None, animate:Callable[[bool], None] | None = None, render:Callable[[bool], None] | None = None) -> Activation:
+        # An entry following obj, whose position is re-read every update.
+        entry = self.add(target, obj.position, radii, simulate, animate, render)
+        entry.object = obj
+        self.tracked.append(entry)
+        return entry
+
+    def remove(self, target:any):
+        entry = self.entries.pop(id(target))
+        self.cells[entry.cell].remove(entry)
+        self.near.discard(entry)
+        if entry.object is not None:
+            self.tracked.remove(entry)
+
+    def moved(self, target:any, position:Vec3):
+        self._place(self.entries[id(target)], position)
+
+    def active(self, target:any, level:int) -> bool:
+        return self.entries[id(target)].active[level]
+
+    def _set(self, entry:Activation, level:int, active:bool):
+        entry.active[level] = active
+        self.switches += 1
+        callback = entry.callbacks[level]
+        if callback is not None:
+            callback(active)
+
+    def _measure(self, entry:Activation, x:float, y:float, z:float):
+        dx = entry.x - x
+        dy = entry.y - y
+        dz = entry.z - z
+        distance = dx * dx + dy * dy + dz * dz
+        hysteresis = self.hysteresis
+        active = entry.active
+        radii = entry.radii
+        for level in LEVELS:
+            radius = radii[level]
+            if active[level]:
+                outer = radius + hysteresis
+                if distance > outer * outer:
+                    self._set(entry, level, False)
+            elif distance <= radius * radius:
+                self._set(entry, level, True)
+
+    def update(self, position:Vec3) -> int:
+        # Switches levels for where the player is now, returns how many switched.
+        self.switches = 0
+        for entry in self.tracked:
+            self._place(entry, entry.object.position)
+        x, y, z = position.x, position.y, position.z
+        # Cells any radius can reach, the hysteresis band of active entries too.
+        reach = self.reach + self.hysteresis
+        cx0, cz0 = self._cell(x - reach, z - reach)
+        cx1, cz1 = self._cell(x + reach, z + reach)
+        measured = set()
+        cells = self.cells
+        for cx in range(cx0, cx1 + 1):
+            for cz in range(cz0, cz1 + 1):
+                bucket = cells.get((cx, cz))
+                if bucket:
+                    measured.update(bucket)
+        # Active entries outside those cells are out of every radius.
+        measured |= self.near
+        near = set()
+        for entry in measured:
+            self._measure(entry, x, y, z)
+            active = entry.active
+            if active[0] or active[1] or active[2]:
+                near.add(entry)
+        self.near = near
+        self.measured = len(measured)
+        return self.switches
+
+    def activate_all(self):
+        # Switches every entry back on, e.g. before a scene removes its objects on unload.
+        for entry in self.entries.values():
+            for level in LEVELS:
+                if not entry.active[level]:
+                    self._set(entry, level, True)
+            self.near.add(entry)
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+from Loxoc import (Model, Texture, Sprite, Shader, ShaderType, Font, TextureFiltering, TextureWraping)
+
+from game_tools.bake import AssetBake
+
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Callable, Hashable, Iterator
+import threading
+import struct
+import os
+
+AssetKey = tuple[Hashable, ...]
+
+def _image_size(path:str) -> tuple[int, int] | None:
+    # Reads the dimensions out of a PNG, JPEG or TGA header without decoding the image.
+    try:
+        with open(path, "rb") as f:
+            head = f.read(24)
+            if head[:8] == b"\x89PNG\r\n\x1a\n":
+                return struct.unpack(">II", head[16:24])
+            if path.lower().endswith(".tga"):
+                return struct.unpack("<HH", head[12:16])
+            if head[:2] == b"\xff\xd8":
+                f.seek(2)
+                while True:
+                    marker = f.read(2)
+                    if len(marker) < 2 or marker[0] != 0xff:
+                        return None
+                    length = struct.unpack(">H", f.read(2))[0]
+                    # SOF0 - SOF15 except DHT, JPG and DAC
+                    if 0xc0 <= marker[1] <= 0xcf and marker[1] not in (0xc4, 0xc8, 0xcc):
+                        height, width = struct.unpack(">xHH", f.read(5))
+                        return width, height
+                    f.seek(length - 2, os.SEEK_CUR)
+    except (OSError, struct.error):
+        return None
+    return None
+
+def estimate_size(path:str, kind:str) -> int:
+    # Approximate resident cost of an asset in bytes.  Textures are counted as
+    # uncompressed RGBA, everything else by the size of its source file.
+    if kind == "texture":
+        dims = _image_size(path)
+        if dims:
+            return dims[0] * dims[1] * 4
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+class AssetEntry:
+    def __init__(self, key:AssetKey, asset:any, size:int, dependencies:list[AssetKey] | None = None) -> None:
+        self.key = key
+        self.asset = asset
+        self.size = size
+        self.refcount = 0
+        self.dependencies:list[AssetKey] = dependencies if dependencies else []
+
+class AssetCache:
+    def __init__(self, budget:int = 256 * 1024 * 1024, bake:AssetBake | None = None) -> None:
+        # budget is in bytes and only limits assets that nothing is borrowing.
+        self.budget = budget
+        # Models and textures with a fresh baked copy are loaded from that, keys stay the source path.
+        self.bake = bake
+        self.entries:dict[AssetKey, AssetEntry] = {}
+        # unreferenced entries in least to most recently used order
+        self.idle:OrderedDict[AssetKey, AssetEntry] = OrderedDict()
+        self.resident_size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.RLock()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "resident": len(self.entries),
+            "idle": len(self.idle),
+            "resident_size": self.resident_size,
+            "budget": self.budget
+        }
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key:AssetKey) -> bool:
+        return key in self.entries
+
+    def acquire(self, key:AssetKey, loader:Callable[[], any], size:int = 0, dependencies:list[AssetKey] | None = None) -> any:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry:
+                self.hits += 1
+            else:
+                self.misses += 1
+                entry = AssetEntry(key, loader(), size, dependencies)
+                self.entries[key] = entry
+                self.resident_size += entry.size
+            if entry.refcount == 0:
+                self.idle.pop(key, None)
+            entry.refcount += 1
+            return entry.asset
+
+    def release(self, key:AssetKey):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry.refcount == 0:
+                raise KeyError(f"Asset {key} is not borrowed.")
+            entry.refcount -= 1
+            if entry.refcount == 0:
+                self.idle[key] = entry
+                self.trim()
+
+    def trim(self, budget:int | None = None):
+        budget = self.budget if budget is None else budget
+        with self.lock:
+            while self.idle and self.resident_size > budget:
+                _, entry = self.idle.popitem(last=False)
+                self._evict(entry)
+
+    def clear(self):
+        # Drops every idle asset regardless of the budget.
+        self.trim(0)
+
+    def _evict(self, entry:AssetEntry):
+        del self.entries[entry.key]
+        self.resident_size -= entry.size
+        self.evictions += 1
+        for dependency in entry.dependencies:
+            self.release(dependency)
+
+    # Loaders
+
+    @staticmethod
+    def model_key(path:str, animated:bool = False) -> AssetKey:
+        return ("model", os.path.abspath(path), animated)
+
+    @staticmethod
+    def texture_key(path:str, wrap:TextureWraping = TextureWraping.REPEAT, filtering:TextureFiltering = TextureFiltering.LINEAR) -> AssetKey:
+        return ("texture", os.path.abspath(path), wrap, filtering)
+
+    @staticmethod
+    def sprite_key(path:str, wrap:TextureWraping = TextureWraping.REPEAT, filtering:TextureFiltering = TextureFiltering.LINEAR) -> AssetKey:
+        return ("sprite", os.path.abspath(path), wrap, filtering)
+
+    @staticmethod
+    def shader_key(path:str, shader_type:ShaderType) -> AssetKey:
+        return ("shader", os.path.abspath(path), shader_type)
+
+    @staticmethod
+    def font_key(path:str, font_size:int = 48) -> AssetKey:
+        return ("font", os.path.abspath(path), font_size)
+
+    def baked(self, path:str) -> str:
+        # Never bakes here, a missing bake is made by the loader's workers or the bake command.
+        return self.bake.resolve(path) if self.bake else path
+
+    def model(self, path:str, animated:bool = False) -> Model:
+        return self.acquire(self.model_key(path, animated), lambda: Model.from_file(self.baked(path), animated), estimate_size(path, "model"))
+
+    def texture(self, path:str, wrap:TextureWraping = TextureWraping.REPEAT, filtering:TextureFiltering = TextureFiltering.LINEAR) -> Texture:
+        return self.acquire(self.texture_key(path, wrap, filtering), lambda: Texture.from_file(self.baked(path), wrap, filtering), estimate_size(path, "texture"))
+
+    def sprite(self, path:str, wrap:TextureWraping = TextureWraping.REPEAT, filtering:TextureFiltering = TextureFiltering.LINEAR) -> Sprite:
+        # A sprite keeps its texture borrowed for as long as the sprite is resident.
+        key = self.sprite_key(path, wrap, filtering)
+        with self.lock:
+            if key in self.entries:
+                return self.acquire(key, None)
+            texture = self.texture(path, wrap, filtering)
+            return self.acquire(key, lambda: Sprite.from_texture(texture), 0, [self.texture_key(path, wrap, filtering)])
+
+    def shader(self, path:str, shader_type:ShaderType) -> Shader:
+        return self.acquire(self.shader_key(path, shader_type), lambda: Shader.from_file(path, shader_type), estimate_size(path, "shader"))
+
+    def font(self, path:str, font_size:int = 48) -> Font:
+        return self.acquire(self.font_key(path, font_size), lambda: Font(path, font_size), estimate_size(path, "font"))
+
+class FontTable(Mapping):
+    # Fonts by name for Game.globals["fonts"].  Each is loaded through the cache, and kept
+    # borrowed, the first time it is looked up, so fonts nothing draws with cost nothing.
+    def __init__(self, assets:AssetCache, fonts:dict[str, tuple[str, int]] | None = None) -> None:
+        self.assets = assets
+        self.fonts:dict[str, tuple[str, int]] = dict(fonts) if fonts else {}
+        self.loaded:dict[str, Font] = {}
+
+    def add(self, name:str, path:str, font_size:int = 48):
+        self.fonts[name] = (path, font_size)
+
+    def __getitem__(self, name:str) -> Font:
+        font = self.loaded.get(name)
+        if font is None:
+            path, font_size = self.fonts[name]
+            font = self.loaded[name] = self.assets.font(path, font_size)
+        return font
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.fonts)
+
+    def __len__(self) -> int:
+        return len(self.fonts)
@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+from Loxoc import Vec2, Sprite, Object2D, Camera, Window, Material, Shader, ShaderType
+
+from game_tools.bake import file_hash, decode_image, encode_tga
+
+import threading
+import json
+import math
+import os
+
+# Bumped whenever the layout or page format changes, older atlases are packed again.
+ATLAS_VERSION = 1
+
+# Loxoc's default 2D shaders, except the quad's texture coordinates are mapped into the
+# sprite's region of the atlas page.  Loxoc 1.0.0.dev44 can't set uniforms from Python
+# (set_uniform raises a TypeError for any name), so the region is written into the
+# vertex shader, see region_vertex_shader.
+ATLAS_VERTEX_SHADER = """#version 330 core
+
+layout (location = 0) in vec3 aPos;
+layout (location = 1) in vec2 aTexCoord;
+
+uniform mat4 transform2D;
+
+uniform mat4 projection;
+
+// The region's corner then its size, in the page's texture coordinates.
+const vec4 region = vec4({u:.9f}, {v:.9f}, {width:.9f}, {height:.9f});
+
+out vec2 TexCoord;
+
+void main() {{
+	gl_Position = projection * transform2D * vec4(aPos, 1.0f);
+	TexCoord = region.xy + aTexCoord * region.zw;
+}}
+"""
+
+ATLAS_FRAGMENT_SHADER = """#version 330 core
+
+uniform sampler2D sprite;
+
+in vec2 TexCoord;
+
+out vec4 FragColor;
+
+void main() {
+	vec4 tex_color = texture(sprite, TexCoord);
+	if (tex_color.a == 0)
+        discard;
+	FragColor = tex_color;
+}
+"""
+
+def sprite_size(width:int, height:int) -> tuple[float, float]:
+    # Loxoc sizes an Object2D's quad by its texture's aspect ratio alone, 2 * (w, h) / |(w, h)|,
+    # before scale.
+    length = math.hypot(width, height)
+    return 2.0 * width / length, 2.0 * height / length
+
+def region_vertex_shader(uv:tuple[float, float, float, float]) -> str:
+    u, v, width, height = uv
+    return ATLAS_VERTEX_SHADER.format(u=u, v=v, width=width, height=height)
+
+def _power_of_two(value:int) -> int:
+    return 1 << max(value - 1, 0).bit_length()
+
+def pack(sizes:list[tuple[int, int]], max_size:int = 1024, padding:int = 2) -> tuple[list[tuple[int, int, int]], list[tuple[int, int]]]:
+    # Shelf packing, tallest first.  Returns the (page, x, y) of every size in order and the
+    # (width, height) of every page.  padding is kept free around each rectangle.
+    for width, height in sizes:
+        if width + 2 * padding > max_size or height + 2 * padding > max_size:
+            raise ValueError(f"A {width}x{height} sprite doesn't fit a {max_size}x{max_size} atlas page.")
+    area = sum((width + 2 * padding) * (height + 2 * padding) for width, height in sizes)
+    widest = max((width + 2 * padding for width, _ in sizes), default=1)
+    page_width = min(max_size, _power_of_two(max(widest, int(area ** 0.5))))
+    placed:list[tuple[int, int, int]] = [(0, 0, 0)] * len(sizes)
+    pages:list[tuple[int, int]] = []
+    page = x = y = shelf = 0
+    for i in sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0])):
+        width, height = sizes[i][0] + 2 * padding, sizes[i][1] + 2 * padding
+        if x + width > page_width:
+            x, y, shelf = 0, y + shelf, 0
+        if y + height > max_size:
+            pages.append((page_width, _power_of_two(y)))
+            page, x, y, shelf = page + 1, 0, 0, 0
+        placed[i] = (page, x + padding, y + padding)
+        x += width
+        shelf = max(shelf, height)
+    pages.append((page_width, _power_of_two(y + shelf)))
+    return placed, pages
+
+class AtlasRegion:
+    __slots__ = ("page", "x", "y", "width", "height", "uv", "scale")
+
+    def __init__(self, page:int, x:int, y:int, width:int, height:int, page_width:int, page_height:int) -> None:
+        self.page = page
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        # The region constant of ATLAS_VERTEX_SHADER.
+        self.uv = (x / page_width, y / page_height, width / page_width, height / page_height)
+        # A quad of the page is sized for the page's aspect ratio (see sprite_size), one
+        # showing the region is scaled by this to come out the size of the sprite on its own.
+        sprite_width, sprite_height = sprite_size(width, height)
+        page_quad_width, page_quad_height = sprite_size(page_width, page_height)
+        self.scale = Vec2(sprite_width / page_quad_width, sprite_height / page_quad_height)
+
+class SpriteAtlas:
+    # Sprites packed into as few textures (pages) as fit in max_size, see SpriteBatch.  The
+    # pages and the layout are kept in a directory, load only packs them again when the
+    # sources changed (by mtime and size, or by hash once either did).  Sprites that can't
+    # be decoded, JPEGs without Pillow, are left out and listed in skipped.
+    def __init__(self, name:str, sources:list[str], max_size:int = 1024, padding:int = 2) -> None:
+        self.name = name
+        self.sources = [os.path.normpath(path) for path in sources]
+        self.max_size = max_size
+        self.padding = padding
+        self.directory:str | None = None
+        self.pages:list[str] = []
+        self.regions:dict[str, AtlasRegion] = {}
+        self.skipped:list[str] = []
+        # Times load packed the sprites rather than reusing the layout.
+        self.builds = 0
+        # Loader workers load atlases too, see AssetRequest.atlas.
+        self._lock = threading.Lock()
+
+    def __contains__(self, path:str) -> bool:
+        return os.path.normpath(path) in self.regions
+
+    def region(self, path:str) -> AtlasRegion:
+        return self.regions[os.path.normpath(path)]
+
+    def layout_path(self, directory:str) -> str:
+        return os.path.join(directory, f"{self.name}.json")
+
+    def load(self, directory:str = ".asset_cache/atlas") -> SpriteAtlas:
+        with self._lock:
+            layout = self._fresh_layout(directory)
+            if layout is None:
+                layout = self.build(directory)
+            self._use(directory, layout)
+        return self
+
+    def _fresh_layout(self, directory:str) -> dict[str, any] | None:
+        try:
+            with open(self.layout_path(directory), "r") as f:
+                layout = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (layout.get("version"), layout.get("max_size"), layout.get("padding")) != (ATLAS_VERSION, self.max_size, self.padding):
+            return None
+        if [source["path"] for source in layout["sources"]] != self.sources:
+            return None
+        changed = False
+        try:
+            for source in layout["sources"]:
+                stat = os.stat(source["path"])
+                if stat.st_mtime_ns == source["mtime"] and stat.st_size == source["size"]:
+                    continue
+                if file_hash(source["path"]) != source["hash"]:
+                    return None
+                source["mtime"], source["size"] = stat.st_mtime_ns, stat.st_size
+                changed = True
+            if not all(os.path.exists(os.path.join(directory, page["file"])) for page in layout["pages"]):
+                return None
+        except OSError:
+            return None
+        if changed:
+            self._save(directory, layout)
+        return layout
+
+    def build(self, directory:str) -> dict[str, any]:
+        import numpy as np
+        images = {}
+        skipped = []
+        for path in self.sources:
+            pixels = decode_image(path)
+            if pixels is None:
+                skipped.append(path)
+            else:
+                images[path] = pixels
+        names = list(images)
+        placed, sizes = pack([(images[name].shape[1], images[name].shape[0]) for name in names], self.max_size, self.padding)
+        pages = [np.zeros((height, width, 4), np.uint8) for width, height in sizes]
+        regions = {}
+        padding = self.padding
+        for name, (page, x, y) in zip(names, placed):
+            pixels = images[name]
+            height, width = pixels.shape[:2]
+            # The edge pixels are repeated into the padding so filtering never reads a neighbour.
+            pages[page][y - padding:y + height + padding, x - padding:x + width + padding] = np.pad(pixels, ((padding, padding), (padding, padding), (0, 0)), mode="edge")
+            regions[name] = [page, x, y, width, height]
+        os.makedirs(directory, exist_ok=True)
+        files = []
+        for i, pixels in enumerate(pages):
+            file = f"{self.name}_{i}.tga"
+            with open(os.path.join(directory, file), "wb") as f:
+                f.write(encode_tga(pixels))
+            files.append({"file": file, "width": pixels.shape[1], "height": pixels.shape[0]})
+        sources = []
+        for path in self.sources:
+            stat = os.stat(path)
+            sources.append({"path": path, "mtime": stat.st_mtime_ns, "size": stat.st_size, "hash": file_hash(path)})
+        layout = {
+            "version": ATLAS_VERSION, "max_size": self.max_size, "padding": self.padding,
+            "sources": sources, "pages": files, "regions": regions, "skipped": skipped
+        }
+        self._save(directory, layout)
+        self.builds += 1
+        return layout
+
+    def _use(self, directory:str, layout:dict[str, any]):
+        pages = layout["pages"]
+        self.pages = [os.path.join(directory, page["file"]) for page in pages]
+        self.regions = {
+            name: AtlasRegion(page, x, y, width, height, pages[page]["width"], pages[page]["height"])
+            for name, (page, x, y, width, height) in layout["regions"].items()
+        }
+        self.skipped = layout["skipped"]
+        # Last, so a loaded directory means the pages and regions above are there.
+        self.directory = directory
+
+    def _save(self, directory:str, layout:dict[str, any]):
+        path = self.layout_path(directory)
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(layout, f, indent=1)
+        os.replace(temporary, path)
+
+class SpriteBatch:
+    # Object2Ds showing sprites of a SpriteAtlas.  They all share the sprites of the atlas
+    # pages, and every quad of a sprite shares that sprite's material, so more UI adds no
+    # textures or shader programs.  Showing and hiding is queued and handed to the window
+    # by flush, once a frame, in at most one add_object2d_list and one remove_object2d_list
+    # call however many quads changed.
+    def __init__(self, window:Window, camera:Camera, atlas:SpriteAtlas, pages:list[Sprite]) -> None:
+        self.window = window
+        self.camera = camera
+        self.atlas = atlas
+        self.pages = pages
+        self.fragment_shader = Shader(ATLAS_FRAGMENT_SHADER, ShaderType.FRAGMENT)
+        # Materials by sprite, made the first time the sprite is added.
+        self.materials:dict[str, Material] = {}
+        self.objects:dict[int, Object2D] = {}
+        # In the window as of the last flush, and the changes queued since.
+        self.visible:dict[int, Object2D] = {}
+        self.adding:dict[int, Object2D] = {}
+        self.removing:dict[int, Object2D] = {}
+        # Calls made to the window.
+        self.submissions = 0
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def material(self, path:str) -> Material:
+        path = os.path.normpath(path)
+        material = self.materials.get(path)
+        if material is None:
+            vertex = Shader(region_vertex_shader(self.atlas.region(path).uv), ShaderType.VERTEX)
+            material = self.materials[path] = Material(vertex, self.fragment_shader)
+        return material
+
+    def add(self, path:str, position:Vec2 | None = None, scale:Vec2 | None = None, depth:float = 0.0, rotation:float = 0.0, show:bool = True) -> Object2D:
+        # scale is what it would be for an Object2D of the sprite on its own.
+        region = self.atlas.region(path)
+        scale = scale if scale else Vec2(1.0, 1.0)
+        obj = Object2D(
+            self.pages[region.page], self.camera, position if position else Vec2(0.0, 0.0), depth, rotation,
+            Vec2(scale.x * region.scale.x, scale.y * region.scale.y), self.material(path)
+        )
+        self.objects[id(obj)] = obj
+        if show:
+            self.show(obj)
+        return obj
+
+    def remove(self, obj:Object2D):
+        self.hide(obj)
+        del self.objects[id(obj)]
+
+    def shown(self, obj:Object2D) -> bool:
+        key = id(obj)
+        return key in self.adding or (key in self.visible and key not in self.removing)
+
+    def show(self, obj:Object2D):
+        key = id(obj)
+        if self.removing.pop(key, None) is None and key not in self.visible:
+            self.adding[key] = obj
+
+    def hide(self, obj:Object2D):
+        key = id(obj)
+        if self.adding.pop(key, None) is None and key in self.visible:
+            self.removing[key] = obj
+
+    def flush(self):
+        if self.removing:
+            self.window.remove_object2d_list(list(self.removing.values()))
+            for key in self.removing:
+                del self.visible[key]
+            self.removing.clear()
+            self.submissions += 1
+        if self.adding:
+            self.window.add_object2d_list(list(self.adding.values()))
+            self.visible.update(self.adding)
+            self.adding.clear()
+            self.submissions += 1
+
+    def clear(self):
+        # Takes every quad out of the window straight away, e.g. when the scene unloads.
+        self.adding.clear()
+        self.removing = dict(self.visible)
+        self.flush()
+        self.objects.clear()
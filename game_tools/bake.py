@@ -0,0 +1,385 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable, Iterator
+from contextlib import contextmanager
+import threading
+import struct
+import mmap
+import json
+import zlib
+import os
+
+# numpy, hashlib and the glTF helpers are imported where something is baked or hashed,
+# looking up fresh baked files at startup shouldn't pay for them.
+if TYPE_CHECKING:
+    import numpy as np
+
+# Bumped whenever the baked formats change, older entries are baked again.
+BAKE_VERSION = 1
+MODEL_EXTENSIONS = (".gltf",)
+TEXTURE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+MIME_TYPES = {".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg"}
+
+def file_hash(path:str) -> str:
+    import hashlib
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def map_file(path:str) -> mmap.mmap:
+    # Read only and shared with the OS file cache, nothing is copied until it is read.
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+# Models, a .gltf with its buffers and images becomes one binary .glb.
+
+def _read_uri(directory:str, uri:str) -> bytes:
+    from urllib.parse import unquote
+    if uri.startswith("data:"):
+        import base64
+        return base64.b64decode(uri.partition(",")[2])
+    with open(os.path.join(directory, unquote(uri)), "rb") as f:
+        return f.read()
+
+def bake_gltf(path:str) -> tuple[bytes, list[str]]:
+    # Returns the .glb and every file it was made from.  All buffers are packed into the one
+    # binary chunk, and external images are embedded as buffer views.
+    from urllib.parse import unquote
+    with open(path, "r") as f:
+        gltf = json.load(f)
+    directory = os.path.dirname(path)
+    sources = [path]
+    blob = bytearray()
+
+    def append(data:bytes) -> int:
+        offset = len(blob)
+        blob.extend(data)
+        blob.extend(b"\0" * (-len(blob) % 4))
+        return offset
+
+    offsets = []
+    for buffer in gltf.get("buffers", []):
+        uri = buffer.get("uri")
+        if uri and not uri.startswith("data:"):
+            sources.append(os.path.join(directory, unquote(uri)))
+        offsets.append(append(_read_uri(directory, uri)[:buffer["byteLength"]] if uri else b""))
+    views = gltf.get("bufferViews", [])
+    for view in views:
+        view["byteOffset"] = view.get("byteOffset", 0) + offsets[view["buffer"]]
+        view["buffer"] = 0
+    for image in gltf.get("images", []):
+        uri = image.pop("uri", None)
+        if uri is None:
+            continue
+        if not uri.startswith("data:"):
+            sources.append(os.path.join(directory, unquote(uri)))
+        data = _read_uri(directory, uri)
+        views.append({"buffer": 0, "byteOffset": append(data), "byteLength": len(data)})
+        image["bufferView"] = len(views) - 1
+        image.setdefault("mimeType", MIME_TYPES.get(os.path.splitext(uri)[1].lower(), "image/png"))
+    if views:
+        gltf["bufferViews"] = views
+    gltf["buffers"] = [{"byteLength": len(blob)}] if blob else []
+
+    content = json.dumps(gltf, separators=(",", ":")).encode()
+    content += b" " * (-len(content) % 4)
+    length = 12 + 8 + len(content) + (8 + len(blob) if blob else 0)
+    glb = bytearray(struct.pack("<4sII", b"glTF", 2, length))
+    glb += struct.pack("<I4s", len(content), b"JSON") + content
+    if blob:
+        glb += struct.pack("<I4s", len(blob), b"BIN\0") + blob
+    return bytes(glb), sources
+
+def read_glb(data:mmap.mmap | bytes) -> tuple[dict, memoryview]:
+    # The glTF json and a view of the binary chunk, the raw vertex and index arrays.
+    magic, version, length = struct.unpack_from("<4sII", data, 0)
+    if magic != b"glTF" or version != 2:
+        raise ValueError("Not a binary glTF 2.0 file.")
+    content_length, _ = struct.unpack_from("<I4s", data, 12)
+    gltf = json.loads(bytes(data[20:20 + content_length]))
+    offset = 20 + content_length
+    binary = memoryview(data)[offset + 8:offset + 8 + struct.unpack_from("<I", data, offset)[0]] if offset < length else memoryview(b"")
+    return gltf, binary
+
+# Textures, any image becomes an uncompressed 32 bit .tga: raw BGRA pixels, top row first,
+# behind an 18 byte header.
+
+def _unfilter(raw:bytes, width:int, height:int, bpp:int) -> bytearray:
+    import numpy as np
+    stride = width * bpp
+    out = bytearray(height * stride)
+    previous = bytes(stride)
+    pos = 0
+    for y in range(height):
+        kind = raw[pos]
+        line = bytearray(raw[pos + 1:pos + 1 + stride])
+        pos += stride + 1
+        if kind == 1:
+            line = bytearray((np.cumsum(np.frombuffer(line, np.uint8).reshape(-1, bpp), axis=0, dtype=np.uint32) & 0xFF).astype(np.uint8).tobytes())
+        elif kind == 2:
+            line = bytearray(((np.frombuffer(line, np.uint8).astype(np.uint16) + np.frombuffer(previous, np.uint8)) & 0xFF).astype(np.uint8).tobytes())
+        elif kind == 3:
+            for i in range(stride):
+                left = line[i - bpp] if i >= bpp else 0
+                line[i] = (line[i] + ((left + previous[i]) >> 1)) & 0xFF
+        elif kind == 4:
+            for i in range(stride):
+                a = line[i - bpp] if i >= bpp else 0
+                b = previous[i]
+                c = previous[i - bpp] if i >= bpp else 0
+                pa = abs(b - c)
+                pb = abs(a - c)
+                pc = abs(a + b - 2 * c)
+                line[i] = (line[i] + (a if pa <= pb and pa <= pc else b if pb <= pc else c)) & 0xFF
+        elif kind != 0:
+            raise ValueError(f"Unknown PNG filter {kind}.")
+        out[y * stride:(y + 1) * stride] = line
+        previous = line
+    return out
+
+def decode_png(data:bytes) -> np.ndarray:
+    # 8 bit, non interlaced PNGs as (height, width, 4) RGBA.  Anything else raises
+    # ValueError and is left to Pillow.
+    import numpy as np
+    if data[:8] != b"\x89PNG\r\n\x1a\n":
+        raise ValueError("Not a PNG file.")
+    pos = 8
+    idat = bytearray()
+    palette = transparency = None
+    while pos < len(data):
+        length, kind = struct.unpack_from(">I4s", data, pos)
+        chunk = data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if kind == b"IHDR":
+            width, height, depth, color, _, _, interlace = struct.unpack(">IIBBBBB", chunk)
+        elif kind == b"PLTE":
+            palette = np.frombuffer(chunk, np.uint8).reshape(-1, 3)
+        elif kind == b"tRNS":
+            transparency = np.frombuffer(chunk, np.uint8)
+        elif kind == b"IDAT":
+            idat += chunk
+        elif kind == b"IEND":
+            break
+    channels = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}.get(color)
+    if depth != 8 or interlace or channels is None or (transparency is not None and color != 3):
+        raise ValueError("Unsupported PNG layout.")
+    pixels = np.frombuffer(_unfilter(zlib.decompress(idat), width, height, channels), np.uint8).reshape(height, width, channels)
+    if color == 6:
+        return pixels
+    rgba = np.full((height, width, 4), 255, np.uint8)
+    if color == 3:
+        table = np.full((256, 4), 255, np.uint8)
+        table[:len(palette), :3] = palette
+        if transparency is not None:
+            table[:len(transparency), 3] = transparency
+        return table[pixels[..., 0]]
+    rgba[..., :3] = pixels[..., :1] if color in (0, 4) else pixels
+    if color == 4:
+        rgba[..., 3] = pixels[..., 1]
+    return rgba
+
+def decode_image(path:str) -> np.ndarray | None:
+    # (height, width, 4) RGBA, or None when neither the PNG decoder nor Pillow can read it.
+    if path.lower().endswith(".png"):
+        with open(path, "rb") as f:
+            data = f.read()
+        try:
+            return decode_png(data)
+        except ValueError:
+            pass
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    import numpy as np
+    with Image.open(path) as image:
+        return np.asarray(image.convert("RGBA"))
+
+def encode_tga(pixels:np.ndarray) -> bytes:
+    import numpy as np
+    height, width = pixels.shape[:2]
+    # Uncompressed true colour, 32 bits, 8 of them alpha, top left origin.
+    header = struct.pack("<BBBHHBHHHHBB", 0, 0, 2, 0, 0, 0, 0, 0, width, height, 32, 0x28)
+    return header + np.ascontiguousarray(pixels[..., [2, 1, 0, 3]]).tobytes()
+
+def read_tga(data:mmap.mmap | bytes) -> tuple[int, int, memoryview]:
+    # Width, height and a view of the BGRA pixels of a baked texture.
+    width, height, bits, descriptor = struct.unpack_from("<HHBB", data, 12)
+    if data[2] != 2 or bits != 32:
+        raise ValueError("Not an uncompressed 32 bit TGA file.")
+    start = 18 + data[0]
+    return width, height, memoryview(data)[start:start + width * height * 4]
+
+class AssetBake:
+    # Models and textures baked into files the engine loads with little parsing and no image
+    # decoding (see bake_gltf and encode_tga), kept in directory next to a manifest.  An entry
+    # is fresh while every file it was made from keeps its mtime and size, or still hashes
+    # the same after either changed.  Loxoc only loads assets from paths, so resolve hands
+    # the engine the baked file's path; map opens one for reading without copying.
+    def __init__(self, directory:str = ".asset_cache") -> None:
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        self.lock = threading.RLock()
+        self.entries:dict[str, dict[str, any]] = {}
+        try:
+            with open(self.manifest_path, "r") as f:
+                manifest = json.load(f)
+            if manifest.get("version") == BAKE_VERSION:
+                self.entries = manifest["entries"]
+        except (OSError, ValueError, KeyError):
+            pass
+        # Inside batch() the manifest is written once at the end instead of after every change.
+        self.batching = 0
+        self.dirty = False
+        # Entries baked, found fresh and found stale since the cache was opened.
+        self.baked = 0
+        self.hits = 0
+        self.stale = 0
+
+    @staticmethod
+    def kind(path:str) -> str | None:
+        extension = os.path.splitext(path)[1].lower()
+        if extension in MODEL_EXTENSIONS:
+            return "model"
+        if extension in TEXTURE_EXTENSIONS:
+            return "texture"
+        return None
+
+    def resolve(self, path:str, bake_missing:bool = False) -> str:
+        # The baked file for path if it is fresh, otherwise path itself.  With bake_missing
+        # a missing or stale entry is baked first, which is slow and best left to worker
+        # threads or the bake command.
+        baked = self.fresh(path)
+        if baked is None and bake_missing:
+            baked = self.bake(path)
+        return baked if baked else path
+
+    def fresh(self, path:str) -> str | None:
+        key = os.path.abspath(path)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            baked = os.path.join(self.directory, entry["baked"])
+            changed = False
+            try:
+                for source in entry["sources"]:
+                    stat = os.stat(source["path"])
+                    if stat.st_mtime_ns == source["mtime"] and stat.st_size == source["size"]:
+                        continue
+                    # Touched or copied over, only a different hash means it changed.
+                    if file_hash(source["path"]) != source["hash"]:
+                        self.stale += 1
+                        return None
+                    source["mtime"], source["size"] = stat.st_mtime_ns, stat.st_size
+                    changed = True
+                if not os.path.exists(baked):
+                    return None
+            except OSError:
+                return None
+            if changed:
+                self._save()
+            self.hits += 1
+            return baked
+
+    def bake(self, path:str) -> str | None:
+        # Bakes one model or texture, returns the baked file or None if it can't be baked.
+        kind = self.kind(path)
+        try:
+            if kind == "model":
+                data, sources = bake_gltf(path)
+                extension = ".glb"
+            elif kind == "texture":
+                pixels = decode_image(path)
+                if pixels is None:
+                    return None
+                data, sources = encode_tga(pixels), [path]
+                extension = ".tga"
+            else:
+                return None
+        except (OSError, ValueError, KeyError, zlib.error):
+            return None
+        import hashlib
+        key = os.path.abspath(path)
+        name = hashlib.sha1(key.encode()).hexdigest()[:16] + extension
+        os.makedirs(self.directory, exist_ok=True)
+        baked = os.path.join(self.directory, name)
+        temporary = f"{baked}.{threading.get_ident()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(data)
+        os.replace(temporary, baked)
+        entry_sources = []
+        for source in sources:
+            stat = os.stat(source)
+            entry_sources.append({"path": os.path.abspath(source), "mtime": stat.st_mtime_ns, "size": stat.st_size, "hash": file_hash(source)})
+        with self.lock:
+            self.entries[key] = {"baked": name, "sources": entry_sources}
+            self.baked += 1
+            self._save()
+        return baked
+
+    def bake_all(self, directories:Iterable[str] = ("models", "sprites")) -> list[str]:
+        # Bakes every model and texture under directories that isn't fresh already, returns
+        # the sources that couldn't be baked.
+        skipped = []
+        with self.batch():
+            for directory in directories:
+                for root, _, files in os.walk(directory):
+                    for name in sorted(files):
+                        path = os.path.join(root, name)
+                        if self.kind(path) and self.fresh(path) is None and self.bake(path) is None:
+                            skipped.append(path)
+        return skipped
+
+    @contextmanager
+    def batch(self) -> Iterator[AssetBake]:
+        with self.lock:
+            self.batching += 1
+        try:
+            yield self
+        finally:
+            with self.lock:
+                self.batching -= 1
+                if not self.batching and self.dirty:
+                    self._save()
+
+    def map(self, path:str) -> mmap.mmap | None:
+        # The fresh baked file for path mapped read only, see read_glb and read_tga.
+        baked = self.fresh(path)
+        return map_file(baked) if baked else None
+
+    def _save(self):
+        self.dirty = True
+        if self.batching:
+            return
+        self.dirty = False
+        os.makedirs(self.directory, exist_ok=True)
+        temporary = f"{self.manifest_path}.{threading.get_ident()}.tmp"
+        with open(temporary, "w") as f:
+            json.dump({"version": BAKE_VERSION, "entries": self.entries}, f, indent=1)
+        os.replace(temporary, self.manifest_path)
+
+if __name__ == "__main__":
+    # python -m game_tools.bake [directory ...] [--atlases module ...], by default models and
+    # sprites.  --atlases packs every SpriteAtlas the modules define next to the bake too, so
+    # not even the first scene has to pack one.
+    import argparse
+    import importlib
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directories", nargs="*", default=["models", "sprites"])
+    parser.add_argument("--atlases", nargs="*", default=[])
+    args = parser.parse_args()
+    bake = AssetBake()
+    skipped = bake.bake_all(args.directories)
+    print(f"{bake.baked} baked, {bake.hits} already fresh, into {bake.directory}")
+    for path in skipped:
+        print(f"skipped {path}, JPEGs and unusual PNGs need Pillow")
+    if args.atlases:
+        from game_tools.atlas import SpriteAtlas
+        for name in args.atlases:
+            for atlas in vars(importlib.import_module(name)).values():
+                if isinstance(atlas, SpriteAtlas):
+                    atlas.load(os.path.join(bake.directory, "atlas"))
+                    print(f"atlas {atlas.name}: {len(atlas.pages)} pages, {'packed' if atlas.builds else 'already fresh'}")
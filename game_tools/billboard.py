@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from Loxoc import Vec3, Quaternion, Object3D
+
+import numpy as np
+import math
+
+class Billboards:
+    # Objects turned about the world up axis so their forward points away from the camera,
+    # the way a character plane is billboarded.  Every yaw is computed in one NumPy pass and
+    # set directly as a fresh rotation, so nothing accumulates between frames.  Objects
+    # further than max_distance or behind the camera are left as they are, and so is any
+    # whose yaw moved less than min_turn radians since it was last set.
+    def __init__(self, max_distance:float = math.inf, min_turn:float = 1e-3, capacity:int = 64, vectorize_from:int = 16) -> None:
+        self.max_distance = max_distance
+        self.min_turn = min_turn
+        # Below this many objects NumPy's per call overhead costs more than a plain loop.
+        self.vectorize_from = vectorize_from
+        self.objects:list[Object3D] = []
+        self.index:dict[int, int] = {}
+        self.position = np.zeros((3, capacity))
+        self.yaw = np.zeros(capacity)
+        # Objects turned and skipped by the last update.
+        self.turned = 0
+        self.culled = 0
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def __contains__(self, obj:Object3D) -> bool:
+        return id(obj) in self.index
+
+    def add(self, obj:Object3D):
+        if id(obj) in self.index:
+            return
+        i = len(self.objects)
+        if i == self.yaw.shape[0]:
+            position = np.zeros((3, i * 2))
+            position[:, :i] = self.position
+            yaw = np.zeros(i * 2)
+            yaw[:i] = self.yaw
+            self.position, self.yaw = position, yaw
+        self.objects.append(obj)
+        self.index[id(obj)] = i
+        # Never set yet, any yaw differs from it.
+        self.yaw[i] = np.nan
+        self.moved(obj)
+
+    def add_list(self, objects:list[Object3D]):
+        for obj in objects:
+            self.add(obj)
+
+    def remove(self, obj:Object3D):
+        # Moves the last object into the freed column.
+        i = self.index.pop(id(obj))
+        last = len(self.objects) - 1
+        if i != last:
+            moved = self.objects[last]
+            self.objects[i] = moved
+            self.index[id(moved)] = i
+            self.position[:, i] = self.position[:, last]
+            self.yaw[i] = self.yaw[last]
+        self.objects.pop()
+
+    def moved(self, obj:Object3D):
+        # Re-reads the position of an object that moved since it was added.
+        position = obj.position
+        self.position[:, self.index[id(obj)]] = (position.x, position.y, position.z)
+
+    def refresh(self):
+        # Re-reads every position, for crowds that all move.
+        n = len(self.objects)
+        if n:
+            self.position[:, :n] = np.array([(p.x, p.y, p.z) for p in (obj.position for obj in self.objects)]).T
+
+    def update(self, camera_position:Vec3, camera_forward:Vec3 | None = None) -> int:
+        # camera_forward enables culling everything behind the camera.  Returns how many
+        # objects were turned.
+        n = len(self.objects)
+        self.turned = 0
+        self.culled = 0
+        if not n:
+            return 0
+        if n < self.vectorize_from:
+            return self._update_few(camera_position, camera_forward)
+        position = self.position[:, :n]
+        dx = position[0] - camera_position.x
+        dy = position[1] - camera_position.y
+        dz = position[2] - camera_position.z
+        visible = np.ones(n, dtype=bool)
+        if math.isfinite(self.max_distance):
+            visible &= dx * dx + dy * dy + dz * dz <= self.max_distance * self.max_distance
+        if camera_forward is not None:
+            visible &= dx * camera_forward.x + dy * camera_forward.y + dz * camera_forward.z >= 0.0
+        target = np.arctan2(dx, dz)
+        # Shortest way round, and NaN (never set) always counts as a turn.
+        turn = np.abs((target - self.yaw[:n] + math.pi) % (2 * math.pi) - math.pi)
+        due = np.flatnonzero(visible & ~(turn < self.min_turn))
+        self.culled = n - int(visible.sum())
+        if not len(due):
+            return 0
+        yaw = target[due]
+        self.yaw[due] = yaw
+        half = yaw * 0.5
+        objects = self.objects
+        for i, w, y in zip(due.tolist(), np.cos(half).tolist(), np.sin(half).tolist()):
+            objects[i].rotation = Quaternion(w, 0.0, y, 0.0)
+        self.turned = len(due)
+        return self.turned
+
+    def _update_few(self, camera_position:Vec3, camera_forward:Vec3 | None) -> int:
+        # update one object at a time, for a handful of billboards.
+        cx, cy, cz = camera_position.x, camera_position.y, camera_position.z
+        if camera_forward is not None:
+            fx, fy, fz = camera_forward.x, camera_forward.y, camera_forward.z
+        max_distance_sq = self.max_distance * self.max_distance
+        position = self.position
+        yaws = self.yaw
+        for i, obj in enumerate(self.objects):
+            dx = position[0, i] - cx
+            dy = position[1, i] - cy
+            dz = position[2, i] - cz
+            if dx * dx + dy * dy + dz * dz > max_distance_sq or (camera_forward is not None and dx * fx + dy * fy + dz * fz < 0.0):
+                self.culled += 1
+                continue
+            yaw = math.atan2(dx, dz)
+            if abs((yaw - yaws[i] + math.pi) % (2 * math.pi) - math.pi) < self.min_turn:
+                continue
+            yaws[i] = yaw
+            obj.rotation = Quaternion(math.cos(yaw * 0.5), 0.0, math.sin(yaw * 0.5), 0.0)
+            self.turned += 1
+        return self.turned
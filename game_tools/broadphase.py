@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+from Loxoc import Vec3, Object3D
+
+from game_tools.collision import AABB, inverse_direction, object_aabb
+
+import math
+
+ALL_LAYERS = 0xFFFFFFFF
+
+class BroadphaseEntry:
+    __slots__ = ("target", "aabb", "layers", "cells", "large", "object", "half_extents", "rotated", "last_position", "query_mark")
+
+    def __init__(self, target:any, aabb:AABB, layers:int) -> None:
+        self.target = target
+        self.aabb = aabb
+        self.layers = layers
+        # inclusive cell range (x0, y0, z0, x1, y1, z1) the entry is bucketed in
+        self.cells:tuple[int, int, int, int, int, int] | None = None
+        self.large = False
+        # Set for entries that follow an Object3D.
+        self.object:Object3D | None = None
+        self.half_extents:Vec3 | None = None
+        self.rotated = False
+        self.last_position:tuple[float, float, float] | None = None
+        self.query_mark = 0
+
+class SpatialHash:
+    def __init__(self, cell_size:float = 4.0, max_cells:int = 512) -> None:
+        # Entries covering more than max_cells cells (floors, walls) are kept in a
+        # separate list that every query checks instead of being bucketed.
+        self.cell_size = cell_size
+        self.inv_cell_size = 1.0 / cell_size
+        self.max_cells = max_cells
+        self.cells:dict[tuple[int, int, int], list[BroadphaseEntry]] = {}
+        self.entries:dict[int, BroadphaseEntry] = {}
+        self.large:list[BroadphaseEntry] = []
+        self.tracked:list[BroadphaseEntry] = []
+        # Cell range that has ever held an entry, rays stop once they leave it.
+        self.bounds:list[int] | None = None
+        self._mark = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, target:any) -> bool:
+        return id(target) in self.entries
+
+    def _cell_range(self, aabb:AABB) -> tuple[int, int, int, int, int, int]:
+        inv = self.inv_cell_size
+        return (
+            math.floor(aabb.x0 * inv), math.floor(aabb.y0 * inv), math.floor(aabb.z0 * inv),
+            math.floor(aabb.x1 * inv), math.floor(aabb.y1 * inv), math.floor(aabb.z1 * inv)
+        )
+
+    def _bucket(self, entry:BroadphaseEntry):
+        cells = self._cell_range(entry.aabb)
+        x0, y0, z0, x1, y1, z1 = cells
+        if (x1 - x0 + 1) * (y1 - y0 + 1) * (z1 - z0 + 1) > self.max_cells:
+            entry.large = True
+            entry.cells = None
+            self.large.append(entry)
+            return
+        entry.large = False
+        entry.cells = cells
+        if self.bounds is None:
+            self.bounds = list(cells)
+        else:
+            bounds = self.bounds
+            bounds[0] = min(bounds[0], x0)
+            bounds[1] = min(bounds[1], y0)
+            bounds[2] = min(bounds[2], z0)
+            bounds[3] = max(bounds[3], x1)
+            bounds[4] = max(bounds[4], y1)
+            bounds[5] = max(bounds[5], z1)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                for z in range(z0, z1 + 1):
+                    bucket = self.cells.get((x, y, z))
+                    if bucket is None:
+                        self.cells[(x, y, z)] = [entry]
+                    else:
+                        bucket.append(entry)
+
+    def _unbucket(self, entry:BroadphaseEntry):
+        if entry.large:
+            self.large.remove(entry)
+            return
+        x0, y0, z0, x1, y1, z1 = entry.cells
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                for z in range(z0, z1 + 1):
+                    bucket = self.cells[(x, y, z)]
+                    bucket.remove(entry)
+                    if not bucket:
+                        del self.cells[(x, y, z)]
+
+    def insert(self, target:any, aabb:AABB, layers:int = 1) -> BroadphaseEntry:
+        if id(target) in self.entries:
+            raise ValueError(f"{target!r} is already in the broadphase.")
+        entry = BroadphaseEntry(target, aabb, layers)
+        self.entries[id(target)] = entry
+        self._bucket(entry)
+        return entry
+
+    def track(self, obj:Object3D, half_extents:Vec3 | None = None, layers:int = 1, target:any = None, rotated:bool = False) -> BroadphaseEntry:
+        # Registers an entry whose bounds follow obj, refreshed by update().
+        entry = self.insert(obj if target is None else target, object_aabb(obj, half_extents, rotated), layers)
+        entry.object = obj
+        entry.half_extents = half_extents
+        entry.rotated = rotated
+        position = obj.position
+        entry.last_position = (position.x, position.y, position.z)
+        self.tracked.append(entry)
+        return entry
+
+    def remove(self, target:any):
+        entry = self.entries.pop(id(target))
+        self._unbucket(entry)
+        if entry.object is not None:
+            self.tracked.remove(entry)
+
+    def move(self, target:any, aabb:AABB):
+        # Only touches the buckets when the entry crosses into different cells.
+        entry = self.entries[id(target)]
+        entry.aabb = aabb
+        if entry.large:
+            return
+        cells = self._cell_range(aabb)
+        if cells != entry.cells:
+            self._unbucket(entry)
+            self._bucket(entry)
+
+    def update(self):
+        # Refreshes every tracked entry whose object moved since the last update.
+        for entry in self.tracked:
+            position = entry.object.position
+            current = (position.x, position.y, position.z)
+            if entry.rotated or current != entry.last_position:
+                entry.last_position = current
+                self.move(entry.target, object_aabb(entry.object, entry.half_extents, entry.rotated))
+
+    def _next_mark(self) -> int:
+        self._mark += 1
+        return self._mark
+
+    def query_box(self, aabb:AABB, layers:int = ALL_LAYERS, exclude:any = None) -> list[any]:
+        # Targets whose bounds overlap aabb.
+        return [entry.target for entry in self.query_entries(aabb, layers, exclude)]
+
+    def query_bounds(self, aabb:AABB, layers:int = ALL_LAYERS, exclude:any = None) -> list[AABB]:
+        # Bounds of the entries overlapping aabb, for shapes that are resolved as boxes.
+        return [entry.aabb for entry in self.query_entries(aabb, layers, exclude)]
+
+    def query_entries(self, aabb:AABB, layers:int = ALL_LAYERS, exclude:any = None) -> list[BroadphaseEntry]:
+        mark = self._next_mark()
+        found = []
+        for entry in self.large:
+            if entry.layers & layers and entry.target is not exclude and entry.aabb.overlaps(aabb):
+                found.append(entry)
+        x0, y0, z0, x1, y1, z1 = self._cell_range(aabb)
+        cells = self.cells
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                for z in range(z0, z1 + 1):
+                    bucket = cells.get((x, y, z))
+                    if bucket is None:
+                        continue
+                    for entry in bucket:
+                        if entry.query_mark == mark:
+                            continue
+                        entry.query_mark = mark
+                        if entry.layers & layers and entry.target is not exclude and entry.aabb.overlaps(aabb):
+                            found.append(entry)
+        return found
+
+    def raycast(self, origin:Vec3, direction:Vec3, max_distance:float = math.inf, layers:int = ALL_LAYERS, exclude:any = None) -> tuple[any, float] | None:
+        # First target whose bounds the ray enters, with the distance along the normalized direction.
+        hits = self.raycast_all(origin, direction, max_distance, layers, exclude, first = True)
+        return hits[0] if hits else None
+
+    def raycast_all(self, origin:Vec3, direction:Vec3, max_distance:float = math.inf, layers:int = ALL_LAYERS, exclude:any = None, first:bool = False) -> list[tuple[any, float]]:
+        # Targets whose bounds the ray passes through sorted nearest first.  Cells are walked
+        # front to back (Amanatides & Woo) so a first-hit query stops at the first cell that
+        # can't contain anything closer.
+        magnitude = direction.get_magnitude()
+        if magnitude == 0:
+            return []
+        dx = direction.x / magnitude
+        dy = direction.y / magnitude
+        dz = direction.z / magnitude
+        ox, oy, oz = origin.x, origin.y, origin.z
+        inv_x, inv_y, inv_z = inverse_direction(dx, dy, dz)
+        mark = self._next_mark()
+        hits:list[tuple[any, float]] = []
+        best = max_distance
+
+        for entry in self.large:
+            if entry.layers & layers and entry.target is not exclude:
+                distance = entry.aabb.ray_distance(ox, oy, oz, inv_x, inv_y, inv_z, best)
+                if distance is not None:
+                    hits.append((entry.target, distance))
+                    if first:
+                        best = distance
+
+        if self.cells:
+            size = self.cell_size
+            cx = math.floor(ox * self.inv_cell_size)
+            cy = math.floor(oy * self.inv_cell_size)
+            cz = math.floor(oz * self.inv_cell_size)
+            step_x = 1 if dx > 0 else -1
+            step_y = 1 if dy > 0 else -1
+            step_z = 1 if dz > 0 else -1
+            # distance along the ray to the next cell boundary on each axis, and between boundaries
+            t_max_x = ((cx + (step_x > 0)) * size - ox) * inv_x if dx else math.inf
+            t_max_y = ((cy + (step_y > 0)) * size - oy) * inv_y if dy else math.inf
+            t_max_z = ((cz + (step_z > 0)) * size - oz) * inv_z if dz else math.inf
+            t_delta_x = abs(size * inv_x) if dx else math.inf
+            t_delta_y = abs(size * inv_y) if dy else math.inf
+            t_delta_z = abs(size * inv_z) if dz else math.inf
+            # Past the outermost occupied cells the ray can't hit anything bucketed.
+            if not math.isfinite(best):
+                best_bucketed = self._exit_distance(ox, oy, oz, inv_x, inv_y, inv_z)
+            else:
+                best_bucketed = best
+            t = 0.0
+            cells = self.cells
+            while t <= best_bucketed and t <= best:
+                bucket = cells.get((cx, cy, cz))
+                if bucket is not None:
+                    for entry in bucket:
+                        if entry.query_mark == mark:
+                            continue
+                        entry.query_mark = mark
+                        if entry.layers & layers and entry.target is not exclude:
+                            distance = entry.aabb.ray_distance(ox, oy, oz, inv_x, inv_y, inv_z, best)
+                            if distance is not None:
+                                hits.append((entry.target, distance))
+                                if first and distance < best:
+                                    best = distance
+                if t_max_x < t_max_y and t_max_x < t_max_z:
+                    t = t_max_x
+                    t_max_x += t_delta_x
+                    cx += step_x
+                elif t_max_y < t_max_z:
+                    t = t_max_y
+                    t_max_y += t_delta_y
+                    cy += step_y
+                else:
+                    t = t_max_z
+                    t_max_z += t_delta_z
+                    cz += step_z
+
+        hits.sort(key=lambda hit: hit[1])
+        if first:
+            return hits[:1]
+        return [hit for hit in hits if hit[1] <= max_distance]
+
+    def _exit_distance(self, ox:float, oy:float, oz:float, inv_x:float, inv_y:float, inv_z:float) -> float:
+        # Distance at which the ray leaves the box around every occupied cell.
+        x0, y0, z0, x1, y1, z1 = self.bounds
+        size = self.cell_size
+        bounds = AABB(x0 * size, y0 * size, z0 * size, (x1 + 1) * size, (y1 + 1) * size, (z1 + 1) * size)
+        if bounds.ray_distance(ox, oy, oz, inv_x, inv_y, inv_z) is None:
+            return -1.0
+        # Far slab distance, the ray starts inside or enters the bounds before this.
+        far = math.inf
+        for o, inv, lo, hi in ((ox, inv_x, bounds.x0, bounds.x1), (oy, inv_y, bounds.y0, bounds.y1), (oz, inv_z, bounds.z0, bounds.z1)):
+            if inv != math.inf:
+                far = min(far, max((lo - o) * inv, (hi - o) * inv))
+        return far
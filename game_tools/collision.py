@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from Loxoc import Vec3, Object3D, Quaternion
+
+from typing import Callable
+import math
+
+class AABB:
+    __slots__ = ("x0", "y0", "z0", "x1", "y1", "z1")
+
+    def __init__(self, x0:float, y0:float, z0:float, x1:float, y1:float, z1:float) -> None:
+        self.x0 = x0
+        self.y0 = y0
+        self.z0 = z0
+        self.x1 = x1
+        self.y1 = y1
+        self.z1 = z1
+
+    def __repr__(self) -> str:
+        return f"AABB(({self.x0}, {self.y0}, {self.z0}), ({self.x1}, {self.y1}, {self.z1}))"
+
+    @classmethod
+    def from_center(cls, cx:float, cy:float, cz:float, hx:float, hy:float, hz:float) -> AABB:
+        return cls(cx - hx, cy - hy, cz - hz, cx + hx, cy + hy, cz + hz)
+
+    @classmethod
+    def from_vec(cls, center:Vec3, half_extents:Vec3) -> AABB:
+        return cls.from_center(center.x, center.y, center.z, half_extents.x, half_extents.y, half_extents.z)
+
+    @property
+    def center(self) -> Vec3:
+        return Vec3((self.x0 + self.x1) * 0.5, (self.y0 + self.y1) * 0.5, (self.z0 + self.z1) * 0.5)
+
+    @property
+    def half_extents(self) -> Vec3:
+        return Vec3((self.x1 - self.x0) * 0.5, (self.y1 - self.y0) * 0.5, (self.z1 - self.z0) * 0.5)
+
+    def overlaps(self, other:AABB) -> bool:
+        return self.x0 <= other.x1 and other.x0 <= self.x1 and \
+            self.y0 <= other.y1 and other.y0 <= self.y1 and \
+            self.z0 <= other.z1 and other.z0 <= self.z1
+
+    def contains_point(self, x:float, y:float, z:float) -> bool:
+        return self.x0 <= x <= self.x1 and self.y0 <= y <= self.y1 and self.z0 <= z <= self.z1
+
+    def expanded(self, dx:float, dy:float, dz:float) -> AABB:
+        # Grows the box in the direction of a displacement, covering everything it sweeps through.
+        return AABB(
+            self.x0 + min(dx, 0.0), self.y0 + min(dy, 0.0), self.z0 + min(dz, 0.0),
+            self.x1 + max(dx, 0.0), self.y1 + max(dy, 0.0), self.z1 + max(dz, 0.0)
+        )
+
+    def ray_distance(self, ox:float, oy:float, oz:float, inv_x:float, inv_y:float, inv_z:float, max_distance:float = math.inf) -> float | None:
+        # Slab test.  Takes the reciprocal of the ray direction so it can be shared between boxes.
+        t_near = 0.0
+        t_far = max_distance
+        for o, inv, lo, hi in ((ox, inv_x, self.x0, self.x1), (oy, inv_y, self.y0, self.y1), (oz, inv_z, self.z0, self.z1)):
+            if inv == math.inf:
+                if o < lo or o > hi:
+                    return None
+                continue
+            t0 = (lo - o) * inv
+            t1 = (hi - o) * inv
+            if t0 > t1:
+                t0, t1 = t1, t0
+            if t0 > t_near:
+                t_near = t0
+            if t1 < t_far:
+                t_far = t1
+            if t_near > t_far:
+                return None
+        return t_near
+
+def inverse_direction(dx:float, dy:float, dz:float) -> tuple[float, float, float]:
+    # An infinite reciprocal marks an axis the ray doesn't move along.
+    return (
+        1.0 / dx if dx else math.inf,
+        1.0 / dy if dy else math.inf,
+        1.0 / dz if dz else math.inf
+    )
+
+def rotated_half_extents(rotation:Quaternion, hx:float, hy:float, hz:float) -> tuple[float, float, float]:
+    # Half extents of the axis aligned box enclosing a rotated box.
+    r = rotation.right
+    u = rotation.up
+    f = rotation.forward
+    return (
+        abs(r.x) * hx + abs(u.x) * hy + abs(f.x) * hz,
+        abs(r.y) * hx + abs(u.y) * hy + abs(f.y) * hz,
+        abs(r.z) * hx + abs(u.z) * hy + abs(f.z) * hz
+    )
+
+def object_aabb(obj:Object3D, half_extents:Vec3 | None = None, rotated:bool = False) -> AABB:
+    # half_extents are in model space, the default matches the unit cube model.
+    scale = obj.scale
+    hx = scale.x * (half_extents.x if half_extents else 1.0)
+    hy = scale.y * (half_extents.y if half_extents else 1.0)
+    hz = scale.z * (half_extents.z if half_extents else 1.0)
+    if rotated:
+        hx, hy, hz = rotated_half_extents(obj.rotation, hx, hy, hz)
+    position = obj.position
+    return AABB.from_center(position.x, position.y, position.z, hx, hy, hz)
+
+# Gap left between bodies resolved to contact so they never start the next frame interpenetrating.
+SKIN = 1e-4
+
+def sweep_aabb(moving:AABB, dx:float, dy:float, dz:float, other:AABB) -> tuple[float, int, float] | None:
+    # Time of impact of moving displaced by (dx, dy, dz) against a static box.  Returns the
+    # fraction of the displacement travelled before contact, the axis (0, 1, 2) of the contact
+    # and the sign of the contact normal along it, or None when the boxes don't meet.
+    axes = (
+        (dx, moving.x0, moving.x1, other.x0, other.x1),
+        (dy, moving.y0, moving.y1, other.y0, other.y1),
+        (dz, moving.z0, moving.z1, other.z0, other.z1)
+    )
+    if moving.x0 < other.x1 and other.x0 < moving.x1 and \
+        moving.y0 < other.y1 and other.y0 < moving.y1 and \
+        moving.z0 < other.z1 and other.z0 < moving.z1:
+        # Already interpenetrating, push out along the shallowest axis unless moving out of it anyway.
+        depth, axis, sign = min(
+            (min(bhi - alo, ahi - blo), i, 1.0 if bhi - alo < ahi - blo else -1.0)
+            for i, (_, alo, ahi, blo, bhi) in enumerate(axes)
+        )
+        return (0.0, axis, sign) if axes[axis][0] * sign < 0 else None
+    t_entry = -math.inf
+    t_exit = math.inf
+    axis = -1
+    sign = 0.0
+    for i, (d, alo, ahi, blo, bhi) in enumerate(axes):
+        if d == 0:
+            if ahi <= blo or bhi <= alo:
+                return None
+            continue
+        if d > 0:
+            entry = (blo - ahi) / d
+            exit = (bhi - alo) / d
+            normal = -1.0
+        else:
+            entry = (bhi - alo) / d
+            exit = (blo - ahi) / d
+            normal = 1.0
+        if entry > t_entry:
+            t_entry = entry
+            axis = i
+            sign = normal
+        if exit < t_exit:
+            t_exit = exit
+    if axis < 0 or t_entry > t_exit or t_entry > 1.0 or t_exit <= 0.0:
+        return None
+    return max(t_entry, 0.0), axis, sign
+
+def earliest_impact(moving:AABB, dx:float, dy:float, dz:float, others:list[AABB]) -> tuple[float, int, float] | None:
+    # Earliest sweep_aabb contact against any of others, backed off by SKIN along the contact axis.
+    best = None
+    for other in others:
+        impact = sweep_aabb(moving, dx, dy, dz, other)
+        if impact is not None and (best is None or impact[0] < best[0]):
+            best = impact
+    if best is None:
+        return None
+    t, axis, sign = best
+    d = abs((dx, dy, dz)[axis])
+    return max(0.0, t - SKIN / d) if d else 0.0, axis, sign
+
+def bisect_impact(collides_at:Callable[[float], bool], steps:int = 16) -> float | None:
+    # Time of impact against shapes that can only be tested for overlap.  Finds the last
+    # fraction of the displacement that is still free in a fixed number of overlap tests.
+    if not collides_at(1.0):
+        return None
+    if collides_at(0.0):
+        return 0.0
+    free = 0.0
+    blocked = 1.0
+    for _ in range(steps):
+        middle = (free + blocked) * 0.5
+        if collides_at(middle):
+            blocked = middle
+        else:
+            free = middle
+    return free
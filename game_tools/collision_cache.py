@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from Loxoc import Vec3, Object3D, Collider, ConvexCollider, RayCollider, RayHit
+
+from typing import Callable
+
+def _object_version(obj:Object3D) -> tuple:
+    p = obj.position
+    r = obj.rotation
+    s = obj.scale
+    return (p.x, p.y, p.z, r.w, r.x, r.y, r.z, s.x, s.y, s.z)
+
+def _ray_version(ray:RayCollider) -> tuple:
+    o = ray.origin
+    d = ray.direction
+    return (o.x, o.y, o.z, d.w, d.x, d.y, d.z)
+
+def _point_version(point:Vec3) -> tuple:
+    return (point.x, point.y, point.z)
+
+# Loxoc tests rays, points and boxes in less time than versioning the shapes takes (see
+# benchmarks/collision_cache.py), only queries with one of these in them are worth an entry.
+CACHED_SHAPES = (ConvexCollider,)
+
+class CollisionCache:
+    # Narrowphase results (check_collision and RayCollider.get_collision) kept for as long as
+    # neither shape has moved.  Loxoc doesn't say when a transform changes, so a shape's
+    # transform version is the transform itself, read at every query: an entry is reused
+    # only while both shapes are exactly where they were when it was computed, a changed
+    # transform misses and replaces it.  Colliders built from an object follow that object,
+    # attach them so its transform is part of their version.  Queries without one of
+    # CACHED_SHAPES in them go straight to the engine, as should one-off queries that can
+    # only miss (bisection steps, a shot).  end_frame drops the entries that weren't asked
+    # for during the frame, so the cache only holds what is still being queried.  Entries
+    # hold on to their shapes, a dead shape's id can't come back as a hit.
+    def __init__(self) -> None:
+        # (kind, id, id) -> [a, b, version of a, version of b, result, frame last used]
+        self.entries:dict[tuple[int, int, int], list] = {}
+        self.owners:dict[int, Object3D] = {}
+        self._versions:dict[type, Callable[[any], tuple]] = {}
+        self.frame = 0
+        self.hits = 0
+        self.misses = 0
+        self.frame_hits = 0
+        self.frame_misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def hit_rate(self) -> float:
+        queries = self.hits + self.misses
+        return self.hits / queries if queries else 0.0
+
+    @property
+    def frame_hit_rate(self) -> float:
+        queries = self.frame_hits + self.frame_misses
+        return self.frame_hits / queries if queries else 0.0
+
+    def attach(self, collider:Collider, obj:Object3D):
+        self.owners[id(collider)] = obj
+
+    def detach(self, collider:Collider):
+        self.owners.pop(id(collider), None)
+
+    def _collider_version(self, collider:Collider) -> tuple:
+        o = collider.offset
+        r = collider.rotation
+        s = collider.scale
+        owner = self.owners.get(id(collider))
+        if owner is None:
+            return (o.x, o.y, o.z, r.w, r.x, r.y, r.z, s.x, s.y, s.z)
+        p = owner.position
+        q = owner.rotation
+        t = owner.scale
+        return (o.x, o.y, o.z, r.w, r.x, r.y, r.z, s.x, s.y, s.z, p.x, p.y, p.z, q.w, q.x, q.y, q.z, t.x, t.y, t.z)
+
+    def _versioner(self, shape_type:type) -> Callable[[any], tuple]:
+        if issubclass(shape_type, RayCollider):
+            version = _ray_version
+        elif issubclass(shape_type, Collider):
+            version = self._collider_version
+        elif issubclass(shape_type, Object3D):
+            version = _object_version
+        elif issubclass(shape_type, Vec3):
+            version = _point_version
+        else:
+            raise TypeError(f"Can't version a {shape_type.__name__} for collision queries.")
+        self._versions[shape_type] = version
+        return version
+
+    def version(self, shape:Object3D | Collider | Vec3) -> tuple:
+        version = self._versions.get(type(shape))
+        return (version if version is not None else self._versioner(type(shape)))(shape)
+
+    def _lookup(self, kind:int, a:any, b:any, query:Callable[[any], any]) -> any:
+        versions = self._versions
+        version_a = versions.get(type(a))
+        version_a = (version_a if version_a is not None else self._versioner(type(a)))(a)
+        version_b = versions.get(type(b))
+        version_b = (version_b if version_b is not None else self._versioner(type(b)))(b)
+        key = (kind, id(a), id(b))
+        entry = self.entries.get(key)
+        if entry is not None and entry[2] == version_a and entry[3] == version_b:
+            entry[5] = self.frame
+            self.hits += 1
+            self.frame_hits += 1
+            return entry[4]
+        result = query(b)
+        self.entries[key] = [a, b, version_a, version_b, result, self.frame]
+        self.misses += 1
+        self.frame_misses += 1
+        return result
+
+    def check(self, a:Object3D | Collider, b:Object3D | Collider | Vec3) -> bool:
+        # a.check_collision(b).  Two colliders overlap either way round, so they share an
+        # entry, anything else keeps its order: Loxoc's Object3D.check_collision doesn't take
+        # colliders.
+        if not (isinstance(a, CACHED_SHAPES) or isinstance(b, CACHED_SHAPES)):
+            return a.check_collision(b)
+        if id(b) < id(a) and isinstance(a, Collider) and isinstance(b, Collider):
+            a, b = b, a
+        return self._lookup(0, a, b, a.check_collision)
+
+    def ray(self, ray:RayCollider, target:Object3D | Collider) -> RayHit:
+        # ray.get_collision(target).  The RayHit is shared between hits, don't change it.
+        if not isinstance(target, CACHED_SHAPES):
+            return ray.get_collision(target)
+        return self._lookup(1, ray, target, ray.get_collision)
+
+    def end_frame(self):
+        frame = self.frame
+        stale = [key for key, entry in self.entries.items() if entry[5] != frame]
+        for key in stale:
+            del self.entries[key]
+        self.frame = frame + 1
+        self.frame_hits = 0
+        self.frame_misses = 0
+
+    def clear(self):
+        self.entries.clear()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
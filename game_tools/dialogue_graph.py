@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from array import array
+import json
+import os
+
+class DialogueGraph:
+    # A conversation compiled from its data into flat tables indexed by node number, so a
+    # thousand node tree is a handful of lists and nothing is made for a node until it is
+    # shown.  The data is
+    #
+    #   {"start": "hello", "nodes": {"hello": {"text": "...", "next": "id", "on_start": "name",
+    #       "on_end": "name", "options": [{"text": "...", "next": "id", "on_start": "name",
+    #       "on_chosen": "name", "on_finished_typing": "name", "on_end": "name"}]}}}
+    #
+    # with everything but a node's text optional.  Callbacks are given by name and looked up
+    # by whoever runs the conversation.  The options of node n are option_start[n] up to
+    # option_start[n + 1], a missing node or callback is -1.
+    NODE_CALLBACKS = ("on_start", "on_end")
+    OPTION_CALLBACKS = ("on_start", "on_chosen", "on_finished_typing", "on_end")
+
+    def __init__(self, data:dict[str, any], source:str = "<dialogue>") -> None:
+        nodes:dict[str, dict[str, any]] = data["nodes"]
+        self.source = source
+        self.ids:list[str] = list(nodes)
+        self.index:dict[str, int] = {node_id: i for i, node_id in enumerate(self.ids)}
+        self.names:list[str] = []
+        self.name_index:dict[str, int] = {}
+        self.text:list[str] = []
+        self.next = array("i")
+        self.callbacks = {name: array("i") for name in self.NODE_CALLBACKS}
+        self.option_start = array("i", [0])
+        self.option_text:list[str] = []
+        self.option_next = array("i")
+        self.option_callbacks = {name: array("i") for name in self.OPTION_CALLBACKS}
+        for node_id, node in nodes.items():
+            self.text.append(node["text"])
+            self.next.append(self._node(node.get("next"), node_id))
+            for name, column in self.callbacks.items():
+                column.append(self._name(node.get(name)))
+            for option in node.get("options", ()):
+                self.option_text.append(option["text"])
+                self.option_next.append(self._node(option.get("next"), node_id))
+                for name, column in self.option_callbacks.items():
+                    column.append(self._name(option.get(name)))
+            self.option_start.append(len(self.option_text))
+        self.start = self._node(data.get("start", self.ids[0] if self.ids else None), "start")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def options(self, node:int) -> range:
+        return range(self.option_start[node], self.option_start[node + 1])
+
+    def name(self, index:int) -> str | None:
+        return self.names[index] if index >= 0 else None
+
+    def _node(self, node_id:str | None, referrer:str) -> int:
+        if node_id is None:
+            return -1
+        if node_id not in self.index:
+            raise ValueError(f"{self.source}: {referrer!r} leads to {node_id!r}, which isn't a node.")
+        return self.index[node_id]
+
+    def _name(self, name:str | None) -> int:
+        if name is None:
+            return -1
+        index = self.name_index.get(name)
+        if index is None:
+            index = self.name_index[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+    # Compiled graphs by file, compiled again only when the file changes.
+    _loaded:dict[str, tuple[int, DialogueGraph]] = {}
+
+    @classmethod
+    def load(cls, path:str) -> DialogueGraph:
+        key = os.path.abspath(path)
+        mtime = os.stat(key).st_mtime_ns
+        loaded = cls._loaded.get(key)
+        if loaded and loaded[0] == mtime:
+            return loaded[1]
+        with open(key, "r") as f:
+            graph = cls(json.load(f), path)
+        cls._loaded[key] = (mtime, graph)
+        return graph
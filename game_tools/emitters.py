@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+from Loxoc import Vec3, Quaternion, Emitter, Window
+
+from collections import deque
+from copy import copy
+from typing import Callable
+
+class EmitterPool:
+    # Short lived particle effects, e.g. bullet hits, from a fixed set of emitters made up
+    # front.  An effect emits for its duration and then stays in the window until its last
+    # particles have died.  Emitters are only added to the window when an effect starts and
+    # removed when it expires, with none free the oldest effect is cut short and its emitter
+    # reused.
+    #
+    # max_particles bounds the particles alive at once.  Each effect reserves the most it can
+    # have alive, its rate times the shorter of its duration and the particle lifetime.  An
+    # effect that doesn't fit the rest of the budget takes the oldest effect's place, and
+    # emits at a lower rate or not at all if even that isn't enough.
+    def __init__(self, window:Window, factory:Callable[[], Emitter], size:int = 16, max_particles:int = 256) -> None:
+        self.window = window
+        self.max_particles = max_particles
+        self.emitters = [factory() for _ in range(size)]
+        for emitter in self.emitters:
+            emitter.stop()
+        # The factory's rate and how long a particle lives, rate is particles per second.
+        self.rate = [emitter.rate for emitter in self.emitters]
+        self.particle_life = [emitter.start_lifetime_max / emitter.decay_rate if emitter.decay_rate > 0 else emitter.start_lifetime_max for emitter in self.emitters]
+        # Per emitter: seconds left emitting, seconds left until expired, particles reserved.
+        self.emitting = [0.0] * size
+        self.remaining = [0.0] * size
+        self.reserved = [0] * size
+        self.free = list(range(size - 1, -1, -1))
+        # Active emitters, oldest first.
+        self.active:deque[int] = deque()
+        self.particles = 0
+        # Effects cut short to make room and spawns refused for lack of particle budget.
+        self.recycled = 0
+        self.refused = 0
+
+    def __len__(self) -> int:
+        return len(self.active)
+
+    def spawn(self, position:Vec3, direction:Quaternion, duration:float = 0.1, rate:int | None = None) -> Emitter | None:
+        # Starts an effect emitting rate (by default the factory's) particles a second for
+        # duration seconds.  Returns its emitter, or None when the particle budget is used up.
+        recycle = not self.free
+        if not recycle:
+            i = self.free[-1]
+        elif self.active:
+            i = self.active[0]
+        else:
+            self.refused += 1
+            return None
+
+        life = self.particle_life[i]
+        rate = self.rate[i] if rate is None else rate
+        window = duration if duration < life else life
+        room = self.max_particles - self.particles + (self.reserved[i] if recycle else 0)
+        if rate * window > room and not recycle and self.active:
+            # Over budget, the newest hit matters more than the oldest.
+            recycle = True
+            i = self.active[0]
+            room += self.reserved[i]
+        if rate * window > room:
+            rate = int(room / window) if window > 0 else 0
+        if rate <= 0:
+            self.refused += 1
+            return None
+
+        if recycle:
+            # Still in the window, just restarted where it is needed now.
+            self.active.popleft()
+            self.particles -= self.reserved[i]
+            self.recycled += 1
+        else:
+            self.free.pop()
+            self.window.add_emitter(self.emitters[i])
+
+        emitter = self.emitters[i]
+        emitter.position = position
+        emitter.direction = direction
+        emitter.rate = rate
+        emitter.start()
+        self.emitting[i] = duration
+        self.remaining[i] = duration + life
+        self.reserved[i] = int(rate * window + 0.999)
+        self.particles += self.reserved[i]
+        self.active.append(i)
+        return emitter
+
+    def update(self, dt:float):
+        # Stops effects whose duration is over and expires those whose particles are gone.
+        if not self.active:
+            return
+        emitting = self.emitting
+        remaining = self.remaining
+        expired = False
+        for i in self.active:
+            if emitting[i] > 0.0:
+                emitting[i] -= dt
+                if emitting[i] <= 0.0:
+                    self.emitters[i].stop()
+            remaining[i] -= dt
+            if remaining[i] <= 0.0:
+                expired = True
+        if expired:
+            # Durations differ, the expired effects aren't always the oldest.
+            for i in [i for i in self.active if remaining[i] <= 0.0]:
+                self.active.remove(i)
+                self.particles -= self.reserved[i]
+                self._expire(i)
+
+    def _expire(self, i:int):
+        self.emitters[i].stop()
+        self.emitting[i] = 0.0
+        self.remaining[i] = 0.0
+        self.reserved[i] = 0
+        self.window.remove_emitter(self.emitters[i])
+        self.free.append(i)
+
+    def snapshot(self) -> list[tuple[Vec3, Quaternion, int, float, float, int]]:
+        # Every live effect, oldest first, as (position, direction, rate, emitting, remaining,
+        # reserved).
+        return [(copy(self.emitters[i].position), copy(self.emitters[i].direction), self.emitters[i].rate, self.emitting[i], self.remaining[i], self.reserved[i]) for i in self.active]
+
+    def restore(self, snapshot:list[tuple[Vec3, Quaternion, int, float, float, int]]):
+        # Emitters already in the window are reused before any is added, and only the ones
+        # left over are removed.
+        kept = self.active
+        self.active = deque()
+        self.particles = 0
+        for position, direction, rate, emitting, remaining, reserved in snapshot:
+            if kept:
+                i = kept.popleft()
+            elif self.free:
+                i = self.free.pop()
+                self.window.add_emitter(self.emitters[i])
+            else:
+                break
+            emitter = self.emitters[i]
+            emitter.position = position
+            emitter.direction = direction
+            emitter.rate = rate
+            if emitting > 0.0:
+                emitter.start()
+            else:
+                emitter.stop()
+            self.emitting[i] = emitting
+            self.remaining[i] = remaining
+            self.reserved[i] = reserved
+            self.particles += reserved
+            self.active.append(i)
+        for i in kept:
+            self._expire(i)
+
+    def clear(self):
+        # Expires every effect, e.g. when the scene unloads.
+        for i in self.active:
+            self.particles -= self.reserved[i]
+            self._expire(i)
+        self.active.clear()
@@ -0,0 +1,591 @@
+from __future__ import annotations
+
+# Stand-ins for the parts of Loxoc that need a window or an OpenGL context, so game logic
+# can run on machines without a display.  The maths types, enums and lights are Loxoc's
+# own, everything that would touch OpenGL is replaced by a plain Python object keeping the
+# same attributes.  Colliders are treated as axis aligned boxes and rendering is a no-op.
+#
+# Set GAME_HEADLESS=1 before importing game_tools and every `from Loxoc import ...` after
+# that resolves here.  The window then advances by a synthetic dt each update and takes
+# its input from Window.script.
+
+from Loxoc.core import *
+from Loxoc.core import (
+    Vec2, Vec3, Vec4, Quaternion, Matrix4x4, EVENT_FLAG, EVENT_STATE, MOUSE_EVENT_TYPE,
+    MOUSE_BUTTON, MOUSE_WHEEL_DIRECTION, TextureFiltering, TextureWraping, ShaderType
+)
+
+from typing import Callable
+from copy import copy
+import math
+import sys
+
+def install():
+    # Makes `from Loxoc import ...` resolve to this module from now on.
+    sys.modules["Loxoc"] = sys.modules[__name__]
+
+def unsupported_uniform(name:str, value:any):
+    # Loxoc 1.0.0.dev44 hands the name to C++ as a str, which Cython refuses, so every
+    # set_uniform raises.  Done here too so headless runs fail the same way.
+    raise TypeError("expected bytes, str found")
+
+class Camera:
+    def __init__(self, position:Vec3, rotation:Vec3, view_width:int, view_height:int, focal_length:float, fov:float) -> None:
+        self.position = copy(position)
+        self.rotation = Quaternion.from_euler(rotation)
+        self.view_width = view_width
+        self.view_height = view_height
+        self.focal_length = focal_length
+        self.fov = fov
+
+class MouseWheel:
+    def __init__(self) -> None:
+        self.int_x = 0
+        self.int_y = 0
+        self.x = 0.0
+        self.y = 0.0
+        self.direction = MOUSE_WHEEL_DIRECTION.NORMAL
+
+class MouseDevice:
+    def __init__(self) -> None:
+        self.id = 0
+        self.timestamp = 0
+        self.x = 0
+        self.y = 0
+        self.rel_x = 0
+        self.rel_y = 0
+        self.clicks = 0
+        self.type = MOUSE_EVENT_TYPE.NONE
+        self.state = EVENT_STATE.NONE
+        self.button = MOUSE_BUTTON.LEFT
+        self.wheel = MouseWheel()
+
+class Event:
+    def __init__(self) -> None:
+        self.flags:dict[EVENT_FLAG, EVENT_STATE] = {}
+        self.mouse = MouseDevice()
+
+    def get_flag(self, _event:EVENT_FLAG) -> EVENT_STATE:
+        return self.flags.get(_event, EVENT_STATE.NONE)
+
+    def check_flag(self, _event:EVENT_FLAG) -> bool:
+        return self.flags.get(_event, EVENT_STATE.NONE) != EVENT_STATE.NONE
+
+    def get_mouse(self, id:int) -> MouseDevice:
+        return self.mouse
+
+class Window:
+    def __init__(self, title:str, cam:Camera, width:int, height:int, fullscreen:bool = False, ambient_light:Vec3 | None = None, dt:float = 1 / 60) -> None:
+        self.title = title
+        self.camera = cam
+        self.width = width
+        self.height = height
+        self.fullscreen = fullscreen
+        self.resizeable = False
+        self.ambient_light = ambient_light if ambient_light else Vec3(1, 1, 1)
+        self.sky_box = None
+        self.event = Event()
+        # Every frame lasts exactly dt.  script(window, frame) is called at the end of each
+        # update to set up the input of the next frame.
+        self.dt = dt
+        self.script:Callable[[Window, int], None] | None = None
+        self.frame = 0
+        self.time_ns = 0
+        self.mouse_locked = False
+        self.objects:dict[int, Object3D] = {}
+        self.objects2d:dict[int, Object2D] = {}
+        self.texts:dict[int, Text] = {}
+        self.emitters:dict[int, Emitter] = {}
+        self.point_lights:dict[int, PointLight] = {}
+        self.directional_lights:dict[int, DirectionalLight] = {}
+        self.spot_lights:dict[int, SpotLight] = {}
+
+    @property
+    def deltatime(self) -> float:
+        return self.dt
+
+    @property
+    def time(self) -> int:
+        return self.time_ns // 1_000_000_000
+
+    def update(self):
+        self.frame += 1
+        self.time_ns += int(self.dt * 1e9)
+        if self.script:
+            self.script(self, self.frame)
+
+    def lock_mouse(self, lock:bool):
+        self.mouse_locked = lock
+
+    # Scripted input
+
+    def press(self, *flags:EVENT_FLAG):
+        for flag in flags:
+            self.event.flags[flag] = EVENT_STATE.PRESSED
+
+    def release(self, *flags:EVENT_FLAG):
+        for flag in flags:
+            self.event.flags.pop(flag, None)
+
+    def move_mouse(self, rel_x:int, rel_y:int):
+        mouse = self.event.mouse
+        mouse.rel_x = rel_x
+        mouse.rel_y = rel_y
+        if rel_x or rel_y:
+            self.event.flags[EVENT_FLAG.MOUSE_MOTION] = EVENT_STATE.PRESSED
+        else:
+            self.event.flags.pop(EVENT_FLAG.MOUSE_MOTION, None)
+
+    def set_mouse_button(self, pressed:bool, x:int | None = None, y:int | None = None):
+        mouse = self.event.mouse
+        if x is not None:
+            mouse.x = x
+        if y is not None:
+            mouse.y = y
+        mouse.state = EVENT_STATE.PRESSED if pressed else EVENT_STATE.RELEASED
+        mouse.type = MOUSE_EVENT_TYPE.BUTTON_DOWN if pressed else MOUSE_EVENT_TYPE.BUTTON_UP
+
+    def clear_input(self):
+        self.event.flags.clear()
+        self.move_mouse(0, 0)
+        self.event.mouse.state = EVENT_STATE.NONE
+        self.event.mouse.type = MOUSE_EVENT_TYPE.NONE
+
+    def quit(self):
+        self.event.flags[EVENT_FLAG.QUIT] = EVENT_STATE.PRESSED
+
+    # Rendering, only bookkeeping of what would be drawn.
+
+    def add_object(self, obj:Object3D):
+        self.objects[id(obj)] = obj
+
+    def remove_object(self, obj:Object3D):
+        self.objects.pop(id(obj), None)
+
+    def add_object_list(self, objs:list[Object3D]):
+        for obj in objs:
+            self.objects[id(obj)] = obj
+
+    def remove_object_list(self, objs:list[Object3D]):
+        for obj in objs:
+            self.objects.pop(id(obj), None)
+
+    def add_object2d(self, obj:Object2D):
+        self.objects2d[id(obj)] = obj
+
+    def remove_object2d(self, obj:Object2D):
+        self.objects2d.pop(id(obj), None)
+
+    def add_object2d_list(self, objs:list[Object2D]):
+        for obj in objs:
+            self.objects2d[id(obj)] = obj
+
+    def remove_object2d_list(self, objs:list[Object2D]):
+        for obj in objs:
+            self.objects2d.pop(id(obj), None)
+
+    def add_text(self, obj:Text):
+        self.texts[id(obj)] = obj
+
+    def remove_text(self, obj:Text):
+        self.texts.pop(id(obj), None)
+
+    def add_text_list(self, objs:list[Text]):
+        for obj in objs:
+            self.texts[id(obj)] = obj
+
+    def remove_text_list(self, objs:list[Text]):
+        for obj in objs:
+            self.texts.pop(id(obj), None)
+
+    def add_emitter(self, obj:Emitter):
+        self.emitters[id(obj)] = obj
+
+    def remove_emitter(self, obj:Emitter):
+        self.emitters.pop(id(obj), None)
+
+    def add_emitter_list(self, objs:list[Emitter]):
+        for obj in objs:
+            self.emitters[id(obj)] = obj
+
+    def remove_emitter_list(self, objs:list[Emitter]):
+        for obj in objs:
+            self.emitters.pop(id(obj), None)
+
+    def add_point_light(self, obj:PointLight):
+        self.point_lights[id(obj)] = obj
+
+    def remove_point_light(self, obj:PointLight):
+        self.point_lights.pop(id(obj), None)
+
+    def add_point_light_list(self, objs:list[PointLight]):
+        for obj in objs:
+            self.point_lights[id(obj)] = obj
+
+    def remove_point_light_list(self, objs:list[PointLight]):
+        for obj in objs:
+            self.point_lights.pop(id(obj), None)
+
+    def add_directional_light(self, obj:DirectionalLight):
+        self.directional_lights[id(obj)] = obj
+
+    def remove_directional_light(self, obj:DirectionalLight):
+        self.directional_lights.pop(id(obj), None)
+
+    def add_directional_light_list(self, objs:list[DirectionalLight]):
+        for obj in objs:
+            self.directional_lights[id(obj)] = obj
+
+    def remove_directional_light_list(self, objs:list[DirectionalLight]):
+        for obj in objs:
+            self.directional_lights.pop(id(obj), None)
+
+    def add_spot_light(self, obj:SpotLight):
+        self.spot_lights[id(obj)] = obj
+
+    def remove_spot_light(self, obj:SpotLight):
+        self.spot_lights.pop(id(obj), None)
+
+    def add_spot_light_list(self, objs:list[SpotLight]):
+        for obj in objs:
+            self.spot_lights[id(obj)] = obj
+
+    def remove_spot_light_list(self, objs:list[SpotLight]):
+        for obj in objs:
+            self.spot_lights.pop(id(obj), None)
+
+# Assets, nothing is decoded.
+
+class Shader:
+    def __init__(self, source:str, shader_type:ShaderType) -> None:
+        self.source = source
+        self.type = shader_type
+
+    @classmethod
+    def from_file(cls, filepath:str, type:ShaderType) -> Shader:
+        with open(filepath) as f:
+            return cls(f.read(), type)
+
+class Material:
+    def __init__(self, vertex:Shader | None = None, fragment:Shader | None = None, geometry:Shader | None = None, compute:Shader | None = None, animated:bool = False) -> None:
+        self.vertex = vertex
+        self.fragment = fragment
+        self.geometry = geometry
+        self.compute = compute
+        self.animated = animated
+        self.diffuse_texture:Texture | None = None
+        self.specular_texture:Texture | None = None
+        self.normals_texture:Texture | None = None
+
+    def set_uniform(self, name:str, value:any):
+        unsupported_uniform(name, value)
+
+class Texture:
+    def __init__(self, file_path:str = "", wrap:TextureWraping = TextureWraping.REPEAT, filtering:TextureFiltering = TextureFiltering.LINEAR) -> None:
+        self.file_path = file_path
+        self.wrap = wrap
+        self.filtering = filtering
+        self._size:tuple[int, int] | None = None
+
+    @property
+    def size(self) -> tuple[int, int]:
+        # Read from the image's header, for sizing sprites like Loxoc does.
+        if self._size is None:
+            from game_tools.assets import _image_size
+            self._size = _image_size(self.file_path) or (1, 1)
+        return self._size
+
+    @classmethod
+    def from_file(cls, file_path:str, wrap:TextureWraping = TextureWraping.REPEAT, filtering:TextureFiltering = TextureFiltering.LINEAR) -> Texture:
+        return cls(file_path, wrap, filtering)
+
+class Sprite:
+    def __init__(self, file_path:str) -> None:
+        self.texture = Texture(file_path)
+
+    @classmethod
+    def from_texture(cls, tex:Texture) -> Sprite:
+        sprite = cls.__new__(cls)
+        sprite.texture = tex
+        return sprite
+
+class Mesh:
+    def __init__(self, name:str = "") -> None:
+        self.name = name
+
+    @staticmethod
+    def from_file(file_path:str, animated:bool = False) -> Model:
+        return Model.from_file(file_path, animated)
+
+class MeshDict:
+    def __init__(self, name:str, meshes:list[Mesh | MeshDict]) -> None:
+        self.name = name
+        self.meshes = {mesh.name: mesh for mesh in meshes}
+
+    def __iter__(self):
+        return iter(self.meshes.items())
+
+class Model:
+    def __init__(self, mesh_dict:MeshDict, animated:bool = False) -> None:
+        self.mesh_dict = mesh_dict
+        self.animated = animated
+        self.use_default_material_properties = True
+
+    @staticmethod
+    def from_file(file_path:str, animated:bool = False) -> Model:
+        return Model(MeshDict(file_path, [Mesh(file_path)]), animated)
+
+class Font:
+    def __init__(self, font_path:str, font_size:int = 48) -> None:
+        self.font_path = font_path
+        self.font_size = font_size
+
+# Scene objects
+
+class Object3D:
+    def __init__(self, model_data:Model, position:Vec3 | None = None, rotation:Vec3 | Quaternion | None = None, scale:Vec3 | None = None, collider:Collider | None = None, material:Material | None = None) -> None:
+        self.model = model_data
+        self.position = position if position else Vec3(0.0, 0.0, 0.0)
+        self.rotation = rotation if rotation else Quaternion(1.0, 0.0, 0.0, 0.0)
+        self.scale = scale if scale else Vec3(1.0, 1.0, 1.0)
+        self.material = material if material else Material()
+        self.use_default_material_properties = True
+        self.colliders:list[Collider] = []
+        if collider:
+            self.add_collider(collider)
+
+    # Transforms are copied in like Loxoc does, so the caller's vectors stay independent.
+
+    @property
+    def position(self) -> Vec3:
+        return self._position
+
+    @position.setter
+    def position(self, value:Vec3):
+        self._position = copy(value)
+
+    @property
+    def rotation(self) -> Quaternion:
+        return self._rotation
+
+    @rotation.setter
+    def rotation(self, value:Vec3 | Quaternion):
+        self._rotation = copy(value) if isinstance(value, Quaternion) else Quaternion.from_euler(value)
+
+    @property
+    def scale(self) -> Vec3:
+        return self._scale
+
+    @scale.setter
+    def scale(self, value:Vec3):
+        self._scale = copy(value)
+
+    def add_collider(self, collider:Collider):
+        self.colliders.append(collider)
+
+    def remove_collider(self, collider:Collider):
+        self.colliders.remove(collider)
+
+    def check_collision(self, other:Vec3 | Object3D) -> bool:
+        # Like Loxoc, only points and objects, a Collider is never hit.
+        if not isinstance(other, (Vec3, Object3D)):
+            return False
+        return any(collider.check_collision(other) for collider in self.colliders)
+
+    def get_model_matrix(self) -> Matrix4x4:
+        return Matrix4x4.from_identity(1.0)
+
+class Object2D:
+    def __init__(self, sprite:Sprite, camera:Camera, position:Vec2 | None = None, depth:float = 0.0, rotation:float = 0.0, scale:Vec2 | None = None, material:Material | None = None) -> None:
+        self.sprite = sprite
+        self.camera = camera
+        self.position = position if position else Vec2(0.0, 0.0)
+        self.depth = depth
+        self.rotation = rotation
+        self.scale = scale if scale else Vec2(1.0, 1.0)
+        self.material = material if material else Material()
+
+    def set_uniform(self, name:str, value:any):
+        unsupported_uniform(name, value)
+
+    def _quad(self) -> tuple[float, float]:
+        # Like Loxoc, 2 * (w, h) / |(w, h)| of the texture, only its aspect ratio counts.
+        width, height = self.sprite.texture.size
+        length = math.hypot(width, height)
+        return 2.0 * width / length, 2.0 * height / length
+
+    @property
+    def untransformed_dimensions(self) -> Vec2:
+        # In Loxoc this is the quad over half the view.
+        width, height = self._quad()
+        return Vec2(width / (self.camera.view_width / 2), height / (self.camera.view_height / 2))
+
+    @property
+    def dimensions(self) -> Vec2:
+        width, height = self._quad()
+        return Vec2(width * self.scale.x, height * self.scale.y)
+
+    @property
+    def width(self) -> float:
+        return self._quad()[0] * self.scale.x
+
+    @property
+    def height(self) -> float:
+        return self._quad()[1] * self.scale.y
+
+class Text:
+    def __init__(self, text_string:str, color:Vec4, position:Vec2, scale:Vec2 | None = None, rotation:float = 0, font:Font | None = None, material:Material | None = None) -> None:
+        self.text = text_string
+        self.color = color
+        self.position = position
+        self.scale = scale if scale else Vec2(1.0, 1.0)
+        self.rotation = rotation
+        self.font = font
+        self.material = material if material else Material()
+
+class Emitter:
+    def __init__(self, position:Vec3, direction:Quaternion, scale_min:Vec2 | None = None, scale_max:Vec2 | None = None, rate:int = 50, decay_rate:float = 1.0, spread:float = math.radians(30), velocity_decay:float = 1.0, start_velocity_min:float = 1.0, start_velocity_max:float = 1.0, start_lifetime_min:float = 10.0, start_lifetime_max:float = 10.0, color_min:Vec4 | None = None, color_max:Vec4 | None = None, material:Material | None = None) -> None:
+        self.position = position
+        self.direction = direction
+        self.scale_min = scale_min if scale_min else Vec2(1.0, 1.0)
+        self.scale_max = scale_max if scale_max else Vec2(1.0, 1.0)
+        self.rate = rate
+        self.decay_rate = decay_rate
+        self.spread = spread
+        self.velocity_decay = velocity_decay
+        self.start_velocity_min = start_velocity_min
+        self.start_velocity_max = start_velocity_max
+        self.start_lifetime_min = start_lifetime_min
+        self.start_lifetime_max = start_lifetime_max
+        self.color_min = color_min if color_min else Vec4(1.0, 1.0, 1.0, 1.0)
+        self.color_max = color_max if color_max else Vec4(1.0, 1.0, 1.0, 1.0)
+        self.material = material if material else Material()
+        self.running = False
+
+    def start(self):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+# Colliders, all tested as axis aligned boxes.
+
+class Collider:
+    def __init__(self, object:Object3D | None = None, offset:Vec3 | None = None, rotation:Vec3 | Quaternion | None = None, scale:Vec3 | None = None) -> None:
+        self.object = object
+        self.offset = offset if offset else Vec3(0.0, 0.0, 0.0)
+        self.rotation = rotation if isinstance(rotation, Quaternion) else Quaternion.from_euler(rotation if rotation else Vec3(0.0, 0.0, 0.0))
+        self.scale = scale if scale else Vec3(1.0, 1.0, 1.0)
+        self.show = False
+        # Model space bounds, the unit cube for colliders built from an object.
+        self.upper = Vec3(1.0, 1.0, 1.0)
+        self.lower = Vec3(-1.0, -1.0, -1.0)
+
+    def bounds(self) -> tuple[float, float, float, float, float, float]:
+        upper = self.upper
+        lower = self.lower
+        scale = self.scale
+        sx, sy, sz = scale.x, scale.y, scale.z
+        cx, cy, cz = self.offset.x, self.offset.y, self.offset.z
+        if self.object is not None:
+            obj_scale = self.object.scale
+            sx *= obj_scale.x
+            sy *= obj_scale.y
+            sz *= obj_scale.z
+            position = self.object.position
+            cx += position.x
+            cy += position.y
+            cz += position.z
+        return (
+            cx + min(lower.x * sx, upper.x * sx), cy + min(lower.y * sy, upper.y * sy), cz + min(lower.z * sz, upper.z * sz),
+            cx + max(lower.x * sx, upper.x * sx), cy + max(lower.y * sy, upper.y * sy), cz + max(lower.z * sz, upper.z * sz)
+        )
+
+    def check_collision(self, intersection:Vec3 | Collider | Object3D) -> bool:
+        x0, y0, z0, x1, y1, z1 = self.bounds()
+        if isinstance(intersection, Vec3):
+            return x0 <= intersection.x <= x1 and y0 <= intersection.y <= y1 and z0 <= intersection.z <= z1
+        if isinstance(intersection, Object3D):
+            return any(self.check_collision(collider) for collider in intersection.colliders)
+        if isinstance(intersection, RayCollider):
+            return intersection.get_collision(self).hit
+        ox0, oy0, oz0, ox1, oy1, oz1 = intersection.bounds()
+        return x0 <= ox1 and ox0 <= x1 and y0 <= oy1 and oy0 <= y1 and z0 <= oz1 and oz0 <= z1
+
+    def dbg_render(self, cam:Camera):
+        pass
+
+class BoxCollider(Collider):
+    @classmethod
+    def from_bounds(cls, upper_bound:Vec3 | None = None, lower_bound:Vec3 | None = None, offset:Vec3 | None = None, rotation:Vec3 | Quaternion | None = None, scale:Vec3 | None = None) -> BoxCollider:
+        collider = cls(None, offset, rotation, scale)
+        collider.upper = upper_bound if upper_bound else Vec3(10.0, 10.0, 10.0)
+        collider.lower = lower_bound if lower_bound else Vec3(-10.0, -10.0, -10.0)
+        return collider
+
+class ConvexCollider(Collider):
+    @classmethod
+    def from_mesh(cls, msh:Mesh, offset:Vec3 | None = None, rotation:Vec3 | Quaternion | None = None, scale:Vec3 | None = None) -> ConvexCollider:
+        return cls(None, offset, rotation, scale)
+
+    @classmethod
+    def from_mesh_dict(cls, msh_dict:MeshDict, offset:Vec3 | None = None, rotation:Vec3 | Quaternion | None = None, scale:Vec3 | None = None) -> ConvexCollider:
+        return cls(None, offset, rotation, scale)
+
+class RayHit:
+    def __init__(self, hit:bool = False, position:Vec3 | None = None, normal:Vec3 | None = None, distance:float = 0.0) -> None:
+        self.hit = hit
+        self.position = position if position else Vec3(0.0, 0.0, 0.0)
+        self.normal = normal if normal else Vec3(0.0, 0.0, 0.0)
+        self.distance = distance
+        self.has_normal = normal is not None
+        self.has_distance = hit
+
+class RayCollider(Collider):
+    def __init__(self, origin:Vec3, direction:Quaternion) -> None:
+        super().__init__()
+        self.origin = origin
+        self.direction = direction
+
+    def get_collision(self, other:Collider | Object3D) -> RayHit:
+        if isinstance(other, Object3D):
+            nearest = RayHit()
+            for collider in other.colliders:
+                hit = self.get_collision(collider)
+                if hit.hit and (not nearest.hit or hit.distance < nearest.distance):
+                    nearest = hit
+            return nearest
+        forward = self.direction.forward
+        origin = self.origin
+        t_near = 0.0
+        t_far = math.inf
+        normal_axis = -1
+        x0, y0, z0, x1, y1, z1 = other.bounds()
+        for axis, o, d, lo, hi in ((0, origin.x, forward.x, x0, x1), (1, origin.y, forward.y, y0, y1), (2, origin.z, forward.z, z0, z1)):
+            if d == 0:
+                if o < lo or o > hi:
+                    return RayHit()
+                continue
+            t0 = (lo - o) / d
+            t1 = (hi - o) / d
+            if t0 > t1:
+                t0, t1 = t1, t0
+            if t0 > t_near:
+                t_near = t0
+                normal_axis = axis
+            t_far = min(t_far, t1)
+            if t_near > t_far:
+                return RayHit()
+        normal = Vec3(0.0, 0.0, 0.0)
+        if normal_axis == 0:
+            normal.x = -math.copysign(1.0, forward.x)
+        elif normal_axis == 1:
+            normal.y = -math.copysign(1.0, forward.y)
+        elif normal_axis == 2:
+            normal.z = -math.copysign(1.0, forward.z)
+        return RayHit(True, origin + forward * t_near, normal, t_near)
+
+    def check_collision(self, intersection:Vec3 | Collider | Object3D) -> bool:
+        if isinstance(intersection, Vec3):
+            return False
+        return self.get_collision(intersection).hit
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from Loxoc import Event, EVENT_FLAG, EVENT_STATE, MOUSE_BUTTON
+
+from collections import namedtuple
+from typing import NamedTuple
+
+class InputState(NamedTuple):
+    # Everything the game reads about the keyboard and mouse in one frame.  down, pressed and
+    # released hold one bool per action under the action's name, pressed and released only
+    # on the frame the action changed.
+    frame:int
+    down:tuple
+    pressed:tuple
+    released:tuple
+    mouse_x:int
+    mouse_y:int
+    mouse_rel_x:int
+    mouse_rel_y:int
+    mouse_moving:bool
+    mouse_down:bool
+    mouse_pressed:bool
+    mouse_released:bool
+
+class InputMap:
+    # Maps raw keys and mouse buttons to named actions and polls them once per frame.  An
+    # action is down while any of its bindings is.
+    def __init__(self, bindings:dict[str, tuple[EVENT_FLAG | MOUSE_BUTTON, ...]] | None = None) -> None:
+        self.bindings:dict[str, tuple[EVENT_FLAG | MOUSE_BUTTON, ...]] = {}
+        self.frame = 0
+        self.bind_all(bindings if bindings else {})
+
+    def bind(self, action:str, *inputs:EVENT_FLAG | MOUSE_BUTTON):
+        self.bindings[action] = inputs
+        self._layout()
+
+    def bind_all(self, bindings:dict[str, tuple[EVENT_FLAG | MOUSE_BUTTON, ...]]):
+        self.bindings.update(bindings)
+        self._layout()
+
+    def require(self, actions:tuple[str, ...], user:str):
+        # Fails up front rather than with an AttributeError the first frame an unbound action is read.
+        missing = [action for action in actions if action not in self.bindings]
+        if missing:
+            raise ValueError(f"{user} reads the input actions {', '.join(missing)}, which aren't bound.  Pass them to Game(bindings=...).")
+
+    def _layout(self):
+        actions = tuple(self.bindings)
+        self.actions_type = namedtuple("Actions", actions)
+        self.keys = tuple({key for inputs in self.bindings.values() for key in inputs if isinstance(key, EVENT_FLAG)})
+        # Mouse buttons and keys share integer values, so they are matched separately.
+        self._bindings = tuple(
+            (frozenset(key for key in inputs if isinstance(key, EVENT_FLAG)), frozenset(button for button in inputs if isinstance(button, MOUSE_BUTTON)))
+            for inputs in self.bindings.values()
+        )
+        released = self.actions_type(*(False for _ in actions))
+        self.state = InputState(self.frame, released, released, released, 0, 0, 0, 0, False, False, False, False)
+
+    def poll(self, event:Event) -> InputState:
+        # Reads every bound key once and derives the actions and edges from that.
+        previous = self.state
+        get_flag = event.get_flag
+        pressed_state = EVENT_STATE.PRESSED
+        active = {key for key in self.keys if get_flag(key) == pressed_state}
+        mouse = event.mouse
+        mouse_down = mouse.state == pressed_state
+        button = mouse.button if mouse_down else None
+
+        down = self.actions_type(*(not active.isdisjoint(keys) or button in buttons for keys, buttons in self._bindings))
+        was_down = previous.down
+        self.frame += 1
+        self.state = InputState(
+            self.frame,
+            down,
+            self.actions_type(*(now and not before for now, before in zip(down, was_down))),
+            self.actions_type(*(before and not now for now, before in zip(down, was_down))),
+            mouse.x, mouse.y, mouse.rel_x, mouse.rel_y,
+            event.check_flag(EVENT_FLAG.MOUSE_MOTION),
+            mouse_down, mouse_down and not previous.mouse_down, previous.mouse_down and not mouse_down
+        )
+        return self.state
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from Loxoc import Vec3, Object3D
+
+from copy import copy
+
+def lerp_vec3(a:Vec3, b:Vec3, alpha:float) -> Vec3:
+    return Vec3(a.x + (b.x - a.x) * alpha, a.y + (b.y - a.y) * alpha, a.z + (b.z - a.z) * alpha)
+
+class TransformInterpolator:
+    # Blends Object3D positions between the last two simulation ticks for rendering.
+    # Object3D.position stays the simulated position everywhere except between apply()
+    # and restore(), which a scene wraps around window.update().
+    def __init__(self) -> None:
+        self.objects:list[Object3D] = []
+        self.previous:list[Vec3] = []
+        self.current:list[Vec3] = []
+
+    def add(self, obj:Object3D):
+        self.objects.append(obj)
+        self.previous.append(copy(obj.position))
+        self.current.append(copy(obj.position))
+
+    def remove(self, obj:Object3D):
+        index = self.objects.index(obj)
+        del self.objects[index]
+        del self.previous[index]
+        del self.current[index]
+
+    def clear(self):
+        self.objects.clear()
+        self.previous.clear()
+        self.current.clear()
+
+    def reset(self):
+        # Drops the previous tick, for objects that were moved without simulating.
+        for i, obj in enumerate(self.objects):
+            self.previous[i] = copy(obj.position)
+            self.current[i] = copy(obj.position)
+
+    def begin_step(self):
+        # Call at the start of every simulation tick.
+        for i, obj in enumerate(self.objects):
+            self.previous[i] = copy(obj.position)
+
+    def apply(self, alpha:float):
+        for i, obj in enumerate(self.objects):
+            current = copy(obj.position)
+            self.current[i] = current
+            if alpha < 1.0:
+                obj.position = lerp_vec3(self.previous[i], current, alpha)
+
+    def restore(self):
+        for i, obj in enumerate(self.objects):
+            obj.position = self.current[i]
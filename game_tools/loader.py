@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+from Loxoc import Shader, ShaderType, TextureFiltering, TextureWraping
+
+from typing import TYPE_CHECKING, Callable
+from collections import deque
+import time
+import mmap
+import os
+
+from game_tools.assets import AssetCache, AssetKey, estimate_size
+from game_tools.bake import AssetBake, map_file
+
+if TYPE_CHECKING:
+    from game_tools.scene import Scene
+    from game_tools.atlas import SpriteAtlas
+    from concurrent.futures import ThreadPoolExecutor, Future
+
+class AssetRequest:
+    # Describes an asset a scene borrows in Scene.load so it can be fetched ahead of time.
+    def __init__(self, kind:str, path:str, **options:dict[str, any]) -> None:
+        self.kind = kind
+        self.path = path
+        self.options = options
+
+    @property
+    def key(self) -> AssetKey:
+        if self.kind == "atlas":
+            return ("atlas", self.path, self.options["filtering"])
+        return getattr(AssetCache, f"{self.kind}_key")(self.path, **self.options)
+
+    def __repr__(self) -> str:
+        return f"AssetRequest({self.kind!r}, {self.path!r})"
+
+    @classmethod
+    def model(cls, path:str, animated:bool = False) -> AssetRequest:
+        return cls("model", path, animated=animated)
+
+    @classmethod
+    def texture(cls, path:str, wrap:TextureWraping = TextureWraping.REPEAT, filtering:TextureFiltering = TextureFiltering.LINEAR) -> AssetRequest:
+        return cls("texture", path, wrap=wrap, filtering=filtering)
+
+    @classmethod
+    def sprite(cls, path:str, wrap:TextureWraping = TextureWraping.REPEAT, filtering:TextureFiltering = TextureFiltering.LINEAR) -> AssetRequest:
+        return cls("sprite", path, wrap=wrap, filtering=filtering)
+
+    @classmethod
+    def shader(cls, path:str, shader_type:ShaderType) -> AssetRequest:
+        return cls("shader", path, shader_type=shader_type)
+
+    @classmethod
+    def font(cls, path:str, font_size:int = 48) -> AssetRequest:
+        return cls("font", path, font_size=font_size)
+
+    @classmethod
+    def atlas(cls, atlas:SpriteAtlas, filtering:TextureFiltering = TextureFiltering.LINEAR) -> AssetRequest:
+        # The pages of an atlas, as Scene.load_sprite_batch borrows them.  The atlas is packed,
+        # or checked for changed sprites, on the worker.
+        return cls("atlas", atlas.name, atlas=atlas, filtering=filtering)
+
+    def pages(self) -> list[AssetRequest]:
+        # An atlas request's pages once the atlas is loaded.
+        return [AssetRequest.sprite(page, TextureWraping.CLAMP_TO_EDGE, self.options["filtering"]) for page in self.options["atlas"].pages]
+
+def dependent_files(path:str) -> list[str]:
+    # A .gltf also pulls in its external buffers and images.
+    files = [path]
+    if path.endswith(".gltf"):
+        import json
+        with open(path, "r") as f:
+            data = json.load(f)
+        directory = os.path.dirname(path)
+        for entry in data.get("buffers", []) + data.get("images", []):
+            uri:str | None = entry.get("uri")
+            if uri and not uri.startswith("data:"):
+                files.append(os.path.join(directory, uri))
+    return files
+
+def read_request(request:AssetRequest, bake:AssetBake | None = None, atlas_directory:str = ".asset_cache/atlas") -> bytes | None:
+    # Runs on a worker thread.  Every file the engine will open is read once so
+    # the main thread only pays for decoding and uploading out of the OS file cache.
+    # Shader sources are returned so they never have to touch the disk on the main thread.
+    if request.kind == "atlas":
+        request.options["atlas"].load(atlas_directory)
+        for page in request.pages():
+            read_request(page, bake)
+        return None
+    if bake and request.kind in ("model", "texture", "sprite"):
+        # Bakes anything missing off the main thread, the baked file only has to be paged in.
+        baked = bake.resolve(request.path, bake_missing=True)
+        if baked != request.path:
+            mapped = map_file(baked)
+            if hasattr(mapped, "madvise"):
+                mapped.madvise(mmap.MADV_WILLNEED)
+            mapped.close()
+            return None
+    data = None
+    for path in dependent_files(request.path):
+        with open(path, "rb") as f:
+            data = f.read()
+    return data if request.kind == "shader" else None
+
+class PreloadJob:
+    def __init__(self, scene:Scene, requests:list[AssetRequest], on_progress:Callable[[float], None] | None = None) -> None:
+        self.scene = scene
+        self.requests = requests
+        self.on_progress = on_progress
+        self.pending:deque[tuple[AssetRequest, Future]] = deque()
+        # Keys the job keeps borrowed so nothing it loaded is evicted before the scene borrows it.
+        self.held:list[AssetKey] = []
+        self.completed = 0
+        self.cancelled = False
+
+    @property
+    def total(self) -> int:
+        return len(self.requests)
+
+    @property
+    def progress(self) -> float:
+        return self.completed / self.total if self.total else 1.0
+
+    @property
+    def done(self) -> bool:
+        return self.completed == self.total
+
+class SceneLoader:
+    def __init__(self, assets:AssetCache, workers:int = 4, frame_budget:float = 0.004, atlas_directory:str = ".asset_cache/atlas") -> None:
+        # frame_budget is the number of seconds per frame the main thread may spend creating engine assets.
+        self.assets = assets
+        self.atlas_directory = atlas_directory
+        self.frame_budget = frame_budget
+        self.workers = workers
+        # Started by the first preload, concurrent.futures is slow to import and the first
+        # scene doesn't need it.
+        self._executor:ThreadPoolExecutor | None = None
+        self.jobs:list[PreloadJob] = []
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scene_loader")
+        return self._executor
+
+    def preload(self, scene:Scene, on_progress:Callable[[float], None] | None = None) -> PreloadJob:
+        for job in self.jobs:
+            if job.scene is scene:
+                if on_progress:
+                    job.on_progress = on_progress
+                return job
+        job = PreloadJob(scene, list(scene.manifest), on_progress)
+        for request in job.requests:
+            if request.key in self.assets:
+                # Already resident, just hold it.
+                self._finish(job, request, None)
+            else:
+                job.pending.append((request, self.executor.submit(read_request, request, self.assets.bake, self.atlas_directory)))
+        self.jobs.append(job)
+        if job.on_progress:
+            job.on_progress(job.progress)
+        return job
+
+    def job_for(self, scene:Scene) -> PreloadJob | None:
+        for job in self.jobs:
+            if job.scene is scene:
+                return job
+        return None
+
+    def pump(self):
+        # Called once per frame on the main thread.  Finished reads are turned into
+        # engine assets in request order until the frame budget runs out.
+        if not self.jobs:
+            return
+        start = time.perf_counter()
+        for job in self.jobs:
+            while job.pending and job.pending[0][1].done():
+                request, future = job.pending.popleft()
+                self._finish(job, request, future.result())
+                if job.on_progress:
+                    job.on_progress(job.progress)
+                if time.perf_counter() - start >= self.frame_budget:
+                    return
+
+    def wait(self, job:PreloadJob):
+        # Blocks until every asset of the job is resident.
+        while job.pending:
+            request, future = job.pending.popleft()
+            self._finish(job, request, future.result())
+            if job.on_progress:
+                job.on_progress(job.progress)
+
+    def release(self, job:PreloadJob):
+        # Gives up the job's hold on its assets, normally right after the scene borrowed them in Scene.load.
+        for _, future in job.pending:
+            future.cancel()
+        job.pending.clear()
+        job.cancelled = True
+        for key in job.held:
+            self.assets.release(key)
+        job.held.clear()
+        if job in self.jobs:
+            self.jobs.remove(job)
+
+    def shutdown(self):
+        for job in list(self.jobs):
+            self.release(job)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _finish(self, job:PreloadJob, request:AssetRequest, data:bytes | None):
+        if request.kind == "atlas":
+            # Holds the pages, the atlas itself isn't an engine asset.
+            for page in request.pages():
+                self.assets.sprite(page.path, **page.options)
+                job.held.append(page.key)
+            job.completed += 1
+            return
+        if request.kind == "shader" and data is not None and request.key not in self.assets:
+            source = data.decode()
+            shader_type = request.options["shader_type"]
+            self.assets.acquire(request.key, lambda: Shader(source, shader_type), estimate_size(request.path, "shader"))
+        else:
+            getattr(self.assets, request.kind)(request.path, **request.options)
+        job.held.append(request.key)
+        job.completed += 1
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from Loxoc import Vec3, Quaternion, RayCollider, Collider, Object3D
+
+from game_tools.broadphase import SpatialHash, ALL_LAYERS
+from game_tools.collision import AABB
+
+from typing import Callable, Iterable
+import numpy as np
+import math
+
+class RaycastHit:
+    __slots__ = ("target", "distance", "position", "normal")
+
+    def __init__(self, target:any, distance:float, position:Vec3, normal:Vec3 | None) -> None:
+        self.target = target
+        self.distance = distance
+        self.position = position
+        self.normal = normal
+
+    def __repr__(self) -> str:
+        return f"RaycastHit({self.target!r}, {self.distance})"
+
+class Raycaster:
+    # Exact ray queries against a broadphase.  The broadphase orders the candidates by where
+    # the ray enters their bounds, the RayCollider test then only runs until no remaining
+    # candidate can be nearer than the best hit.  collider maps a broadphase target to what
+    # the ray is tested against, by default the target itself (an Object3D or Collider).
+    def __init__(self, broadphase:SpatialHash) -> None:
+        self.broadphase = broadphase
+        self.ray = RayCollider(Vec3(0.0, 0.0, 0.0), Quaternion(1.0, 0.0, 0.0, 0.0))
+        # Exact tests run by the last query, to see how much the early out saves.
+        self.tests = 0
+
+    def _test(self, origin:Vec3, target:any, collider:Callable[[any], Collider | Object3D] | None) -> RaycastHit | None:
+        self.tests += 1
+        hit = self.ray.get_collision(collider(target) if collider else target)
+        if not hit.hit:
+            return None
+        distance = hit.distance if hit.has_distance else origin.distance(hit.position)
+        return RaycastHit(target, distance, hit.position, hit.normal if hit.has_normal else None)
+
+    def _nearest(self, origin:Vec3, candidates:Iterable[tuple[any, float]], max_distance:float, collider:Callable[[any], Collider | Object3D] | None) -> RaycastHit | None:
+        # candidates are sorted by the distance the ray enters their bounds, which no exact
+        # hit on them can be closer than.
+        best = None
+        best_distance = max_distance
+        for target, entry_distance in candidates:
+            if entry_distance > best_distance:
+                break
+            hit = self._test(origin, target, collider)
+            if hit is not None and hit.distance <= best_distance:
+                best = hit
+                best_distance = hit.distance
+        return best
+
+    def cast(self, origin:Vec3, direction:Quaternion, max_distance:float = math.inf, layers:int = ALL_LAYERS, exclude:any = None, collider:Callable[[any], Collider | Object3D] | None = None) -> RaycastHit | None:
+        # Nearest hit along direction.forward within max_distance.
+        self.tests = 0
+        self.ray.origin = origin
+        self.ray.direction = direction
+        candidates = self.broadphase.raycast_all(origin, direction.forward, max_distance, layers, exclude)
+        return self._nearest(origin, candidates, max_distance, collider)
+
+    def cast_all(self, origin:Vec3, direction:Quaternion, max_distance:float = math.inf, layers:int = ALL_LAYERS, exclude:any = None, collider:Callable[[any], Collider | Object3D] | None = None) -> list[RaycastHit]:
+        # Every hit within max_distance, nearest first.
+        self.tests = 0
+        self.ray.origin = origin
+        self.ray.direction = direction
+        hits = []
+        for target, _ in self.broadphase.raycast_all(origin, direction.forward, max_distance, layers, exclude):
+            hit = self._test(origin, target, collider)
+            if hit is not None and hit.distance <= max_distance:
+                hits.append(hit)
+        hits.sort(key=lambda hit: hit.distance)
+        return hits
+
+    def _cast_each(self, rays:list[tuple[Vec3, Quaternion]], max_distance:float, layers:int, exclude:any, collider:Callable[[any], Collider | Object3D] | None) -> list[RaycastHit | None]:
+        results = []
+        tests = 0
+        for origin, direction in rays:
+            results.append(self.cast(origin, direction, max_distance, layers, exclude, collider))
+            tests += self.tests
+        self.tests = tests
+        return results
+
+    def cast_many(self, rays:list[tuple[Vec3, Quaternion]], max_distance:float = math.inf, layers:int = ALL_LAYERS, exclude:any = None, collider:Callable[[any], Collider | Object3D] | None = None) -> list[RaycastHit | None]:
+        # Nearest hit of each (origin, direction) ray, e.g. shotgun pellets.  With a max
+        # distance the broadphase is queried once for the bounds of every ray and all rays are
+        # slab tested against those shared candidates in one array operation.
+        if not math.isfinite(max_distance) or len(rays) < 2:
+            return self._cast_each(rays, max_distance, layers, exclude, collider)
+
+        origins = np.array([(origin.x, origin.y, origin.z) for origin, _ in rays]).T
+        forwards = [direction.forward for _, direction in rays]
+        directions = np.array([(forward.x, forward.y, forward.z) for forward in forwards]).T
+        directions /= np.linalg.norm(directions, axis=0)
+        ends = origins + directions * max_distance
+        lo = np.minimum(origins, ends).min(axis=1).tolist()
+        hi = np.maximum(origins, ends).max(axis=1).tolist()
+        bounds = AABB(*lo, *hi)
+        # A few rays fanning out wide are cheaper walked one at a time, the shared query
+        # pays off once it visits fewer cells than the rays would between them.
+        x0, y0, z0, x1, y1, z1 = self.broadphase._cell_range(bounds)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) * (z1 - z0 + 1) > len(rays) * max_distance * self.broadphase.inv_cell_size:
+            return self._cast_each(rays, max_distance, layers, exclude, collider)
+        entries = self.broadphase.query_entries(bounds, layers, exclude)
+        self.tests = 0
+        if not entries:
+            return [None] * len(rays)
+
+        # Slab test of every ray against every shared candidate, (axis, ray, box).
+        boxes = np.array([(e.aabb.x0, e.aabb.y0, e.aabb.z0, e.aabb.x1, e.aabb.y1, e.aabb.z1) for e in entries]).T
+        box_lo = boxes[:3, None, :]
+        box_hi = boxes[3:, None, :]
+        o = origins[:, :, None]
+        parallel = (directions == 0.0)[:, :, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inv = 1.0 / directions[:, :, None]
+            t0 = (box_lo - o) * inv
+            t1 = (box_hi - o) * inv
+        near = np.where(parallel, -np.inf, np.minimum(t0, t1))
+        far = np.where(parallel, np.inf, np.maximum(t0, t1))
+        outside = (parallel & ((o < box_lo) | (o > box_hi))).any(axis=0)
+        t_near = np.maximum(near.max(axis=0), 0.0)
+        t_far = np.minimum(far.min(axis=0), max_distance)
+        # Missed boxes sort last at infinity, past any best distance.
+        t_near[(t_near > t_far) | outside] = np.inf
+        order = np.argsort(t_near, axis=1, kind="stable")
+        t_sorted = np.take_along_axis(t_near, order, axis=1)
+
+        targets = [entry.target for entry in entries]
+        results = []
+        tests = 0
+        for (origin, direction), indices, distances in zip(rays, order.tolist(), t_sorted.tolist()):
+            self.ray.origin = origin
+            self.ray.direction = direction
+            self.tests = 0
+            results.append(self._nearest(origin, zip(map(targets.__getitem__, indices), distances), max_distance, collider))
+            tests += self.tests
+        self.tests = tests
+        return results
@@ -1,24 +1,122 @@
 from __future__ import annotations
 
 from typing import TYPE_CHECKING
+from game_tools.assets import AssetCache, AssetKey
+from game_tools.loader import AssetRequest
+from game_tools.scheduler import Scheduler
+from game_tools.atlas import SpriteAtlas, SpriteBatch
+from Loxoc import TextureFiltering, TextureWraping
+import importlib
 if TYPE_CHECKING:
     from game_tools import Game
+    from Loxoc import Model, Texture, Sprite, Shader, ShaderType, Font
 
 class Scene:
+    # Assets borrowed in load, Game.preload_scene fetches these in the background.
+    manifest: list[AssetRequest] = []
+    # Input actions the scene reads from game.input, they have to be bound (see InputMap.require).
+    actions: tuple[str, ...] = ()
+
     def __init__(self, game: Game | None = None) -> None:
         self.loaded: bool = False
         self.game: Game | None = game
+        self.borrowed_assets: list[AssetKey] = []
+        self.scheduler: Scheduler = Scheduler()
     
     def load(self, game: Game):
         # This function should only be called once and loads all of the data from the scene into ram.
+        game.input_map.require(self.actions, type(self).__name__)
         self.loaded = True
         self.game = game
+        # Systems are added by load, so a reloaded scene starts with a fresh schedule.
+        self.scheduler = Scheduler(game.profiler)
 
     def unload(self):
         self.loaded = False
+        # Hand every borrowed asset back to the game's cache, they stay resident until evicted.
+        for key in self.borrowed_assets:
+            self.game.assets.release(key)
+        self.borrowed_assets.clear()
 
-    def update(self):
+    def fixed_update(self):
+        # Simulation, runs at Game.tick_rate (or once per frame without one) using Game.dt.
         pass
 
+    def update(self):
+        # Input and rendering, runs once per frame.
+        self.scheduler.run(self.game.window.dt)
+
     def start(self):
-        pass
\ No newline at end of file
+        pass
+
+    def snapshot(self) -> dict[str, any]:
+        # The scene's mutable runtime state.  restore puts it back in place without rebuilding
+        # or reloading anything, for restarts, checkpoints and rewinding.
+        return {}
+
+    def restore(self, snapshot:dict[str, any]):
+        pass
+
+    # Assets borrowed through these are released automatically when the scene unloads.
+
+    def load_model(self, path:str, animated:bool = False) -> Model:
+        model = self.game.assets.model(path, animated)
+        self.borrowed_assets.append(AssetCache.model_key(path, animated))
+        return model
+
+    def load_texture(self, path:str, wrap:TextureWraping = TextureWraping.REPEAT, filtering:TextureFiltering = TextureFiltering.LINEAR) -> Texture:
+        texture = self.game.assets.texture(path, wrap, filtering)
+        self.borrowed_assets.append(AssetCache.texture_key(path, wrap, filtering))
+        return texture
+
+    def load_sprite(self, path:str, wrap:TextureWraping = TextureWraping.REPEAT, filtering:TextureFiltering = TextureFiltering.LINEAR) -> Sprite:
+        sprite = self.game.assets.sprite(path, wrap, filtering)
+        self.borrowed_assets.append(AssetCache.sprite_key(path, wrap, filtering))
+        return sprite
+
+    def load_shader(self, path:str, shader_type:ShaderType) -> Shader:
+        shader = self.game.assets.shader(path, shader_type)
+        self.borrowed_assets.append(AssetCache.shader_key(path, shader_type))
+        return shader
+
+    def load_font(self, path:str, font_size:int = 48) -> Font:
+        font = self.game.assets.font(path, font_size)
+        self.borrowed_assets.append(AssetCache.font_key(path, font_size))
+        return font
+
+    def load_sprite_batch(self, atlas:SpriteAtlas, filtering:TextureFiltering = TextureFiltering.LINEAR) -> SpriteBatch:
+        # Preloading an AssetRequest.atlas packs the atlas again on a worker if any of its
+        # sprites changed, it is only loaded here if nothing did yet.  Call clear on the batch
+        # when the scene unloads.
+        if atlas.directory != self.game.atlas_directory:
+            atlas.load(self.game.atlas_directory)
+        pages = [self.load_sprite(page, TextureWraping.CLAMP_TO_EDGE, filtering) for page in atlas.pages]
+        return SpriteBatch(self.game.window, self.game.camera, atlas, pages)
+
+class SceneRegistry:
+    # Scenes by name, given as "module:Class" so a scene's module, and everything it imports,
+    # is only imported the first time one is made.
+    def __init__(self, scenes:dict[str, str | type[Scene]] | None = None) -> None:
+        self.scenes:dict[str, str | type[Scene]] = dict(scenes) if scenes else {}
+
+    def __contains__(self, name:str) -> bool:
+        return name in self.scenes
+
+    def register(self, name:str, scene:str | type[Scene]):
+        self.scenes[name] = scene
+
+    def scene_class(self, name:str) -> type[Scene]:
+        scene = self.scenes.get(name)
+        if scene is None:
+            raise KeyError(f"No scene registered as {name!r}.")
+        if isinstance(scene, str):
+            module, _, attribute = scene.partition(":")
+            scene = self.scenes[name] = getattr(importlib.import_module(module), attribute)
+        return scene
+
+    def create(self, name:str) -> Scene:
+        return self.scene_class(name)()
+
+    def resolve(self, scene:Scene | str) -> Scene:
+        # A scene passed by name is made here.
+        return self.create(scene) if isinstance(scene, str) else scene
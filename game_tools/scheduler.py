@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from game_tools.profiler import Profiler
+
+from typing import Callable, Sequence
+from collections import deque
+import time
+
+class System:
+    __slots__ = (
+        "name", "update", "frequency", "priority", "budget", "items", "order",
+        "interval", "elapsed", "since", "cursor", "clock", "last_run", "runs", "over_budget", "history"
+    )
+
+    def __init__(self, name:str, update:Callable, frequency:float | None, priority:int, budget:float | None, items:Callable[[], Sequence] | None, order:int, history:int) -> None:
+        self.name = name
+        self.update = update
+        self.frequency = frequency
+        self.priority = priority
+        # Seconds a run may take.  Sliced systems stop handing out items once it is used up,
+        # everything else is only measured against it.
+        self.budget = budget
+        self.items = items
+        self.order = order
+        self.interval = 1.0 / frequency if frequency else 0.0
+        # Due straight away, the first frame shouldn't go without it.
+        self.elapsed = self.interval
+        # Time since the last run, passed to update as dt.
+        self.since = 0.0
+        self.cursor = 0
+        # Sliced systems: seconds of dt handed out so far and where it stood when each item
+        # was last updated, so an item's dt covers every run since, not just the last one.
+        self.clock = 0.0
+        self.last_run:list[float] = []
+        self.runs = 0
+        self.over_budget = 0
+        # Seconds taken by the most recent runs.
+        self.history:deque[float] = deque(maxlen=history)
+
+class Scheduler:
+    # Runs a scene's systems from Scene.update.  Every system runs at its own frequency (None
+    # for every frame), higher priorities first.  Sliced systems spread their items over as
+    # many frames as their budget needs, continuing round-robin where the last run stopped.
+    def __init__(self, profiler:Profiler | None = None, history:int = 120) -> None:
+        self.profiler = profiler
+        self.history = history
+        self.systems:list[System] = []
+        self.by_name:dict[str, System] = {}
+        self._added = 0
+
+    def __contains__(self, name:str) -> bool:
+        return name in self.by_name
+
+    def add(self, name:str, update:Callable[[float], None], frequency:float | None = None, priority:int = 0, budget:float | None = None) -> System:
+        # update(dt) with dt the time since the system last ran.
+        return self._add(System(name, update, frequency, priority, budget, None, self._added, self.history))
+
+    def add_sliced(self, name:str, items:Callable[[], Sequence], update:Callable[[any, float], None], frequency:float | None = None, priority:int = 0, budget:float | None = None) -> System:
+        # update(item, dt) for as many of items() as fit in the budget each run, with dt the
+        # time since that item was last updated.  With no budget every item is updated each run.
+        return self._add(System(name, update, frequency, priority, budget, items, self._added, self.history))
+
+    def _add(self, system:System) -> System:
+        if system.name in self.by_name:
+            raise KeyError(f"System {system.name!r} already scheduled.")
+        self._added += 1
+        self.by_name[system.name] = system
+        self.systems.append(system)
+        self.systems.sort(key=lambda system: (-system.priority, system.order))
+        return system
+
+    def remove(self, name:str):
+        self.systems.remove(self.by_name.pop(name))
+
+    def run(self, dt:float):
+        profiler = self.profiler
+        profiling = profiler is not None and profiler.enabled
+        perf_counter_ns = time.perf_counter_ns
+        for system in self.systems:
+            system.since += dt
+            interval = system.interval
+            if interval:
+                system.elapsed += dt
+                if system.elapsed < interval:
+                    continue
+                # Keep the phase, but don't bank more than one run after a long frame.
+                system.elapsed = min(system.elapsed - interval, interval)
+            since = system.since
+            system.since = 0.0
+            start = perf_counter_ns()
+            if system.items is None:
+                system.update(since)
+            else:
+                self._run_sliced(system, since, start)
+            end = perf_counter_ns()
+            taken = (end - start) / 1e9
+            system.runs += 1
+            system.history.append(taken)
+            if system.budget is not None and taken > system.budget:
+                system.over_budget += 1
+            if profiling:
+                profiler.record(system.name, start, end)
+
+    def _run_sliced(self, system:System, dt:float, start:int):
+        items = system.items()
+        count = len(items)
+        if not count:
+            return
+        update = system.update
+        cursor = system.cursor % count
+        last_run = system.last_run
+        if len(last_run) != count:
+            # New items are due from the previous run on.
+            del last_run[count:]
+            last_run.extend([system.clock] * (count - len(last_run)))
+        clock = system.clock = system.clock + dt
+        if system.budget is None:
+            for i in range(count):
+                index = (cursor + i) % count
+                update(items[index], clock - last_run[index])
+                last_run[index] = clock
+            return
+        # Always at least one item, so a tight budget still makes progress.  Stops before an
+        # item that would end past the deadline if it took as long as the average one so far.
+        deadline = start + int(system.budget * 1e9)
+        perf_counter_ns = time.perf_counter_ns
+        for i in range(count):
+            update(items[cursor], clock - last_run[cursor])
+            last_run[cursor] = clock
+            cursor = (cursor + 1) % count
+            now = perf_counter_ns()
+            if now + (now - start) // (i + 1) > deadline:
+                break
+        system.cursor = cursor
+
+    def report(self) -> dict[str, dict[str, float]]:
+        # Milliseconds each system took per run over the recent runs, against its budget.
+        report = {}
+        for system in self.systems:
+            samples = system.history
+            report[system.name] = {
+                "frequency": system.frequency if system.frequency else 0.0,
+                "runs": system.runs,
+                "mean": sum(samples) / len(samples) * 1000 if samples else 0.0,
+                "max": max(samples) * 1000 if samples else 0.0,
+                "budget": system.budget * 1000 if system.budget is not None else 0.0,
+                "over_budget": system.over_budget
+            }
+        return report
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from Loxoc import Text
+
+from functools import lru_cache
+
+class TextLabel:
+    # A Text only written to when its string changes, every write has the engine lay the
+    # string out again.  pushes counts the writes.
+    __slots__ = ("text_object", "value", "pushes")
+
+    def __init__(self, text_object:Text) -> None:
+        self.text_object = text_object
+        self.value:str = text_object.text
+        self.pushes = 0
+
+    def set(self, value:str) -> bool:
+        if value is self.value or value == self.value:
+            return False
+        self.value = value
+        self.text_object.text = value
+        self.pushes += 1
+        return True
+
+@lru_cache(maxsize=256)
+def glyph_run(text:str) -> tuple[tuple[int, ...], tuple[int, ...]]:
+    # For typing text out: how many visible glyphs the first n characters hold, for every n,
+    # and where the prefix showing each count of visible glyphs ends.  Whitespace draws
+    # nothing, so it is never revealed on its own.  Worked out once per string and shared.
+    visible_at = [0]
+    ends = [0]
+    for i, character in enumerate(text):
+        if not character.isspace():
+            ends.append(i + 1)
+        visible_at.append(len(ends) - 1)
+    return tuple(visible_at), tuple(ends)
+
+class TypedText:
+    # A string revealed into a Text a character at a time.  Revealing only writes the Text
+    # when another visible glyph appears, see glyph_run.
+    __slots__ = ("label", "text", "visible_at", "ends", "visible")
+
+    def __init__(self, text_object:Text, text:str) -> None:
+        self.label = TextLabel(text_object)
+        self.text = text
+        self.visible_at, self.ends = glyph_run(text)
+        self.visible = -1
+
+    @property
+    def pushes(self) -> int:
+        return self.label.pushes
+
+    def reveal(self, characters:int):
+        # Shows the first characters of the text.
+        visible = self.visible_at[characters if characters < len(self.visible_at) else -1]
+        if visible != self.visible:
+            self.visible = visible
+            self.label.set(self.text[:self.ends[visible]])
@@ -1,8 +1,10 @@
-from Loxoc import (MouseDevice, Vec2, Object2D, EVENT_STATE)
+from Loxoc import (Vec2, Object2D)
+from game_tools.input import InputState
 
-def is_clicking_sprite(obj: Object2D, mouse: MouseDevice) -> bool:
+def is_clicking_sprite(obj: Object2D, input: InputState) -> bool:
+    # True on the frame the mouse button goes down over the sprite.
     o_wd2 = obj.width/2
     o_hd2 = obj.height/2
-    return mouse.state == EVENT_STATE.PRESSED and \
-    obj.position.x - o_wd2 < mouse.x < obj.position.x + o_wd2 and\
-    obj.position.y - o_hd2 < mouse.y < obj.position.y + o_hd2
\ No newline at end of file
+    return input.mouse_pressed and \
+    obj.position.x - o_wd2 < input.mouse_x < obj.position.x + o_wd2 and\
+    obj.position.y - o_hd2 < input.mouse_y < obj.position.y + o_hd2
\ No newline at end of file
@@ -1,8 +1,12 @@
-from Loxoc import Camera, Window, EVENT_FLAG
 from game_tools import Game
-from game import SceneMainMenu
+from game import SCENES
+from game.controls import CONTROLS
 
+def create_game() -> Game:
+    # Only the main menu is imported and loaded before its first frame, see SCENES.
+    game = Game("main_menu", bindings=CONTROLS, scenes=SCENES)
+    game.init_load()
+    return game
 
-game = Game(SceneMainMenu())
-game.init_load()
-game.game_loop()
\ No newline at end of file
+if __name__ == "__main__":
+    create_game().game_loop()